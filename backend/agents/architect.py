@@ -1,7 +1,8 @@
 import os
-from typing import TypedDict, Optional
+from typing import TypedDict, Optional, Callable, Any, List, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 from api_config import api_config
+from partial_json import PlanStreamParser, parse_lenient_json
 
 class ArchitectState(TypedDict):
     """State for the Architect Agent."""
@@ -34,10 +35,42 @@ class ArchitectAgent:
             temperature=0.7
         )
     
-    def plan(self, user_prompt: str) -> dict:
+    def _split_entry(self, value: Any) -> Tuple[str, List[str]]:
+        """Split a plan entry into (description, depends_on)."""
+        if isinstance(value, dict):
+            depends_on = value.get("depends_on") or []
+            if not isinstance(depends_on, list):
+                depends_on = [depends_on]
+            return str(value.get("description", "")), [str(d) for d in depends_on]
+        return str(value), []
+    
+    def _normalize(self, plan: dict) -> dict:
+        """
+        Flatten file entries to {filename: description} and collect
+        dependencies into plan["dependencies"] ({filename: [files it imports]}).
+        Dependencies on files outside the plan are dropped.
+        """
+        files, dependencies = {}, {}
+        for filename, value in plan["files"].items():
+            files[filename], dependencies[filename] = self._split_entry(value)
+        
+        for filename, depends_on in dependencies.items():
+            dependencies[filename] = [d for d in dict.fromkeys(depends_on) if d in files and d != filename]
+        
+        return {**plan, "files": files, "dependencies": dependencies}
+    
+    def plan(self, user_prompt: str, on_file: Optional[Callable[[str, str, Optional[str], List[str]], None]] = None) -> dict:
         """
         Generate a file structure plan based on user's prompt.
-        Returns a JSON structure with files and their purposes.
+        Returns a JSON structure with files, their purposes and the files
+        each one imports ("dependencies").
+        
+        The response is streamed and parsed incrementally. Each entry of
+        "files" is passed to on_file(filename, description, tech_stack, depends_on)
+        as soon as it is complete, so code generation can start early;
+        tech_stack is None if the model has not emitted it yet.
+        Malformed JSON (prose, fences, trailing commas, truncation) is
+        repaired before falling back to the default plan.
         """
         system_prompt = """You are an expert software architect. 
 Given a user's app description, create a minimal file structure plan.
@@ -45,11 +78,13 @@ Return ONLY a valid JSON object with this structure:
 {
   "tech_stack": "React + Tailwind",
   "files": {
-    "index.html": "Main HTML entry point",
-    "App.tsx": "Root React component",
-    "styles.css": "Global styles"
+    "styles.css": {"description": "Global styles", "depends_on": []},
+    "App.tsx": {"description": "Root React component", "depends_on": ["styles.css"]},
+    "index.html": {"description": "Main HTML entry point", "depends_on": ["App.tsx"]}
   }
 }
+"depends_on" lists the planned files that a file imports or loads. Never create cycles.
+List files that others depend on first.
 Keep it simple and minimal. No markdown, no explanations."""
 
         messages = [
@@ -57,27 +92,42 @@ Keep it simple and minimal. No markdown, no explanations."""
             HumanMessage(content=f"User wants: {user_prompt}")
         ]
         
-        response = self.llm.invoke(messages)
-        
-        # Parse the JSON response
-        import json
+        parser = PlanStreamParser()
         try:
-            # Clean the response (remove markdown if present)
-            content = response.content.strip()
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            
-            plan = json.loads(content.strip())
-            return plan
-        except Exception as e:
-            # Fallback structure
-            return {
-                "tech_stack": "HTML + CSS + JS",
-                "files": {
-                    "index.html": "Main HTML file",
-                    "style.css": "Styling",
-                    "script.js": "JavaScript logic"
-                }
+            for chunk in self.llm.stream(messages):
+                text = chunk.content if isinstance(chunk.content, str) else ""
+                for filename, value in parser.feed(text):
+                    if on_file:
+                        description, depends_on = self._split_entry(value)
+                        on_file(filename, description, parser.fields.get("tech_stack"), depends_on)
+        except Exception:
+            if not parser.buffer:
+                raise
+            # Otherwise use whatever was received before the stream failed
+        
+        plan = parse_lenient_json(parser.buffer)
+        if plan and isinstance(plan.get("files"), dict) and plan["files"]:
+            plan.setdefault("tech_stack", "HTML + CSS + JS")
+            return self._normalize(plan)
+        
+        if parser.files:
+            # Truncated beyond repair, but some entries arrived intact
+            return self._normalize({
+                "tech_stack": parser.fields.get("tech_stack", "HTML + CSS + JS"),
+                "files": dict(parser.files)
+            })
+        
+        # Fallback structure
+        return {
+            "tech_stack": "HTML + CSS + JS",
+            "files": {
+                "index.html": "Main HTML file",
+                "style.css": "Styling",
+                "script.js": "JavaScript logic"
+            },
+            "dependencies": {
+                "index.html": ["style.css", "script.js"],
+                "style.css": [],
+                "script.js": []
             }
+        }
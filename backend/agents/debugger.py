@@ -2,13 +2,22 @@
 Debugger Agent for CodeGenesis
 Analyzes code errors and suggests fixes
 """
-import os
 import re
 import json
 from typing import Optional, Dict, List, Any
 from dataclasses import dataclass
 from langchain_core.messages import HumanMessage, SystemMessage
 from api_config import api_config
+from reference_index import ReferenceIndex
+
+
+# File references in stack traces and error messages
+_STACK_FILE_PATTERNS = [
+    re.compile(r'at\s+(.+\.(?:tsx?|jsx?|py|css))'),
+    re.compile(r'in\s+(.+\.(?:tsx?|jsx?|py|css))'),
+    re.compile(r'File\s+"([^"]+)"'),
+    re.compile(r'(\w+\.(?:tsx?|jsx?|py|css)):\d+'),
+]
 
 
 @dataclass
@@ -53,6 +62,8 @@ class DebuggerAgent:
             user_base_url=user_base_url,
             temperature=0.3  # Lower temperature for precise debugging
         )
+        # Names of the files being debugged, kept in sync incrementally across diagnose() calls
+        self.references = ReferenceIndex()
     
     def _classify_error(self, error: str) -> str:
         """Classify the error type based on the error message"""
@@ -75,28 +86,15 @@ class DebuggerAgent:
     
     def _extract_affected_files(self, error: str, files: Dict[str, str]) -> List[str]:
         """Extract which files are likely affected based on error and stack trace"""
-        affected = []
-        
-        # Look for file references in the error
-        file_patterns = [
-            r'at\s+(.+\.(?:tsx?|jsx?|py|css))',
-            r'in\s+(.+\.(?:tsx?|jsx?|py|css))',
-            r'File\s+"([^"]+)"',
-            r'(\w+\.(?:tsx?|jsx?|py|css)):\d+',
-        ]
-        
-        for pattern in file_patterns:
-            matches = re.findall(pattern, error)
-            affected.extend(matches)
+        # Provided files the error names by path, basename or exported symbol, in one pass
+        self.references.update(files)
+        affected = self.references.files(error)
         
-        # Also check which provided files might contain relevant code
-        for filename in files.keys():
-            basename = os.path.basename(filename)
-            if basename in error or filename in error:
-                if filename not in affected:
-                    affected.append(filename)
+        # Then any other file references in the error
+        for pattern in _STACK_FILE_PATTERNS:
+            affected.extend(pattern.findall(error))
         
-        return list(set(affected))[:5]  # Limit to 5 files
+        return list(dict.fromkeys(affected))[:5]  # Limit to 5 files
     
     def diagnose(self, error: str, files: Dict[str, str]) -> DebugResult:
         """
@@ -136,16 +134,25 @@ Return your analysis as a valid JSON object with this EXACT structure:
     "error_type": "syntax|runtime|type|reference|null_reference|import|network|logic",
     "root_cause": "Clear explanation of what's causing the error",
     "suggested_fix": "Detailed description of how to fix it",
-    "diff": "Code changes needed (show before/after or the fixed code)",
+    "diff": "Search/replace blocks with the code changes needed",
     "confidence": 0.8
 }
 
+The diff MUST use search/replace blocks, one per change, each preceded by the file path:
+path/to/file.tsx
+<<<<<<< SEARCH
+exact lines from the current file
+=======
+replacement lines
+>>>>>>> REPLACE
+
 Rules:
 1. Be specific about what line/code is causing the issue
 2. Provide actionable fix suggestions
 3. If you're not sure about the fix, set confidence lower
-4. The diff should show the actual code changes needed
-5. Return ONLY the JSON, no additional text"""
+4. SEARCH sections must copy the existing code exactly, with just enough context to be unique
+5. Never rewrite whole files - only include the lines that change
+6. Return ONLY the JSON, no additional text"""
 
         user_prompt = f"""## Error:
 ```
@@ -1,11 +1,141 @@
 import os
-from typing import Optional
+import re
+import threading
+from typing import Optional, Dict, List, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 from api_config import api_config
 
+
+# Finish reasons that mean the output hit the token limit (OpenAI/Gemini, Anthropic)
+TRUNCATION_REASONS = {"length", "max_tokens"}
+
+# Characters of a truncated file sent back when asking for the rest
+CONTINUATION_TAIL_CHARS = 1500
+
+# Shortest overlap trusted anywhere; shorter ones must restate the whole last line
+MIN_STITCH_OVERLAP = 16
+
+
+def strip_fences(code: str) -> str:
+    """Remove a surrounding markdown code fence (the closing one may be missing if output was cut off)"""
+    if not code.startswith("```"):
+        return code
+    lines = code.split("\n")
+    if len(lines) > 1 and lines[-1].strip().startswith("```"):
+        return "\n".join(lines[1:-1])
+    return "\n".join(lines[1:])
+
+
+# Files whose content is prose, where any text is a valid rewrite
+PROSE_EXTENSIONS = {".md", ".markdown", ".txt", ".rst"}
+
+_FENCED_BLOCK = re.compile(r'^```[^\n]*\n(.*?)(?:^```|\Z)', re.S | re.M)
+_CODE_PUNCTUATION = re.compile(r'[{}()\[\];=<>:]')
+_LIST_MARKER = re.compile(r'^\s*(?:[-*]|\d+[.)])\s+')
+
+
+def extract_code(response: str, filename: str) -> Optional[str]:
+    """
+    The new file content in a full-rewrite response, or None if it holds no code.
+    
+    A fenced block anywhere in the response is taken as the content. Otherwise
+    the response is rejected if it opens with a sentence or is a single remark,
+    so an explanation never replaces a source file.
+    """
+    blocks = _FENCED_BLOCK.findall(response)
+    if blocks:
+        code = max(blocks, key=len).rstrip("\n")
+        return code if code.strip() else None
+    
+    text = response.strip()
+    if not text:
+        return None
+    if os.path.splitext(filename)[1].lower() in PROSE_EXTENSIONS:
+        return text
+    
+    first_line = text.split("\n", 1)[0].strip().rstrip(":")
+    if first_line[:1].isupper() and len(first_line.split()) >= 3 and not _CODE_PUNCTUATION.search(first_line):
+        return None
+    if text[-1] in ".!?" and not _CODE_PUNCTUATION.search(text):
+        return None
+    return text
+
+
+def is_truncated(response) -> bool:
+    """Whether an LLM response stopped because it reached the output token limit"""
+    metadata = getattr(response, "response_metadata", None)
+    if not isinstance(metadata, dict):
+        return False
+    reason = metadata.get("finish_reason") or metadata.get("stop_reason")
+    return isinstance(reason, str) and reason.lower() in TRUNCATION_REASONS
+
+
+def stitch(existing: str, continuation: str, max_overlap: int = 500) -> str:
+    """
+    Append a continuation, dropping any text it repeats from the end of existing.
+    
+    Models often restate the last line before carrying on, so the longest
+    suffix of existing that is also a prefix of continuation is removed.
+    Short overlaps only count if they span the whole last line and contain
+    a word character, so a lone "}" is never taken for a repeat.
+    """
+    if continuation.lstrip().startswith("```"):
+        continuation = continuation.lstrip().split("\n", 1)[1] if "\n" in continuation.lstrip() else ""
+    
+    for size in range(min(max_overlap, len(existing), len(continuation)), 0, -1):
+        overlap = continuation[:size]
+        if not existing.endswith(overlap):
+            continue
+        at_line_start = size == len(existing) or existing[-size - 1] == "\n"
+        if size >= MIN_STITCH_OVERLAP or (at_line_start and re.search(r"\w", overlap)):
+            return existing + continuation[size:]
+    return existing + continuation
+
+
+# Delimiters around each file in a batched response
+FILE_START = "=== FILE: {} ==="
+FILE_END = "=== END FILE: {} ==="
+_BATCH_MARKER = re.compile(r'^[ \t]*=== (END )?FILE: (.+?) ===[ \t]*$', re.M)
+
+
+def split_batch_response(text: str, expected: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Split a batched response into per-file contents.
+    
+    A file only counts if its start and matching end delimiter are both
+    present and the content between them is non-empty, so a response cut
+    off mid-file never yields a partial file.
+    
+    Returns:
+        (complete files, expected files that are missing or truncated)
+    """
+    found: Dict[str, str] = {}
+    current, start = None, 0
+    for marker in _BATCH_MARKER.finditer(text):
+        is_end, name = bool(marker.group(1)), marker.group(2).strip()
+        if not is_end:
+            current, start = name, marker.end()
+        elif name == current:
+            code = text[start:marker.start()].strip("\n")
+            if code.lstrip().startswith("```"):
+                code = strip_fences(code.strip())
+            if code.strip():
+                found.setdefault(name, code)
+            current = None
+    
+    complete = {name: found[name] for name in expected if name in found}
+    missing = [name for name in expected if name not in complete]
+    return complete, missing
+
 class EngineerAgent:
     """Agent responsible for writing code for individual files."""
     
+    MAX_CONTINUATIONS = 3  # Continuation requests per truncated file
+    
+    # Shared across instances: how often output hit the token limit
+    continuation_stats = {"requests": 0, "truncated": 0, "continuations": 0, "unresolved": 0}
+    _stats_lock = threading.Lock()
+    
     def __init__(self, user_api_key: Optional[str] = None, user_provider: Optional[str] = None, user_base_url: Optional[str] = None):
         """
         Initialize Engineer Agent.
@@ -28,9 +158,67 @@ class EngineerAgent:
             temperature=0.3
         )
     
-    def write_file(self, filename: str, description: str, user_prompt: str, tech_stack: str) -> str:
+    @classmethod
+    def _record(cls, **counts: int):
+        with cls._stats_lock:
+            for key, value in counts.items():
+                cls.continuation_stats[key] += value
+    
+    @classmethod
+    def get_continuation_stats(cls) -> Dict[str, float]:
+        """Counters for truncated outputs and the continuation requests they needed"""
+        with cls._stats_lock:
+            stats = dict(cls.continuation_stats)
+        stats["truncation_rate"] = stats["truncated"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+    
+    def _invoke_complete(self, messages: list, filename: str) -> str:
+        """
+        Invoke the LLM and follow up on output cut off at the token limit.
+        
+        Each continuation request gets the system prompt and the tail of what
+        was written so far, and its output is stitched onto the file. Stops
+        after MAX_CONTINUATIONS rounds.
+        """
+        response = self.llm.invoke(messages)
+        content = response.content
+        self._record(requests=1)
+        if not is_truncated(response):
+            return content
+        
+        self._record(truncated=1)
+        for _ in range(self.MAX_CONTINUATIONS):
+            tail = content[-CONTINUATION_TAIL_CHARS:]
+            response = self.llm.invoke([
+                messages[0],
+                HumanMessage(content=f"""Your output for {filename} was cut off. It currently ends with:
+
+{tail}
+
+Continue from exactly where it stops. Return ONLY the remaining code, without repeating what is already written.""")
+            ])
+            self._record(continuations=1)
+            content = stitch(content, response.content)
+            if not is_truncated(response):
+                return content
+        
+        self._record(unresolved=1)
+        return content
+    
+    def write_file(
+        self,
+        filename: str,
+        description: str,
+        user_prompt: str,
+        tech_stack: str,
+        dependency_interfaces: Optional[str] = None
+    ) -> str:
         """
         Generate code for a specific file.
+        
+        Args:
+            dependency_interfaces: Export/signature summaries of the files this
+                                   file imports, so imports match what exists
         """
         system_prompt = f"""You are an expert software engineer.
 Generate ONLY the code for the file '{filename}'.
@@ -39,21 +227,163 @@ File Purpose: {description}
 User's App Idea: {user_prompt}
 
 Return ONLY the raw code. No markdown, no explanations, no ```."""
+        
+        if dependency_interfaces:
+            system_prompt += f"""
+
+This file imports from these already-written files. Use exactly these exports and names:
+{dependency_interfaces}"""
 
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"Write the complete code for {filename}")
         ]
         
-        response = self.llm.invoke(messages)
-        
         # Clean the response
-        code = response.content.strip()
+        code = self._invoke_complete(messages, filename).strip()
         
         # Remove markdown code blocks if present
-        if code.startswith("```"):
-            lines = code.split("\n")
-            # Remove first and last lines (```)
-            code = "\n".join(lines[1:-1])
+        return strip_fences(code)
+    
+    def write_files_batch(self, files: Dict[str, str], user_prompt: str, tech_stack: str) -> Dict[str, str]:
+        """
+        Generate several small files in a single request.
         
-        return code
+        Args:
+            files: Dict mapping filenames to their descriptions
+        
+        Returns:
+            Dict mapping every requested filename to its code. Files missing
+            from the response or cut off are generated with write_file.
+        """
+        listing = "\n".join(f"- {name}: {description}" for name, description in files.items())
+        system_prompt = f"""You are an expert software engineer.
+Generate ONLY the code for these files:
+{listing}
+
+Tech Stack: {tech_stack}
+User's App Idea: {user_prompt}
+
+Wrap each file exactly like this, in the order listed:
+{FILE_START.format("<filename>")}
+<raw code>
+{FILE_END.format("<filename>")}
+
+No markdown, no explanations, no ``` and nothing outside the delimiters."""
+
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"Write the complete code for {', '.join(files)}")
+        ]
+        
+        response = self._invoke_complete(messages, ", ".join(files))
+        written, missing = split_batch_response(response, list(files))
+        
+        # Anything the batch did not deliver in full is retried on its own
+        for name in missing:
+            written[name] = self.write_file(name, files[name], user_prompt, tech_stack)
+        
+        return {name: written[name] for name in files}
+    
+    def fix_file(self, filename: str, content: str, issue: str, tech_stack: str) -> str:
+        """
+        Regenerate a whole file with a fix applied.
+        
+        Used as a fallback when a patch from the debugger does not apply cleanly.
+        """
+        system_prompt = f"""You are an expert software engineer.
+Rewrite the file '{filename}' with the requested fix applied.
+Tech Stack: {tech_stack}
+Keep everything that is unrelated to the fix unchanged.
+
+Return ONLY the raw code. No markdown, no explanations, no ```."""
+
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"""## Fix required:
+{issue}
+
+## Current {filename}:
+{content}""")
+        ]
+        
+        code = self._invoke_complete(messages, filename).strip()
+        return strip_fences(code)
+    
+    def select_files(self, change_request: str, filenames: List[str], limit: int) -> List[str]:
+        """
+        Ask which project files a change request needs edited.
+        
+        Used when no file is named in the request or found by search. Only
+        names that exist in the project are returned, at most `limit` of them.
+        """
+        system_prompt = f"""You are an expert software engineer working on an existing project.
+List the files that must be edited to make the requested change, most important first, at most {limit}.
+
+Return ONLY file paths copied from the project file list, one per line.
+If no file in the project fits the change, return nothing."""
+        file_list = "\n".join(filenames)
+
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"""## Change request:
+{change_request}
+
+## Project files:
+{file_list}""")
+        ]
+        
+        response = self.llm.invoke(messages)
+        known = set(filenames)
+        selected = []
+        for line in strip_fences(response.content.strip()).split("\n"):
+            name = _LIST_MARKER.sub("", line).strip().strip("`'\"")
+            if name in known and name not in selected:
+                selected.append(name)
+        return selected[:limit]
+    
+    def edit_file(
+        self,
+        filename: str,
+        content: str,
+        change_request: str,
+        tech_stack: str,
+        related_interfaces: Optional[str] = None
+    ) -> str:
+        """
+        Produce an edit for an existing file as search/replace blocks.
+        
+        Returns the raw response; callers apply it with patcher, or use it as
+        the new content if the model rewrote the file instead.
+        """
+        system_prompt = f"""You are an expert software engineer editing an existing project.
+Apply the requested change to the file '{filename}'.
+Tech Stack: {tech_stack}
+
+Return ONLY search/replace blocks, in this format:
+<<<<<<< SEARCH
+exact existing lines
+=======
+new lines
+>>>>>>> REPLACE
+
+SEARCH sections must copy the existing code exactly, with just enough context to be unique.
+If the file needs no change, return nothing."""
+        
+        if related_interfaces:
+            system_prompt += f"""
+
+Other project files this file works with (keep these names and exports consistent):
+{related_interfaces}"""
+
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"""## Change request:
+{change_request}
+
+## Current {filename}:
+{content}""")
+        ]
+        
+        code = self._invoke_complete(messages, filename).strip()
+        return strip_fences(code)
@@ -4,10 +4,16 @@ Improves code quality, structure, and performance
 """
 import os
 import json
-from typing import Optional, Dict, List, Any
-from dataclasses import dataclass
+import time
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any, Tuple
+from dataclasses import dataclass, field
 from langchain_core.messages import HumanMessage, SystemMessage
 from api_config import api_config
+from quality_metrics import compute_quality, QualityReport
+from aho_corasick import AhoCorasick
+from lint_rules import rule_engine, LintHit
 
 
 @dataclass
@@ -28,6 +34,21 @@ class RefactorResult:
     overall_quality_score: float  # 0-10
     summary: str
     refactored_files: Dict[str, str]  # Optionally, fully refactored versions
+    shard_stats: List[Dict[str, Any]] = field(default_factory=list)  # Per-shard timing and token counts
+
+
+@dataclass
+class BatchApplyResult:
+    """Result of applying several suggestions to one file"""
+    content: str
+    applied: List[RefactorSuggestion]
+    skipped: List[Tuple[RefactorSuggestion, str]]  # (suggestion, reason): not_found, overlap, conflict, duplicate, empty
+
+
+# Rough characters-per-token ratio used for shard budgeting
+CHARS_PER_TOKEN = 4
+
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
 
 
 class RefactorerAgent:
@@ -40,8 +61,12 @@ class RefactorerAgent:
     - Improve readability and maintainability
     - Apply best practices for the tech stack
     - Security vulnerability detection
+    - Deterministic local quality scoring
     """
     
+    SHARD_TOKEN_BUDGET = 6000  # Max code tokens per analysis call
+    MAX_PARALLEL_SHARDS = 4
+    
     def __init__(self, user_api_key: Optional[str] = None, user_provider: Optional[str] = None, user_base_url: Optional[str] = None):
         """
         Initialize Refactorer Agent.
@@ -63,28 +88,50 @@ class RefactorerAgent:
             temperature=0.4
         )
     
-    def analyze(self, files: Dict[str, str], focus_areas: Optional[List[str]] = None) -> RefactorResult:
+    def _build_shards(self, files: Dict[str, str]) -> List[List[Tuple[str, str]]]:
         """
-        Analyze code and suggest refactoring improvements.
-        
-        Args:
-            files: Dict mapping filenames to their content
-            focus_areas: Optional list of areas to focus on: 
-                        ['performance', 'readability', 'security', 'best_practice']
+        Group files into token-budgeted shards.
         
-        Returns:
-            RefactorResult with suggestions and overall quality score
+        Files are packed first-fit by size; a file larger than the budget is
+        split on line boundaries into labelled parts so no code is dropped.
         """
-        focus = focus_areas or ['performance', 'readability', 'best_practice']
+        budget_chars = self.SHARD_TOKEN_BUDGET * CHARS_PER_TOKEN
+        pieces = []
+        for filename, content in files.items():
+            if len(content) <= budget_chars:
+                pieces.append((filename, content))
+                continue
+            
+            parts, current = [], []
+            current_size = 0
+            for line in content.splitlines(keepends=True):
+                if current and current_size + len(line) > budget_chars:
+                    parts.append("".join(current))
+                    current, current_size = [], 0
+                current.append(line)
+                current_size += len(line)
+            if current:
+                parts.append("".join(current))
+            for i, part in enumerate(parts, 1):
+                pieces.append((f"{filename} (part {i}/{len(parts)})", part))
         
-        # Build context for LLM
-        files_context = []
-        for filename, content in list(files.items())[:5]:  # Limit files
-            if len(content) > 2000:
-                content = content[:2000] + "\n... (truncated)"
-            files_context.append(f"### {filename}\n```\n{content}\n```")
+        shards: List[List[Tuple[str, str]]] = []
+        sizes: List[int] = []
+        for label, content in sorted(pieces, key=lambda p: len(p[1]), reverse=True):
+            for i, size in enumerate(sizes):
+                if size + len(content) <= budget_chars:
+                    shards[i].append((label, content))
+                    sizes[i] += len(content)
+                    break
+            else:
+                shards.append([(label, content)])
+                sizes.append(len(content))
         
-        focus_str = ", ".join(focus)
+        return shards
+    
+    def _analyze_shard(self, index: int, shard: List[Tuple[str, str]], focus_str: str) -> Dict[str, Any]:
+        """Analyze one shard with a single LLM call (map step)."""
+        files_context = [f"### {label}\n```\n{content}\n```" for label, content in shard]
         
         system_prompt = f"""You are an expert code reviewer focusing on: {focus_str}.
 
@@ -124,10 +171,27 @@ Analyze and provide improvement suggestions."""
             HumanMessage(content=user_prompt)
         ]
         
+        chars = sum(len(content) for _, content in shard)
+        stats = {
+            "shard": index,
+            "files": [label for label, _ in shard],
+            "chars": chars,
+            "input_tokens": (len(system_prompt) + len(user_prompt)) // CHARS_PER_TOKEN,
+            "output_tokens": 0
+        }
+        started = time.perf_counter()
+        
         try:
             response = self.llm.invoke(messages)
             content = response.content.strip()
             
+            usage = getattr(response, "usage_metadata", None)
+            if isinstance(usage, dict):
+                stats["input_tokens"] = usage.get("input_tokens", stats["input_tokens"])
+                stats["output_tokens"] = usage.get("output_tokens", 0)
+            else:
+                stats["output_tokens"] = len(content) // CHARS_PER_TOKEN
+            
             # Clean up the response
             if content.startswith("```"):
                 content = content.split("```")[1]
@@ -138,36 +202,131 @@ Analyze and provide improvement suggestions."""
             
             suggestions = []
             for s in result.get("suggestions", []):
+                # Suggestions on split files refer to the original filename
+                filename = s.get("file", "unknown").split(" (part ")[0]
                 suggestions.append(RefactorSuggestion(
                     category=s.get("category", "best_practice"),
-                    file=s.get("file", "unknown"),
+                    file=filename,
                     description=s.get("description", ""),
                     before=s.get("before", ""),
                     after=s.get("after", ""),
                     priority=s.get("priority", "medium")
                 ))
             
-            return RefactorResult(
-                suggestions=suggestions,
-                overall_quality_score=result.get("overall_quality_score", 5.0),
-                summary=result.get("summary", "Analysis complete"),
-                refactored_files={}
-            )
+            return {
+                "suggestions": suggestions,
+                "score": float(result.get("overall_quality_score", 5.0)),
+                "summary": result.get("summary", "Analysis complete"),
+                "stats": stats
+            }
             
         except json.JSONDecodeError:
+            stats["error"] = "parse_failed"
+        except Exception as e:
+            stats["error"] = str(e)
+        finally:
+            stats["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        
+        return {"suggestions": [], "score": None, "summary": "", "stats": stats}
+    
+    def analyze(self, files: Dict[str, str], focus_areas: Optional[List[str]] = None) -> RefactorResult:
+        """
+        Analyze code and suggest refactoring improvements.
+        
+        Every file is reviewed: files are grouped into token-budgeted shards,
+        the shards are analyzed in parallel, and the results are merged into
+        one RefactorResult with deduplicated suggestions and a size-weighted
+        overall score.
+        
+        Args:
+            files: Dict mapping filenames to their content
+            focus_areas: Optional list of areas to focus on: 
+                        ['performance', 'readability', 'security', 'best_practice']
+        
+        Returns:
+            RefactorResult with suggestions, overall quality score and per-shard stats
+        """
+        focus = focus_areas or ['performance', 'readability', 'best_practice']
+        focus_str = ", ".join(focus)
+        
+        shards = self._build_shards(files)
+        if not shards:
             return RefactorResult(
                 suggestions=[],
-                overall_quality_score=5.0,
-                summary="Analysis failed to parse. Raw response available.",
+                overall_quality_score=0.0,
+                summary="No files to analyze",
                 refactored_files={}
             )
-        except Exception as e:
+        
+        with ThreadPoolExecutor(max_workers=min(self.MAX_PARALLEL_SHARDS, len(shards))) as executor:
+            shard_results = list(executor.map(
+                lambda item: self._analyze_shard(item[0], item[1], focus_str),
+                enumerate(shards)
+            ))
+        
+        return self._merge_shard_results(shard_results)
+    
+    def _merge_shard_results(self, shard_results: List[Dict[str, Any]]) -> RefactorResult:
+        """Merge shard analyses into one result (reduce step)."""
+        shard_stats = [r["stats"] for r in shard_results]
+        scored = [r for r in shard_results if r["score"] is not None]
+        
+        if not scored:
+            errors = [s.get("error", "") for s in shard_stats]
+            if all(e == "parse_failed" for e in errors):
+                return RefactorResult(
+                    suggestions=[],
+                    overall_quality_score=5.0,
+                    summary="Analysis failed to parse. Raw response available.",
+                    refactored_files={},
+                    shard_stats=shard_stats
+                )
             return RefactorResult(
                 suggestions=[],
                 overall_quality_score=0.0,
-                summary=f"Analysis failed: {str(e)}",
-                refactored_files={}
+                summary=f"Analysis failed: {next(e for e in errors if e != 'parse_failed')}",
+                refactored_files={},
+                shard_stats=shard_stats
             )
+        
+        # Deduplicate suggestions on (file, snippet) or (file, description)
+        seen = set()
+        suggestions = []
+        for r in shard_results:
+            for s in r["suggestions"]:
+                key = (s.file, " ".join(s.before.split()) or s.description.strip().lower())
+                if key not in seen:
+                    seen.add(key)
+                    suggestions.append(s)
+        suggestions.sort(key=lambda s: PRIORITY_ORDER.get(s.priority, 3))
+        
+        # Weight each shard's score by the amount of code it covered
+        total_chars = sum(r["stats"]["chars"] for r in scored) or 1
+        score = sum(r["score"] * r["stats"]["chars"] for r in scored) / total_chars
+        
+        # Labels use each shard's own index, so failed shards leave gaps
+        summaries = [(r["stats"]["shard"], r["summary"]) for r in scored if r["summary"]]
+        summary = summaries[0][1] if len(summaries) == 1 else " ".join(
+            f"[{index + 1}/{len(shard_results)}] {text}" for index, text in summaries
+        )
+        
+        return RefactorResult(
+            suggestions=suggestions,
+            overall_quality_score=round(score, 1),
+            summary=summary,
+            refactored_files={},
+            shard_stats=shard_stats
+        )
+    
+    def score_locally(self, files: Dict[str, str]) -> QualityReport:
+        """
+        Score code quality with local metrics only (no LLM call).
+        
+        Combines cyclomatic complexity, function length, duplication, nesting
+        depth, file sizes and get_quick_improvements hits into a reproducible
+        0-10 score.
+        """
+        return compute_quality(files, lint=self.get_quick_improvements)
     
     def optimize(self, files: Dict[str, str]) -> Dict[str, str]:
         """
@@ -179,21 +338,13 @@ Analyze and provide improvement suggestions."""
         # Analyze first
         result = self.analyze(files, ['performance', 'best_practice'])
         
-        # For now, return original files with a note
-        # Full implementation would apply the suggestions
         optimized = {}
         
         for filename, content in files.items():
-            # Add optimization comments based on suggestions
             relevant_suggestions = [s for s in result.suggestions if s.file == filename]
             
             if relevant_suggestions:
-                comment_lines = [
-                    "// CodeGenesis Optimization Notes:",
-                    *[f"// - [{s.priority.upper()}] {s.description}" for s in relevant_suggestions[:3]],
-                    ""
-                ]
-                optimized[filename] = "\n".join(comment_lines) + content
+                optimized[filename] = self.apply_refactorings(content, relevant_suggestions).content
             else:
                 optimized[filename] = content
         
@@ -210,43 +361,95 @@ Analyze and provide improvement suggestions."""
         Returns:
             Modified file content
         """
-        if suggestion.before and suggestion.after:
-            # Simple replacement
-            if suggestion.before in file_content:
-                return file_content.replace(suggestion.before, suggestion.after, 1)
+        return self.apply_refactorings(file_content, [suggestion]).content
+    
+    def apply_refactorings(self, file_content: str, suggestions: List[RefactorSuggestion]) -> BatchApplyResult:
+        """
+        Apply many refactoring suggestions to one file in a single pass.
         
-        return file_content
+        All `before` snippets are located with one Aho-Corasick scan. Each
+        suggestion targets the first occurrence of its snippet; suggestions
+        whose spans overlap an earlier edit, or that rewrite the same snippet
+        differently, are skipped. The file is rebuilt once.
+        
+        Args:
+            file_content: Original file content
+            suggestions: Refactorings to apply, in priority order
+            
+        Returns:
+            BatchApplyResult with the new content and applied/skipped suggestions
+        """
+        applied: List[RefactorSuggestion] = []
+        skipped: List[Tuple[RefactorSuggestion, str]] = []
+        
+        candidates = []
+        for suggestion in suggestions:
+            if suggestion.before and suggestion.after:
+                candidates.append(suggestion)
+            else:
+                skipped.append((suggestion, "empty"))
+        
+        matcher = AhoCorasick(dict.fromkeys(s.before for s in candidates))
+        pattern_index = {pattern: i for i, pattern in enumerate(matcher.patterns)}
+        spans = matcher.first_occurrences(file_content)
+        
+        edits = []  # (start, end, order, suggestion)
+        replacement_for: Dict[str, str] = {}
+        for order, suggestion in enumerate(candidates):
+            span = spans.get(pattern_index[suggestion.before])
+            if span is None:
+                skipped.append((suggestion, "not_found"))
+            elif suggestion.before in replacement_for:
+                same = replacement_for[suggestion.before] == suggestion.after
+                skipped.append((suggestion, "duplicate" if same else "conflict"))
+            else:
+                replacement_for[suggestion.before] = suggestion.after
+                edits.append((span[0], span[1], order, suggestion))
+        
+        # Earlier suggestions win when spans overlap; accepted spans stay sorted by start
+        accepted = []
+        for edit in edits:
+            start, end = edit[0], edit[1]
+            i = bisect.bisect_left(accepted, (start,))
+            overlaps_prev = i > 0 and accepted[i - 1][1] > start
+            overlaps_next = i < len(accepted) and accepted[i][0] < end
+            if overlaps_prev or overlaps_next:
+                skipped.append((edit[3], "overlap"))
+            else:
+                accepted.insert(i, edit)
+        
+        pieces = []
+        cursor = 0
+        for start, end, _, suggestion in accepted:
+            pieces.append(file_content[cursor:start])
+            pieces.append(suggestion.after)
+            cursor = end
+            applied.append(suggestion)
+        pieces.append(file_content[cursor:])
+        
+        return BatchApplyResult(content="".join(pieces), applied=applied, skipped=skipped)
     
     def get_quick_improvements(self, code: str, language: str = "typescript") -> List[str]:
         """
         Get quick improvement suggestions without full refactoring.
         
-        Returns list of improvement hints.
+        Returns list of improvement hints (one per rule that matched).
+        """
+        hits = rule_engine.check(code, language.lower())
+        return list(dict.fromkeys(hit.message for hit in hits))
+    
+    def get_project_improvements(self, files: Dict[str, str], processes: Optional[int] = 1) -> List[LintHit]:
+        """
+        Run the compiled lint rules over a whole project.
+        
+        Args:
+            files: Dict mapping filenames to their content
+            processes: Worker processes for large projects (1, the default, disables the pool)
+        
+        Returns:
+            LintHit list with file, line and column for every match
         """
-        hints = []
-        
-        # Check for common issues
-        if language in ["typescript", "javascript"]:
-            if "var " in code:
-                hints.append("Consider using 'const' or 'let' instead of 'var'")
-            if "== " in code and "===" not in code:
-                hints.append("Use strict equality (===) instead of loose equality (==)")
-            if "console.log" in code:
-                hints.append("Remove console.log statements in production code")
-            if "any" in code and "typescript" in language.lower():
-                hints.append("Avoid using 'any' type - be specific with types")
-            if "(e)" in code and "catch" in code:
-                hints.append("Handle or log caught errors properly")
-        
-        elif language == "python":
-            if "except:" in code and "Exception" not in code:
-                hints.append("Be specific with exception types instead of bare except")
-            if "global " in code:
-                hints.append("Avoid using global variables")
-            if "import *" in code:
-                hints.append("Avoid wildcard imports (import *)")
-        
-        return hints
+        return rule_engine.check_project(files, processes=processes)
 
 
 class DocumenterAgent:
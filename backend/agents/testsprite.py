@@ -1,7 +1,43 @@
 import os
-from typing import Optional
+import re
+import json
+from typing import Optional, List, Dict, Any
 from langchain_core.messages import HumanMessage, SystemMessage
 from api_config import api_config
+from code_symbols import format_ui_summaries
+from partial_json import parse_lenient_json
+
+
+# Step actions understood by e2e_runner, with their Playwright JS equivalents
+STEP_ACTIONS = {
+    "goto": "await page.goto({path});",
+    "click": "await page.click({selector});",
+    "fill": "await page.fill({selector}, {value});",
+    "press": "await page.press({selector}, {key});",
+    "check": "await page.check({selector});",
+    "select": "await page.selectOption({selector}, {value});",
+    "expect_visible": "await expect(page.locator({selector})).toBeVisible();",
+    "expect_hidden": "await expect(page.locator({selector})).toBeHidden();",
+    "expect_text": "await expect(page.locator({selector}).first()).toContainText({text});",
+    "expect_count": "await expect(page.locator({selector})).toHaveCount({count});",
+    "expect_url": "await expect(page).toHaveURL(new RegExp({contains_pattern}));",
+}
+
+
+def render_playwright_script(cases: List[Dict[str, Any]]) -> str:
+    """Render structured test cases as a Playwright Test (JavaScript) spec"""
+    lines = ["import { test, expect } from '@playwright/test';", ""]
+    for case in cases:
+        lines.append(f"test({json.dumps(case['name'])}, async ({{ page }}) => {{")
+        lines.append(f"  await page.goto({json.dumps(case.get('path', '/'))});")
+        for step in case["steps"]:
+            values = {key: json.dumps(step.get(key, default)) for key, default in (
+                ("path", "/"), ("selector", ""), ("value", ""), ("key", "Enter"), ("text", ""), ("count", 0)
+            )}
+            values["contains_pattern"] = json.dumps(re.escape(str(step.get("contains", ""))))
+            lines.append("  " + STEP_ACTIONS[step["action"]].format(**values))
+        lines.extend(["});", ""])
+    return "\n".join(lines)
 
 class TestSpriteAgent:
     """Agent responsible for generating test scripts."""
@@ -36,7 +72,8 @@ class TestSpriteAgent:
 Generate a Playwright test script that validates the core functionality.
 Return ONLY the test code. No markdown, no explanations."""
 
-        file_list = "\n".join([f"- {name}: {files[name][:100]}..." for name in files.keys()])
+        file_list = "\n".join([f"- {name}" for name in files.keys()])
+        ui_summary = format_ui_summaries(files) or "(no UI markup found)"
         
         messages = [
             SystemMessage(content=system_prompt),
@@ -44,6 +81,9 @@ Return ONLY the test code. No markdown, no explanations."""
 Files in the app:
 {file_list}
 
+UI structure (select elements by these ids, test ids, labels and routes; do not invent selectors):
+{ui_summary}
+
 Generate a basic Playwright test that:
 1. Opens the app
 2. Tests the main functionality
@@ -59,3 +99,55 @@ Generate a basic Playwright test that:
             code = "\n".join(lines[1:-1])
         
         return code
+    
+    def generate_test_cases(self, files: dict, user_prompt: str) -> List[Dict[str, Any]]:
+        """
+        Generate structured end-to-end test cases that e2e_runner can execute.
+        
+        Returns:
+            List of {"name", "path", "steps": [{"action", "selector", ...}]}
+            cases; steps with unknown actions are dropped.
+        """
+        system_prompt = f"""You are a QA automation expert.
+Write end-to-end browser test cases that validate the core functionality.
+Return ONLY JSON in this shape:
+{{"tests": [{{"name": "adds a todo", "path": "/", "steps": [
+  {{"action": "fill", "selector": "#new-todo", "value": "Buy milk"}},
+  {{"action": "click", "selector": "#add"}},
+  {{"action": "expect_text", "selector": ".todo-item", "text": "Buy milk"}}
+]}}]}}
+
+Allowed actions: {", ".join(STEP_ACTIONS)}.
+Extra fields: goto uses "path", press uses "key", expect_count uses "count", expect_url uses "contains".
+Each test starts on a fresh page at its "path" and must not depend on other tests."""
+
+        file_list = "\n".join([f"- {name}" for name in files.keys()])
+        ui_summary = format_ui_summaries(files) or "(no UI markup found)"
+        
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"""User's App: {user_prompt}
+Files in the app:
+{file_list}
+
+UI structure (select elements by these ids, test ids, labels and routes; do not invent selectors):
+{ui_summary}
+
+Write 3-6 independent tests.""")
+        ]
+        
+        response = self.llm.invoke(messages)
+        data = parse_lenient_json(response.content) or {}
+        
+        cases = []
+        for case in data.get("tests", []):
+            if not isinstance(case, dict) or not isinstance(case.get("steps"), list):
+                continue
+            steps = [s for s in case["steps"] if isinstance(s, dict) and s.get("action") in STEP_ACTIONS]
+            if steps:
+                cases.append({
+                    "name": str(case.get("name") or f"test {len(cases) + 1}"),
+                    "path": str(case.get("path") or "/"),
+                    "steps": steps
+                })
+        return cases
@@ -0,0 +1,135 @@
+"""
+Aho-Corasick Automaton for CodeGenesis
+Finds every occurrence of many literal patterns in a single pass over the text
+"""
+from collections import deque
+from typing import Dict, List, Iterable, Iterator, Tuple
+
+
+class _CaseFold(dict):
+    """str.translate table that lowercases each character on its own."""
+
+    def __missing__(self, code: int) -> int:
+        lower = chr(code).lower()
+        # Characters whose lowercase is longer (e.g. 'İ') are kept as they are
+        self[code] = folded = ord(lower) if len(lower) == 1 else code
+        return folded
+
+
+_CASE_FOLD = _CaseFold()
+
+
+def fold_case(text: str) -> str:
+    """
+    Lowercase text one character at a time.
+
+    Unlike str.lower() the result always has the same length as the input,
+    so match offsets in the folded text are valid in the original.
+    """
+    return text.lower() if text.isascii() else text.translate(_CASE_FOLD)
+
+
+class AhoCorasick:
+    """
+    Multi-pattern string matcher.
+
+    Build once from a set of patterns, then scan any number of texts in
+    O(len(text) + matches) regardless of how many patterns there are.
+
+    Example:
+        matcher = AhoCorasick(["he", "she", "hers"])
+        list(matcher.iter_matches("ushers"))
+        # [(1, 4, 1), (2, 4, 0), (2, 6, 2)]  -> (start, end, pattern index)
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), case_sensitive: bool = True):
+        self.case_sensitive = case_sensitive
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        # Nearest state on the failure chain that has outputs (-1 if none)
+        self._out_link: List[int] = [-1]
+        self._built = False
+
+        for pattern in patterns:
+            self.add(pattern)
+        self.build()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def add(self, pattern: str) -> int:
+        """Add a pattern and return its index. Call build() before matching."""
+        index = len(self.patterns)
+        self.patterns.append(pattern)
+        if not pattern:
+            return index
+
+        key = pattern if self.case_sensitive else fold_case(pattern)
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._out_link.append(-1)
+            state = next_state
+        self._out[state].append(index)
+        self._built = False
+        return index
+
+    def build(self):
+        """Compute failure links (breadth-first over the trie)."""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            self._out_link[state] = -1
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                link = self._fail[child]
+                self._out_link[child] = link if self._out[link] else self._out_link[link]
+
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, pattern_index) for every match, ordered by end position.
+        """
+        if not self._built:
+            self.build()
+
+        goto, fail, out, out_link, patterns = self._goto, self._fail, self._out, self._out_link, self.patterns
+        haystack = text if self.case_sensitive else fold_case(text)
+        state = 0
+        for position, char in enumerate(haystack):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            emit = state if out[state] else out_link[state]
+            while emit > 0:
+                for index in out[emit]:
+                    yield position + 1 - len(patterns[index]), position + 1, index
+                emit = out_link[emit]
+
+    def first_occurrences(self, text: str) -> Dict[int, Tuple[int, int]]:
+        """Leftmost (start, end) span of each pattern that occurs in text."""
+        found: Dict[int, Tuple[int, int]] = {}
+        for start, end, index in self.iter_matches(text):
+            # Matches arrive ordered by end, so the first one per pattern is leftmost
+            if index not in found:
+                found[index] = (start, end)
+        return found
@@ -0,0 +1,136 @@
+"""
+Benchmark: conversation storage at 100,000 active projects
+
+Run from the backend directory:
+    python benchmarks/bench_context_store.py
+"""
+import gc
+import os
+import sys
+import time
+import random
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_manager import InMemoryContextStore  # noqa: E402
+
+PROJECTS = 100_000
+MESSAGES = 6  # Per project
+MEMORY_SAMPLE = 10_000  # Projects measured with tracemalloc
+
+WORDS = (
+    "please make the header sticky and use the brand colour for buttons then add a dark mode toggle "
+    "to the settings page the login form should validate email addresses and show an error message"
+).split()
+
+
+@dataclass
+class LegacyMessage:
+    """The previous message record"""
+    role: str
+    content: str
+    timestamp: datetime
+    project_id: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class LegacyStore:
+    """The previous list-backed history, re-sliced past 50 messages"""
+
+    def __init__(self):
+        self.conversations = {}
+
+    def add_message(self, project_id, role, content, metadata=None):
+        if project_id not in self.conversations:
+            self.conversations[project_id] = []
+        self.conversations[project_id].append(LegacyMessage(role, content, datetime.now(), project_id, metadata))
+        if len(self.conversations[project_id]) > 50:
+            self.conversations[project_id] = self.conversations[project_id][-50:]
+
+    def get_conversation(self, project_id, limit=10):
+        return self.conversations.get(project_id, [])[-limit:]
+
+
+def make_store(kind: str):
+    if kind == "legacy":
+        return LegacyStore()
+    return InMemoryContextStore(
+        max_conversations=PROJECTS * 2, max_total_bytes=1 << 40,
+        compress=kind == "list+zlib", hot_messages=2
+    )
+
+
+def message_bodies(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    return [f"{i} " + " ".join(rng.choices(WORDS, k=rng.randint(15, 200))) for i in range(count)]
+
+
+def fill(store, projects: int, bodies, copy: bool = False):
+    n = 0
+    for turn in range(MESSAGES):
+        role = "user" if turn % 2 == 0 else "assistant"
+        for p in range(projects):
+            body = bodies[n % len(bodies)]
+            store.add_message(f"project-{p}", role, body + "." if copy else body)
+            n += 1
+    return n
+
+
+def bytes_per_message(kind: str, bodies) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = make_store(kind)
+    count = fill(store, MEMORY_SAMPLE, bodies, copy=True)  # Count the bodies the store keeps
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del store
+    return used / count
+
+
+def throughput(kind: str, bodies):
+    gc.collect()
+    store = make_store(kind)
+    started = time.perf_counter()
+    count = fill(store, PROJECTS, bodies)
+    add_rate = count / (time.perf_counter() - started)
+
+    rng = random.Random(3)
+    ids = [f"project-{rng.randrange(PROJECTS)}" for _ in range(200_000)]
+    started = time.perf_counter()
+    for project_id in ids:
+        for message in store.get_conversation(project_id, 10):
+            message.content
+    get_rate = len(ids) / (time.perf_counter() - started)
+    return add_rate, get_rate
+
+
+def long_history(kind: str, adds: int = 100_000) -> float:
+    """Adds per second to one project whose history is always full"""
+    store = make_store(kind)
+    started = time.perf_counter()
+    for i in range(adds):
+        store.add_message("busy", "user", "ok")
+    return adds / (time.perf_counter() - started)
+
+
+def main():
+    # Bodies are unique per message so nothing is shared between stores
+    bodies = message_bodies(PROJECTS * MESSAGES)
+    average = sum(len(b) for b in bodies) / len(bodies)
+    print(f"{PROJECTS} projects x {MESSAGES} messages, average body {average:.0f} chars\n")
+
+    print(f"{'store':<12} {'bytes/msg':>10} {'adds/s':>12} {'gets/s':>12} {'full-history adds/s':>20}")
+    for kind in ("legacy", "list", "list+zlib"):
+        memory = bytes_per_message(kind, bodies)
+        add_rate, get_rate = throughput(kind, bodies)
+        full = long_history(kind)
+        print(f"{kind:<12} {memory:10.0f} {add_rate:12,.0f} {get_rate:12,.0f} {full:20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: reference extraction over a synthetic 5,000-file project
+
+Run from the backend directory:
+    python benchmarks/bench_reference_index.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_search_index import build_project, percentile  # noqa: E402
+from reference_index import ReferenceIndex  # noqa: E402
+
+ROUNDS = 200
+
+
+def legacy_affected_files(error: str, files: dict) -> list:
+    """The previous debugger scan: a substring search per file"""
+    return [f for f in files if os.path.basename(f) in error or f in error]
+
+
+def timed(fn, texts):
+    samples = []
+    for i in range(ROUNDS):
+        started = time.perf_counter()
+        fn(texts[i % len(texts)])
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<34} p50 {percentile(samples, 50):7.3f} ms   p99 {percentile(samples, 99):7.3f} ms")
+
+
+def main():
+    files = build_project()
+    names = list(files)
+    texts = [
+        f"TypeError: Cannot read properties of undefined (reading 'map')\n    at {os.path.basename(names[i])}:12:5\n"
+        f"    at renderWithHooks (react-dom.development.js:14985:18)\n" * 3
+        for i in range(0, len(names), 250)
+    ]
+
+    index = ReferenceIndex()
+    started = time.perf_counter()
+    index.update(files)
+    index.files("warm up")
+    print(f"{len(files)} files indexed and compiled in {time.perf_counter() - started:.2f} s\n")
+
+    report("legacy substring scan", timed(lambda text: legacy_affected_files(text, files), texts))
+    report("reference index", timed(index.files, texts))
+
+    edited = dict(files)
+    key = names[0]
+    edited[key] += "\n// comment"
+    started = time.perf_counter()
+    index.update(edited)
+    index.files("x")
+    print(f"\nedit keeping exports: {(time.perf_counter() - started) * 1000:.1f} ms")
+    edited[key] += "\nexport function brandNewHelper() {}"
+    started = time.perf_counter()
+    index.update(edited)
+    index.files("x")
+    print(f"edit adding an export: {(time.perf_counter() - started) * 1000:.1f} ms")
+    del edited[key]
+    started = time.perf_counter()
+    index.update(edited)
+    index.files("x")
+    print(f"file deleted: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: BM25 search index over a synthetic 5,000-file project
+
+Run from the backend directory:
+    python benchmarks/bench_search_index.py
+"""
+import os
+import sys
+import time
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex  # noqa: E402
+
+WORDS = (
+    "user account profile settings header footer sidebar modal button form input list item "
+    "todo task project cart checkout payment order product search filter chart dashboard "
+    "theme color layout card avatar notification message comment auth login session token"
+).split()
+
+QUERIES = [
+    "make the header blue",
+    "fix the login form validation",
+    "add a dark theme toggle to settings",
+    "checkout payment button does nothing",
+    "show notification count in sidebar",
+    "sort the product list by price",
+]
+
+
+def build_project(size: int = 5000, seed: int = 11) -> dict:
+    """Create a synthetic project of React components and helpers"""
+    rng = random.Random(seed)
+    files = {}
+    for i in range(size):
+        a, b = rng.sample(WORDS, 2)
+        name = f"{a.title()}{b.title()}{i}"
+        body = "\n".join(
+            f"  const {rng.choice(WORDS)}{j} = use{rng.choice(WORDS).title()}({rng.choice(WORDS)}, '{rng.choice(WORDS)}');"
+            for j in range(rng.randint(10, 60))
+        )
+        files[f"src/{a}/{name}.tsx"] = (
+            f"import React from 'react';\n\nexport function {name}(props) {{\n{body}\n"
+            f"  return <div className=\"{a}-{b}\">{{props.children}}</div>;\n}}\n"
+        )
+    return files
+
+
+def legacy_relevant_files(files: dict, query: str) -> list:
+    """The previous substring-scan ranking, for comparison"""
+    keywords = set(query.lower().split()) - {"the", "and", "a", "to", "in"}
+    scored = []
+    for filename, content in files.items():
+        score = 0
+        lower_content, lower_filename = content.lower(), filename.lower()
+        for keyword in keywords:
+            if keyword in lower_filename:
+                score += 3
+            if keyword in lower_content:
+                score += 1
+        if score:
+            scored.append((filename, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:5]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    files = build_project()
+    total_bytes = sum(len(c) for c in files.values())
+    print(f"Project: {len(files)} files, {total_bytes / 1024 / 1024:.1f} MiB\n")
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.update(files)
+    print(f"{'initial index build':<32} {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+    started = time.perf_counter()
+    index.update(files)
+    print(f"{'re-sync, nothing changed':<32} {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+    edited = dict(files)
+    first = next(iter(edited))
+    edited[first] += "\n// header color tweak\n"
+    started = time.perf_counter()
+    stats = index.update(edited)
+    print(f"{'re-sync, one file edited':<32} {(time.perf_counter() - started) * 1000:9.1f} ms  {stats}")
+
+    # Impact lists are built by update(), so first queries per term should cost no more than later ones
+    cold = []
+    for query in QUERIES:
+        started = time.perf_counter()
+        index.search(query)
+        cold.append((time.perf_counter() - started) * 1000)
+    samples = []
+    for _ in range(50):
+        for query in QUERIES:
+            started = time.perf_counter()
+            index.search(query)
+            samples.append((time.perf_counter() - started) * 1000)
+    print(f"\n{'BM25 first query per term p50':<32} {statistics.median(cold):9.3f} ms")
+    print(f"{'BM25 query p50':<32} {statistics.median(samples):9.3f} ms")
+    print(f"{'BM25 query p99':<32} {percentile(samples, 99):9.3f} ms")
+
+    edited[first] += "\n// sidebar layout tweak\n"
+    index.update(edited)
+    started = time.perf_counter()
+    index.search(QUERIES[0])
+    print(f"{'BM25 query after one-file edit':<32} {(time.perf_counter() - started) * 1000:9.3f} ms")
+
+    legacy = []
+    for query in QUERIES:
+        started = time.perf_counter()
+        legacy_relevant_files(edited, query)
+        legacy.append((time.perf_counter() - started) * 1000)
+    print(f"{'substring scan p50 (before)':<32} {statistics.median(legacy):9.3f} ms")
+
+    print("\nTop results:")
+    for query in QUERIES[:3]:
+        print(f"  {query!r}: {[name for name, _ in index.search(query, 3)]}")
+
+
+if __name__ == "__main__":
+    main()
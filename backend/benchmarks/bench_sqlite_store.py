@@ -0,0 +1,75 @@
+"""
+Benchmark: SQLite (WAL) context store against the in-memory store
+
+Run from the backend directory:
+    python benchmarks/bench_sqlite_store.py
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_manager import InMemoryContextStore  # noqa: E402
+from sqlite_store import SQLiteContextStore  # noqa: E402
+
+PROJECTS = 2000
+MESSAGES = 10  # Per project
+GETS = 20_000
+HOT_PROJECTS = 100  # Fits in the SQLite read cache
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed(calls):
+    samples = []
+    for fn, args in calls:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<40} p50 {percentile(samples, 50):8.1f} us   p99 {percentile(samples, 99):8.1f} us")
+
+
+def run(name, store):
+    rng = random.Random(9)
+    body = "please make the header sticky and use the brand colour " * 4
+    adds = [(store.add_message, (f"project-{p}", "user" if m % 2 == 0 else "assistant", f"{m} {body}"))
+            for m in range(MESSAGES) for p in range(PROJECTS)]
+    started = time.perf_counter()
+    report(f"{name}: add_message", timed(adds))
+    if hasattr(store, "flush"):
+        store.flush()
+        print(f"{'':<40} all {len(adds)} writes committed after {(time.perf_counter() - started):.2f} s "
+              f"in {store.stats()['batches']} transactions")
+
+    cold = [(store.get_conversation, (f"project-{rng.randrange(PROJECTS)}", 10)) for _ in range(GETS)]
+    hot = [(store.get_conversation, (f"project-{rng.randrange(HOT_PROJECTS)}", 10)) for _ in range(GETS)]
+    report(f"{name}: get_conversation (random)", timed(cold))
+    timed(hot[:HOT_PROJECTS * 5])  # Warm the cache
+    report(f"{name}: get_conversation (hot set)", timed(hot))
+
+
+def main():
+    print(f"{PROJECTS} projects x {MESSAGES} messages, {GETS} reads per pattern\n")
+    run("memory", InMemoryContextStore(max_conversations=PROJECTS * 2))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteContextStore(os.path.join(tmp, "context.db"))
+        try:
+            run("sqlite", store)
+            print(f"\nsqlite stats: {store.stats()}")
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
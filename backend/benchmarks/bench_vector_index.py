@@ -0,0 +1,65 @@
+"""
+Benchmark: vector and hybrid retrieval over a synthetic 5,000-file project
+
+Run from the backend directory:
+    python benchmarks/bench_vector_index.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_search_index import build_project, percentile, QUERIES  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from vector_index import VectorIndex, hybrid_rank  # noqa: E402
+
+ROUNDS = 200
+
+
+def timed(fn, rounds: int = ROUNDS):
+    samples = []
+    for i in range(rounds):
+        query = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<28} p50 {percentile(samples, 50):7.2f} ms   p99 {percentile(samples, 99):7.2f} ms")
+
+
+def main():
+    files = build_project()
+    keyword, vectors = SearchIndex(), VectorIndex()
+
+    started = time.perf_counter()
+    keyword.update(files)
+    print(f"{len(files)} files, BM25 index built in {time.perf_counter() - started:.2f} s")
+    started = time.perf_counter()
+    vectors.update(files)
+    print(f"{len(files)} files, vector index built in {time.perf_counter() - started:.2f} s "
+          f"({vectors.dims} dims, {len(files) * vectors.dims * 4 / 1e6:.1f} MB)\n")
+
+    edited = dict(files)
+    key = next(iter(edited))
+    edited[key] += "\n// edited"
+    started = time.perf_counter()
+    stats = vectors.update(edited)
+    print(f"one-file edit re-embedded in {(time.perf_counter() - started) * 1000:.1f} ms: {stats}\n")
+
+    report("bm25", timed(lambda q: keyword.search(q, 5)))
+    report("vector", timed(lambda q: vectors.search(q, 5)))
+    report("hybrid", timed(lambda q: hybrid_rank(keyword.search(q, 20), vectors.search(q, 20), 5)))
+
+    print()
+    for query in QUERIES[:3]:
+        fused = hybrid_rank(keyword.search(query, 20), vectors.search(query, 20), 3)
+        print(f"{query!r}: {[name for name, _ in fused]}")
+
+
+if __name__ == "__main__":
+    main()
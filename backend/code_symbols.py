@@ -0,0 +1,533 @@
+"""
+Code Symbols for CodeGenesis
+Lightweight extraction of exports and signatures from generated files
+"""
+import os
+import re
+import posixpath
+from dataclasses import dataclass, replace
+from typing import Optional, Dict, List, Set, Tuple, Iterable
+
+
+# Longest interface summary handed to a dependent file
+MAX_INTERFACE_CHARS = 800
+
+_JS_EXPORTS = re.compile(
+    r'^\s*export\s+(?:default\s+)?(?:async\s+)?'
+    r'(?:function\s*\*?\s*\w*\s*(?:<[^>]*>)?\s*\([^)]*\)(?:\s*:\s*[^{=]+)?'
+    r'|class\s+\w+(?:\s+extends\s+[\w.]+)?'
+    r'|(?:const|let|var)\s+\w+(?:\s*:\s*[^=]+)?'
+    r'|(?:interface|type|enum)\s+\w+(?:<[^>]*>)?)',
+    re.M
+)
+_JS_ARROW_PARAMS = re.compile(r'\s*=\s*(?:async\s*)?(\([^)]*\)|\w+)\s*(?::\s*[^=]+)?=>')
+_JS_DEFAULT_EXPORT = re.compile(r'^\s*export\s+default\s+(\w+)\s*;?\s*$', re.M)
+_JS_NAMED_EXPORTS = re.compile(r'^\s*export\s*\{([^}]*)\}(?:\s*from\s*[\'"][^\'"]+[\'"])?', re.M)
+_CJS_EXPORTS = re.compile(r'^\s*module\.exports\s*=\s*([^;\n]+)', re.M)
+_PY_SIGNATURES = re.compile(r'^(?:async\s+)?(?:def\s+\w+\s*\([^)]*\)(?:\s*->\s*[^:]+)?|class\s+\w+(?:\([^)]*\))?)', re.M)
+_CSS_SELECTORS = re.compile(r'(?<![\w-])([.#][A-Za-z_-][\w-]*)(?=[^{}]*\{)')
+_HTML_IDS = re.compile(r'\bid\s*=\s*["\']([^"\']+)["\']')
+_HTML_ASSETS = re.compile(r'<(?:script|link)\b[^>]*\b(?:src|href)\s*=\s*["\']([^"\']+)["\']', re.I)
+_JS_IMPORTS = re.compile(
+    r'(?:\bimport\s+(?:[^\'"]*?\s+from\s+)?|\bexport\s+[^\'"]*?\s+from\s+|\brequire\s*\(\s*|\bimport\s*\(\s*)'
+    r'[\'"]([^\'"]+)[\'"]'
+)
+_CSS_IMPORTS = re.compile(r'@import\s+(?:url\()?\s*["\']?([^"\')\s;]+)')
+_PY_IMPORTS = re.compile(r'^\s*(?:from\s+(\.*[\w.]*)\s+import|import\s+([\w.]+))', re.M)
+_JS_EXPORT_NAMES = re.compile(
+    r'^\s*export\s+(?:default\s+)?(?:declare\s+)?(?:async\s+)?'
+    r'(?:function\s*\*?|class|const|let|var|interface|type|enum)\s+(\w+)',
+    re.M
+)
+_PY_TOP_LEVEL_NAMES = re.compile(r'^(?:async\s+)?(?:def|class)\s+([A-Za-z]\w*)', re.M)
+_IDENTIFIERS = re.compile(r'[A-Za-z_$][\w$]*')
+
+
+def _js_interface(content: str) -> List[str]:
+    lines = []
+    for match in _JS_EXPORTS.finditer(content):
+        signature = " ".join(match.group(0).split())
+        rest = content[match.end():match.end() + 200]
+        arrow = _JS_ARROW_PARAMS.match(rest)
+        if arrow and re.search(r'\b(?:const|let|var)\b', signature):
+            signature += f" = {' '.join(arrow.group(1).split())} =>"
+        lines.append(signature.rstrip(" ={"))
+    for match in _JS_NAMED_EXPORTS.finditer(content):
+        lines.append(" ".join(match.group(0).split()))
+    for match in _JS_DEFAULT_EXPORT.finditer(content):
+        lines.append(f"export default {match.group(1)}")
+    for match in _CJS_EXPORTS.finditer(content):
+        lines.append(f"module.exports = {match.group(1).strip()}")
+    return lines
+
+
+def _python_interface(content: str) -> List[str]:
+    return [" ".join(m.group(0).split()) for m in _PY_SIGNATURES.finditer(content)]
+
+
+def _css_interface(content: str) -> List[str]:
+    selectors = list(dict.fromkeys(_CSS_SELECTORS.findall(content)))
+    return [" ".join(selectors)] if selectors else []
+
+
+def _html_interface(content: str) -> List[str]:
+    lines = []
+    ids = list(dict.fromkeys(_HTML_IDS.findall(content)))
+    if ids:
+        lines.append("ids: " + " ".join(f"#{i}" for i in ids))
+    assets = list(dict.fromkeys(_HTML_ASSETS.findall(content)))
+    if assets:
+        lines.append("loads: " + " ".join(assets))
+    return lines
+
+
+_EXTRACTORS = {
+    '.js': _js_interface, '.jsx': _js_interface, '.mjs': _js_interface,
+    '.ts': _js_interface, '.tsx': _js_interface,
+    '.py': _python_interface,
+    '.css': _css_interface, '.scss': _css_interface,
+    '.html': _html_interface,
+}
+
+
+def extract_interface(filename: str, content: str, max_chars: int = MAX_INTERFACE_CHARS) -> str:
+    """
+    Summarize what a file exposes to other files.
+
+    Returns export signatures for JS/TS, top-level def/class signatures for
+    Python, selectors for CSS and element ids/assets for HTML, capped at
+    max_chars. Empty if nothing is exported.
+    """
+    extractor = _EXTRACTORS.get(os.path.splitext(filename)[1].lower())
+    if not extractor:
+        return ""
+
+    summary = "\n".join(extractor(content))
+    if len(summary) > max_chars:
+        summary = summary[:max_chars].rsplit("\n", 1)[0] + "\n..."
+    return summary
+
+
+def format_interfaces(files: Dict[str, str], names: List[str]) -> str:
+    """Format interface summaries of the named files for a prompt"""
+    sections = []
+    for name in names:
+        if name in files:
+            summary = extract_interface(name, files[name]) or "(no exports)"
+            sections.append(f"### {name}\n{summary}")
+    return "\n\n".join(sections)
+
+
+def extract_imports(filename: str, content: str) -> List[str]:
+    """Raw import specifiers of a file (JS/TS imports, CSS @import, HTML assets, Python imports)"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ('.js', '.jsx', '.mjs', '.ts', '.tsx'):
+        return _JS_IMPORTS.findall(content)
+    if ext in ('.css', '.scss'):
+        return _CSS_IMPORTS.findall(content)
+    if ext == '.html':
+        return _HTML_ASSETS.findall(content)
+    if ext == '.py':
+        return [a or b for a, b in _PY_IMPORTS.findall(content)]
+    return []
+
+
+def extract_symbols(filename: str, content: str) -> List[str]:
+    """
+    Names a file exports, in order of appearance.
+
+    JS/TS: declared exports, export lists (exported alias), default and
+    CommonJS exports. Python: public top-level functions and classes.
+    Empty for other files.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.py':
+        return list(dict.fromkeys(_PY_TOP_LEVEL_NAMES.findall(content)))
+    if ext not in ('.js', '.jsx', '.mjs', '.ts', '.tsx'):
+        return []
+
+    names = _JS_EXPORT_NAMES.findall(content)
+    for match in _JS_NAMED_EXPORTS.finditer(content):
+        for item in match.group(1).split(","):
+            name = item.split(" as ")[-1].strip()
+            if name and name != "default":
+                names.append(name)
+    names.extend(_JS_DEFAULT_EXPORT.findall(content))
+    for match in _CJS_EXPORTS.finditer(content):
+        names.extend(_IDENTIFIERS.findall(match.group(1)))
+    return [name for name in dict.fromkeys(names) if name != "require"]
+
+
+def _module_key(path: str) -> str:
+    """Path without extension or trailing /index, used to match imports to files"""
+    stem = os.path.splitext(posixpath.normpath(path))[0]
+    if stem.endswith('/index'):
+        stem = stem[:-len('/index')]
+    return stem.lstrip('./')
+
+
+def resolve_import(importer: str, specifier: str) -> str:
+    """Resolve an import specifier to a module key relative to the project root"""
+    if importer.endswith('.py'):
+        dots = len(specifier) - len(specifier.lstrip('.'))
+        module = specifier.lstrip('.').replace('.', '/')
+        if dots:
+            base = posixpath.dirname(importer)
+            for _ in range(dots - 1):
+                base = posixpath.dirname(base)
+            return _module_key(posixpath.join(base, module))
+        return _module_key(module)
+
+    specifier = specifier.split('?')[0].split('#')[0]
+    if specifier.startswith('/'):
+        return _module_key(specifier[1:])
+    if specifier.startswith('@/'):
+        return _module_key(specifier[2:])
+    return _module_key(posixpath.join(posixpath.dirname(importer), specifier))
+
+
+def import_graph(files: Dict[str, str]) -> Dict[str, Set[str]]:
+    """Map each file to the project files it imports"""
+    by_key: Dict[str, List[str]] = {}
+    for name in files:
+        key = _module_key(name)
+        by_key.setdefault(key, []).append(name)
+        # Also allow imports that omit a leading src/ or app/ directory
+        parts = key.split('/', 1)
+        if len(parts) == 2:
+            by_key.setdefault(parts[1], []).append(name)
+
+    graph: Dict[str, Set[str]] = {}
+    for name, content in files.items():
+        targets = set()
+        for specifier in extract_imports(name, content):
+            targets.update(by_key.get(resolve_import(name, specifier), []))
+        targets.discard(name)
+        graph[name] = targets
+    return graph
+
+
+def find_dependents(files: Dict[str, str], changed: Iterable[str]) -> Set[str]:
+    """Files that import any of the changed files, directly or transitively"""
+    importers: Dict[str, Set[str]] = {}
+    for name, targets in import_graph(files).items():
+        for target in targets:
+            importers.setdefault(target, set()).add(name)
+
+    changed = set(changed)
+    dependents: Set[str] = set()
+    frontier = list(changed)
+    while frontier:
+        for importer in importers.get(frontier.pop(), ()):
+            if importer not in dependents and importer not in changed:
+                dependents.add(importer)
+                frontier.append(importer)
+    return dependents
+
+
+# ---------- UI structure (for test generation) ----------
+
+UI_EXTENSIONS = ('.html', '.htm', '.jsx', '.tsx', '.js', '.ts', '.vue', '.svelte')
+MAX_UI_SUMMARY_CHARS = 600  # Per file
+
+_UI_ATTRS = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|\{\s*["\'`]([^"\'`{}]*)["\'`]\s*\})')
+# Tag attributes, allowing quoted strings and (one level nested) JSX expressions containing '>'
+_TAG_ATTRS = r'((?:[^>"\'{]|"[^"]*"|\'[^\']*\'|\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})*)'
+_UI_IDS = re.compile(r'\bid\s*=\s*\{?\s*["\']([^"\']+)["\']')
+_UI_FIELDS = re.compile(r'<(input|textarea|select)\b' + _TAG_ATTRS + '>', re.I)
+_UI_BUTTONS = re.compile(r'<button\b' + _TAG_ATTRS + r'>(.*?)</button>', re.I | re.S)
+_UI_HEADINGS = re.compile(r'<(h[12])\b[^>]*>(.*?)</\1>', re.I | re.S)
+_UI_ROUTES = re.compile(
+    r'<Route\b[^>]*\bpath\s*=\s*["\'{]\s*["\']?([^"\'}\s]+)'
+    r'|\bpath\s*:\s*["\'](/[^"\']*)["\']'
+    r'|<(?:Link|NavLink)\b[^>]*\bto\s*=\s*["\'{]\s*["\']?(/[^"\'}\s]*)'
+    r'|<a\b[^>]*\bhref\s*=\s*["\'](/[^"\']*|#[\w-]+)["\']'
+)
+_UI_COMPONENTS = re.compile(
+    r'\bexport\s+(?:default\s+)?(?:function|const|class)\s+([A-Z]\w*)|\bexport\s+default\s+([A-Z]\w*)\s*;?\s*$',
+    re.M
+)
+_JSX_NOISE = re.compile(r'<[^>]+>|\{[^{}]*\}')
+
+
+def _ui_attrs(text: str) -> Dict[str, str]:
+    return {m.group(1): next(g for g in m.groups()[1:] if g is not None) for m in _UI_ATTRS.finditer(text)}
+
+
+def _visible_text(markup: str) -> str:
+    return " ".join(_JSX_NOISE.sub(" ", markup).split())
+
+
+def _file_route(filename: str) -> Optional[str]:
+    """Route served by a Next.js app/ or pages/ file"""
+    path = filename.replace('\\', '/')
+    match = re.match(r'^(?:src/)?app/(.*?)/?page\.[jt]sx?$', path) or re.match(r'^(?:src/)?pages/(.+?)\.[jt]sx?$', path)
+    if not match:
+        return None
+    route = match.group(1)
+    if route.startswith(('_', 'api/')):
+        return None
+    route = re.sub(r'(^|/)index$', '', route)
+    route = "/".join(part for part in route.split('/') if not part.startswith('('))  # Route groups
+    return "/" + route
+
+
+def _unique(values) -> List[str]:
+    return list(dict.fromkeys(v for v in values if v))
+
+
+def extract_ui_summary(filename: str, content: str, max_chars: int = MAX_UI_SUMMARY_CHARS) -> str:
+    """
+    Summarize what a test can interact with in an HTML/JSX/TSX file.
+
+    Lists exported components, element ids, data-testids, form fields,
+    buttons, headings and routes, one category per line. Empty if the file
+    has no UI structure.
+    """
+    if not filename.lower().endswith(UI_EXTENSIONS):
+        return ""
+
+    lines = []
+    components = _unique(a or b for a, b in _UI_COMPONENTS.findall(content))
+    if components and filename.lower().endswith(('.jsx', '.tsx', '.js', '.ts')):
+        if '<' in content:  # Only files that render markup
+            lines.append("components: " + ", ".join(components))
+
+    ids = _unique(_UI_IDS.findall(content))
+    if ids:
+        lines.append("ids: " + " ".join(f"#{i}" for i in ids))
+
+    test_ids = _unique(re.findall(r'\bdata-(?:testid|test-id|test|cy)\s*=\s*["\'{]\s*["\']?([^"\'}\s]+)', content))
+    if test_ids:
+        lines.append("testids: " + " ".join(test_ids))
+
+    fields = []
+    for tag, attrs_text in _UI_FIELDS.findall(content):
+        attrs = _ui_attrs(attrs_text)
+        parts = [tag.lower()]
+        for key in ("type", "name", "id", "placeholder", "aria-label"):
+            if attrs.get(key):
+                value = attrs[key]
+                parts.append(f'[{key}="{value}"]' if ' ' in value else f"[{key}={value}]")
+        fields.append("".join(parts))
+    if fields:
+        lines.append("fields: " + ", ".join(_unique(fields)))
+
+    buttons = []
+    for attrs_text, inner in _UI_BUTTONS.findall(content):
+        attrs = _ui_attrs(attrs_text)
+        label = _visible_text(inner) or attrs.get("aria-label") or attrs.get("title") or attrs.get("id")
+        if label:
+            buttons.append(f'"{label}"' + (f"[{attrs['type']}]" if attrs.get("type") == "submit" else ""))
+    if buttons:
+        lines.append("buttons: " + ", ".join(_unique(buttons)))
+
+    headings = _unique(f"{tag.lower()} \"{_visible_text(text)}\"" for tag, text in _UI_HEADINGS.findall(content)
+                       if _visible_text(text))
+    if headings:
+        lines.append("headings: " + ", ".join(headings))
+
+    routes = [_file_route(filename)] + [next((g for g in m if g), None) for m in _UI_ROUTES.findall(content)]
+    routes = _unique(routes)
+    if routes:
+        lines.append("routes: " + " ".join(routes))
+
+    summary = "\n".join(lines)
+    if len(summary) > max_chars:
+        summary = summary[:max_chars].rsplit(" ", 1)[0] + " ..."
+    return summary
+
+
+def format_ui_summaries(files: Dict[str, str]) -> str:
+    """UI summaries of every file that has one, formatted for a prompt"""
+    sections = []
+    for name, content in files.items():
+        summary = extract_ui_summary(name, content)
+        if summary:
+            sections.append(f"### {name}\n{summary}")
+    return "\n\n".join(sections)
+
+
+# Symbol-level chunking
+MAX_CHUNK_LINES = 80  # Longer symbols are split into parts
+SECTION_LINES = 40  # Window size for files without a symbol parser
+
+_JS_DECLARATION = re.compile(
+    r'^(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:async\s+)?'
+    r'(function\b\s*\*?|class\b|const\b|let\b|var\b|interface\b|type\b|enum\b)\s*(\w*)'
+)
+_JS_TOP_LEVEL = re.compile(r'^(?:export\s+default\b|module\.exports\b)')
+_PY_DECLARATION = re.compile(r'^(?:async\s+)?(def|class)\s+(\w+)')
+_JS_COMMENT = re.compile(r'^\s*(?://|/\*|\*)')
+_PY_COMMENT = re.compile(r'^(?:@|#)')
+
+
+@dataclass(frozen=True)
+class CodeChunk:
+    """A symbol-level slice of a file with its line range (1-based, inclusive)"""
+    file: str
+    name: str
+    kind: str
+    start_line: int
+    end_line: int
+    text: str
+
+    @property
+    def location(self) -> str:
+        return f"{self.file}:{self.start_line}-{self.end_line}"
+
+
+def _js_boundary(line: str, component_file: bool) -> Optional[Tuple[str, str]]:
+    match = _JS_DECLARATION.match(line)
+    if match:
+        keyword, name = match.group(1).strip(" *"), match.group(2)
+        if keyword in ("interface", "type", "enum"):
+            return name, "type"
+        if keyword == "class":
+            return name or "default", "class"
+        if keyword == "function" or re.search(r'=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>|=\s*(?:React\.)?(?:memo|forwardRef)\b', line):
+            if component_file and name[:1].isupper() and not name.isupper():
+                return name, "component"
+            return name or "default", "function"
+        return name, "variable"
+    if _JS_TOP_LEVEL.match(line):
+        return "default", "export"
+    return None
+
+
+def _python_boundary(line: str, component_file: bool) -> Optional[Tuple[str, str]]:
+    match = _PY_DECLARATION.match(line)
+    if match:
+        return match.group(2), "class" if match.group(1) == "class" else "function"
+    return None
+
+
+def _declaration_chunks(filename: str, lines: List[str], boundary, comment) -> List[CodeChunk]:
+    """Split at top-level declarations, attaching leading comments/decorators to the symbol below"""
+    component_file = filename.lower().endswith(('.jsx', '.tsx'))
+    starts = []
+    for i, line in enumerate(lines):
+        found = boundary(line, component_file)
+        if found:
+            start = i
+            while start > 0 and lines[start - 1].strip() and comment.match(lines[start - 1]):
+                start -= 1
+            if starts and start <= starts[-1][0]:
+                start = i
+            starts.append((start, found))
+
+    chunks = []
+    first = starts[0][0] if starts else len(lines)
+    if any(line.strip() for line in lines[:first]):
+        chunks.append(_chunk(filename, "(module)", "module", lines, 0, first))
+    for n, (start, (name, kind)) in enumerate(starts):
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        chunks.append(_chunk(filename, name, kind, lines, start, end))
+    return _merge_small(chunks, lines)
+
+
+def _chunk(filename: str, name: str, kind: str, lines: List[str], start: int, end: int) -> CodeChunk:
+    while end > start + 1 and not lines[end - 1].strip():
+        end -= 1
+    return CodeChunk(filename, name, kind, start + 1, end, "\n".join(lines[start:end]))
+
+
+def _merge_small(chunks: List[CodeChunk], lines: List[str], max_lines: int = 3) -> List[CodeChunk]:
+    """Fold runs of short constants and type aliases into one chunk"""
+    merged: List[CodeChunk] = []
+    for chunk in chunks:
+        prev = merged[-1] if merged else None
+        if (prev and chunk.kind in ("variable", "type") and prev.kind in ("variable", "type", "group")
+                and chunk.end_line - chunk.start_line < max_lines
+                and (prev.kind == "group" or prev.end_line - prev.start_line < max_lines)
+                and chunk.end_line - prev.start_line < MAX_CHUNK_LINES // 2):
+            merged[-1] = CodeChunk(prev.file, prev.name + ", " + chunk.name, "group", prev.start_line,
+                                   chunk.end_line, "\n".join(lines[prev.start_line - 1:chunk.end_line]))
+        else:
+            merged.append(chunk)
+    return merged
+
+
+def _css_chunks(filename: str, content: str) -> List[CodeChunk]:
+    """One chunk per top-level rule or at-rule block; a preceding comment joins the rule"""
+    lines = content.split("\n")
+    chunks = []
+    depth = 0
+    start = None
+    i = 0
+    while i < len(content):
+        char = content[i]
+        if content.startswith("/*", i):
+            if start is None and depth == 0:
+                start = i
+            end = content.find("*/", i + 2)
+            i = len(content) if end == -1 else end + 2
+            continue
+        if char in "\"'":
+            end = content.find(char, i + 1)
+            i = len(content) if end == -1 else end + 1
+            continue
+        if start is None and not char.isspace():
+            start = i
+        if char == "{":
+            depth += 1
+        elif char == "}" or (char == ";" and depth == 0):
+            if char == "}":
+                depth = max(depth - 1, 0)
+            if depth == 0 and start is not None:
+                head = re.sub(r'/\*.*?\*/', '', content[start:i + 1], flags=re.S)
+                name = " ".join(head.split("{", 1)[0].rstrip(";").split())[:60] or "(rule)"
+                kind = "at-rule" if name.startswith("@") else "rule"
+                first = content.count("\n", 0, start)
+                chunks.append(_chunk(filename, name, kind, lines, first, content.count("\n", 0, i) + 1))
+                start = None
+        i += 1
+    return chunks
+
+
+def _section_chunks(filename: str, lines: List[str]) -> List[CodeChunk]:
+    chunks = []
+    for start in range(0, len(lines), SECTION_LINES):
+        end = min(start + SECTION_LINES, len(lines))
+        if any(line.strip() for line in lines[start:end]):
+            chunk = _chunk(filename, "", "section", lines, start, end)
+            chunks.append(replace(chunk, name=f"lines {chunk.start_line}-{chunk.end_line}"))
+    return chunks
+
+
+def _split_long(chunk: CodeChunk) -> List[CodeChunk]:
+    size = chunk.end_line - chunk.start_line + 1
+    if size <= MAX_CHUNK_LINES:
+        return [chunk]
+    lines = chunk.text.split("\n")
+    total = (size + MAX_CHUNK_LINES - 1) // MAX_CHUNK_LINES
+    return [
+        CodeChunk(chunk.file, f"{chunk.name} ({n + 1}/{total})", chunk.kind,
+                  chunk.start_line + offset, chunk.start_line + min(offset + MAX_CHUNK_LINES, size) - 1,
+                  "\n".join(lines[offset:offset + MAX_CHUNK_LINES]))
+        for n, offset in enumerate(range(0, size, MAX_CHUNK_LINES))
+    ]
+
+
+def chunk_file(filename: str, content: str) -> List[CodeChunk]:
+    """
+    Split a file into symbol-level chunks.
+
+    JS/TS files split at top-level functions, components, classes, types and
+    variables; Python at top-level def/class; CSS at rule blocks. Other
+    files fall back to fixed line windows. Symbols longer than
+    MAX_CHUNK_LINES are split into numbered parts.
+    """
+    if not content.strip():
+        return []
+    ext = os.path.splitext(filename)[1].lower()
+    lines = content.split("\n")
+    if ext in ('.js', '.jsx', '.mjs', '.cjs', '.ts', '.tsx'):
+        chunks = _declaration_chunks(filename, lines, _js_boundary, _JS_COMMENT)
+    elif ext == '.py':
+        chunks = _declaration_chunks(filename, lines, _python_boundary, _PY_COMMENT)
+    elif ext in ('.css', '.scss'):
+        chunks = _css_chunks(filename, content)
+    else:
+        chunks = _section_chunks(filename, lines)
+    return [part for chunk in chunks for part in _split_long(chunk)]
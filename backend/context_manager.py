@@ -3,76 +3,563 @@ Context Manager for CodeGenesis
 Manages conversation memory, project context, and RAG-based retrieval
 """
 import os
-from typing import Optional, List, Dict, Any
-from dataclasses import dataclass
+import re
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Optional, List, Dict, Any, Tuple, Callable
+from dataclasses import dataclass, field
 from datetime import datetime
 import json
 import hashlib
+from abc import ABC, abstractmethod
 from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from api_config import api_config
+from search_index import SearchIndex, ChunkIndex
+from code_symbols import CodeChunk
+from reference_index import ReferenceIndex
+
+try:
+    from vector_index import VectorIndex, hybrid_rank
+except ImportError:  # Hybrid ranking falls back to keyword search without NumPy
+    VectorIndex = None
 
 load_dotenv()
 
 
+# Token estimate without a tokenizer dependency (~4 characters per token for code and English)
+CHARS_PER_TOKEN = 4
+DEFAULT_CONTEXT_BUDGET = 4000
+MAX_TURN_CHARS = 2000
+# Assembled prompts kept per project (for different queries/budgets) until the project changes
+MAX_ASSEMBLED_PER_PROJECT = 8
+
+# Rolling summaries: turns older than the newest SUMMARY_WINDOW are folded into the summary,
+# SUMMARY_BATCH at a time, at most SUMMARY_MAX_TURNS per LLM call
+SUMMARY_WINDOW = 10
+SUMMARY_BATCH = 2
+SUMMARY_MAX_TURNS = 40
+SUMMARY_MAX_CHARS = 2400
+SUMMARY_TURN_CHARS = 1000
+SUMMARY_WORKERS = 2
+
+# Pinned files are sent whole up to this size
+PINNED_FILE_CHARS = 8000
+
+# Rank files by keywords fused with hashed-embedding similarity (needs NumPy)
+HYBRID_RETRIEVAL = os.getenv("CODEGENESIS_HYBRID_RETRIEVAL", "0") == "1"
+
+# References the project index cannot know about: backticked filenames and conventional component names
+_FILE_REFERENCE = re.compile(r'`([^`]+\.(?:tsx?|jsx?|py|css|html|json))`', re.IGNORECASE)
+_COMPONENT_REFERENCE = re.compile(r'\b([A-Z][a-zA-Z]+(?:Component|Page|Layout|Button|Form|Modal))\b')
+
+# Section order of an assembled prompt
+_CONTEXT_SECTIONS = (
+    ("file_tree", "## Project Files:"),
+    ("summary", "## Conversation Summary:"),
+    ("chunk", "## Relevant Code:"),
+    ("turn", "## Previous Conversation:"),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt fragment"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class ContextPiece:
+    """A candidate fragment of a context prompt"""
+    kind: str  # 'file_tree', 'summary', 'chunk', 'turn'
+    label: str
+    text: str
+    value: float
+    order: int = 0  # Position within its section
+    tokens: int = field(init=False)
+
+    def __post_init__(self):
+        self.tokens = estimate_tokens(self.text)
+
+
 @dataclass
+class AssembledContext:
+    """A context prompt packed into a token budget"""
+    prompt: str
+    budget: int
+    tokens: int
+    included: List[str]
+    dropped: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "tokens": self.tokens,
+            "included": self.included,
+            "dropped": self.dropped,
+        }
+
+
+@dataclass
+class ConversationSummary:
+    """Rolling summary of a project's older turns"""
+    text: str
+    through: int  # `seq` of the newest message folded in
+    turns: int = 0  # Messages folded in so far
+    updated: float = field(default_factory=time.time)
+
+
+@dataclass
+class ChatPrompt:
+    """Chat messages for a project turn and how much of them repeats the previous prompt"""
+    messages: List[BaseMessage]
+    tokens: int
+    reused_tokens: int
+
+    @property
+    def prefix_reuse(self) -> float:
+        """Share of the prompt that is a prefix of the project's previous prompt"""
+        return self.reused_tokens / self.tokens if self.tokens else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tokens": self.tokens,
+            "reused_tokens": self.reused_tokens,
+            "prefix_reuse": round(self.prefix_reuse, 4),
+        }
+
+
 class ConversationMessage:
-    """A single message in a conversation"""
-    role: str  # 'user', 'assistant', 'system'
-    content: str
-    timestamp: datetime
-    project_id: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
+    """
+    A single message in a conversation.
+    
+    Slotted to keep per-message overhead small. Old bodies may be stored
+    zlib-compressed (see compress()): the `content` slot is then unset and
+    reading it falls through to __getattr__, which inflates the body, so
+    uncompressed messages keep plain attribute access.
+    
+    seq is assigned by the store and increases with every message added to
+    a project, so it orders messages even when their timestamps are equal.
+    """
+    __slots__ = ("role", "content", "_packed", "created", "seq", "project_id", "metadata")
+    
+    def __init__(
+        self,
+        role: str,  # 'user', 'assistant', 'system'
+        content: str,
+        timestamp: Optional[datetime] = None,
+        project_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.role = role
+        self.content = content
+        self._packed: Optional[bytes] = None
+        self.created = timestamp.timestamp() if timestamp else time.time()
+        self.seq = 0
+        self.project_id = project_id
+        self.metadata = metadata or None
+    
+    def __getattr__(self, name: str):
+        # Only reached for unset slots
+        if name == "content" and self._packed is not None:
+            return zlib.decompress(self._packed).decode()
+        raise AttributeError(name)
+    
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.created)
+    
+    @property
+    def compressed(self) -> bool:
+        return self._packed is not None
+    
+    @property
+    def size(self) -> int:
+        """Stored bytes of the body (compressed if it is) plus metadata"""
+        if self._packed is not None:
+            size = len(self._packed)
+        else:
+            body = self.content
+            size = len(body) if body.isascii() else len(body.encode())
+        if self.metadata:
+            size += len(json.dumps(self.metadata, default=str).encode())
+        return size
+    
+    def compress(self, min_bytes: int = 0) -> int:
+        """Store the body zlib-compressed if it is at least min_bytes and shrinks; returns bytes saved"""
+        if self.compressed or len(self.content) < min_bytes:
+            return 0
+        raw = self.content.encode()
+        packed = zlib.compress(raw, 6)
+        if len(packed) >= len(raw):
+            return 0
+        self._packed = packed
+        del self.content
+        return len(raw) - len(packed)
+    
+    def __repr__(self) -> str:
+        return f"ConversationMessage(role={self.role!r}, content={self.content[:40]!r}, project_id={self.project_id!r})"
 
 
-class InMemoryContextStore:
+class MessageHistory(list):
+    """
+    Bounded list of a project's messages, oldest first.
+    
+    A list subclass rather than a wrapper or collections.deque: the history
+    is the list, saving an object and a pointer hop per project, while a
+    deque allocates 64-slot blocks (~760 bytes even when nearly empty),
+    which dominates memory when most projects hold a handful of messages.
+    A full history drops its oldest message with pop(0), a move of at
+    most maxlen pointers. It is only ever changed by single list
+    operations, so readers can slice it without the store lock. Also
+    tracks the stored bytes of its messages, the bytes they may take
+    (budget), the last sequence number handed out and whether it was used
+    since the store's last eviction pass.
+    """
+    __slots__ = ("maxlen", "nbytes", "budget", "seq", "used")
+    
+    def __init__(self, maxlen: int, budget: float = float("inf")):
+        self.maxlen = maxlen
+        self.nbytes = 0
+        self.budget = budget
+        self.seq = 0
+        self.used = False
+    
+    def push(self, message: ConversationMessage, size: int) -> Optional[ConversationMessage]:
+        """Add a message of size stored bytes; returns the message it pushed out, if the history was full"""
+        self.nbytes += size
+        dropped = None
+        if len(self) >= self.maxlen:
+            dropped = self.pop(0)
+            self.nbytes -= dropped.size
+        self.append(message)
+        return dropped
+    
+    def popleft(self) -> ConversationMessage:
+        message = self.pop(0)
+        self.nbytes -= message.size
+        return message
+    
+    def tail(self, limit: int) -> List[ConversationMessage]:
+        """The newest limit messages, oldest first"""
+        return self[-limit:] if limit > 0 else []
+
+
+# Store limits (overridable per instance)
+MAX_MESSAGES_PER_PROJECT = 50
+MAX_PROJECT_BYTES = int(os.getenv("CODEGENESIS_CONTEXT_PROJECT_BYTES", 16 * 1024 * 1024))
+MAX_TOTAL_BYTES = int(os.getenv("CODEGENESIS_CONTEXT_TOTAL_BYTES", 512 * 1024 * 1024))
+# With compression on, messages older than the newest HOT_MESSAGES are compressed if at least this long
+HOT_MESSAGES = 10
+COMPRESS_MIN_BYTES = 256
+
+
+def _files_bytes(files: Dict[str, str]) -> int:
+    return sum(len(name.encode()) + len(content.encode()) for name, content in files.items())
+
+
+class ContextStore(ABC):
+    """
+    Storage backend for conversations and project files.
+    
+    Implementations: InMemoryContextStore (bounded, process-local) and
+    sqlite_store.SQLiteContextStore (persistent). Stores that drop projects
+    on their own report it through eviction hooks.
+    """
+    
+    def __init__(self):
+        self._hooks: List[Callable[[str, str, int], None]] = []
+    
+    def add_eviction_hook(self, hook: Callable[[str, str, int], None]):
+        """Call hook(project_id, reason, freed_bytes) whenever a project is evicted"""
+        self._hooks.append(hook)
+    
+    def _notify(self, evicted: List[Tuple[str, str, int]]):
+        """Run eviction hooks (callers must not hold the store lock)"""
+        for project_id, reason, freed in evicted:
+            for hook in self._hooks:
+                hook(project_id, reason, freed)
+    
+    @abstractmethod
+    def add_message(self, project_id: str, role: str, content: str, metadata: Optional[Dict] = None):
+        """Add a message to the conversation history"""
+    
+    @abstractmethod
+    def get_conversation(self, project_id: str, limit: int = 10) -> List[ConversationMessage]:
+        """Get recent conversation messages, oldest first"""
+    
+    @abstractmethod
+    def set_file_context(self, project_id: str, files: Dict[str, str]):
+        """Store current file context for a project"""
+    
+    @abstractmethod
+    def get_file_context(self, project_id: str) -> Dict[str, str]:
+        """Get stored file context for a project"""
+    
+    @abstractmethod
+    def get_summary(self, project_id: str) -> Optional[ConversationSummary]:
+        """Get the project's rolling conversation summary, if any"""
+    
+    @abstractmethod
+    def set_summary(self, project_id: str, summary: ConversationSummary):
+        """Store the project's rolling conversation summary"""
+    
+    @abstractmethod
+    def clear_project(self, project_id: str):
+        """Clear all context for a project"""
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Backend-specific usage statistics"""
+    
+    def close(self):
+        """Release resources (flushing pending writes where applicable)"""
+
+
+class InMemoryContextStore(ContextStore):
     """
     In-memory context store for development.
-    Production should use Supabase with pgvector.
+    Production should use a persistent store (see sqlite_store).
+    
+    Memory is bounded: each project keeps at most max_messages messages and
+    max_project_bytes of messages plus files (oldest messages are trimmed
+    first), and projects are evicted least-recently-used first once there
+    are more than max_conversations of them or they hold more than
+    max_total_bytes together. Eviction hooks are called with
+    (project_id, reason, freed_bytes) so derived state can be dropped too.
+    
+    Recency is approximated with the CLOCK (second chance) scheme: using a
+    project only sets a referenced flag, and an eviction pass moves
+    referenced projects to the back instead of evicting them. Reordering
+    an LRU list on every access cost more than the lookup itself at 100k
+    projects.
+    
+    Histories are bounded MessageHistory lists. get_conversation slices
+    them without taking the lock; writes are serialized. With
+    compress=True, bodies that fall out of the newest hot_messages are
+    zlib-compressed (off by default: reading them inflates every time).
     """
     
-    def __init__(self, max_conversations: int = 100):
-        self.conversations: Dict[str, List[ConversationMessage]] = {}
+    def __init__(
+        self,
+        max_conversations: int = 100,
+        max_messages: int = MAX_MESSAGES_PER_PROJECT,
+        max_project_bytes: int = MAX_PROJECT_BYTES,
+        max_total_bytes: int = MAX_TOTAL_BYTES,
+        compress: bool = False,
+        hot_messages: int = HOT_MESSAGES
+    ):
+        super().__init__()
+        self.conversations: Dict[str, MessageHistory] = {}
         self.file_contexts: Dict[str, Dict[str, str]] = {}
+        self.summaries: Dict[str, ConversationSummary] = {}
         self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self.max_project_bytes = max_project_bytes
+        self.max_total_bytes = max_total_bytes
+        self.compress = compress
+        self.hot_messages = hot_messages
+        self.total_bytes = 0
+        self.evictions = 0
+        self._recency: "OrderedDict[str, bool]" = OrderedDict()  # Project -> used since the last eviction pass
+        self._file_bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
     
     def add_message(self, project_id: str, role: str, content: str, metadata: Optional[Dict] = None):
         """Add a message to the conversation history"""
-        if project_id not in self.conversations:
-            self.conversations[project_id] = []
-        
-        message = ConversationMessage(
-            role=role,
-            content=content,
-            timestamp=datetime.now(),
-            project_id=project_id,
-            metadata=metadata
-        )
-        
-        self.conversations[project_id].append(message)
+        message = ConversationMessage(role, content, None, project_id, metadata)
+        size = message.size if metadata else len(content) if content.isascii() else len(content.encode())
         
-        # Limit conversation history to prevent memory issues
-        if len(self.conversations[project_id]) > 50:
-            self.conversations[project_id] = self.conversations[project_id][-50:]
+        # The hot path: explicit acquire/release (`with` costs about twice as much),
+        # MessageHistory.push inlined and no recency reordering
+        lock = self._lock
+        lock.acquire()
+        try:
+            history = self.conversations.get(project_id)
+            if history is None:
+                history = self.conversations[project_id] = MessageHistory(self.max_messages, self.max_project_bytes)
+                if project_id in self._recency:  # Only projects already known can have files or a summary
+                    self._update_budget(project_id)
+                    self._recency[project_id] = True
+                else:
+                    self._recency[project_id] = False
+                evicted = len(self._recency) > self.max_conversations
+            else:
+                history.used = True
+                evicted = False
+            message.seq = history.seq = history.seq + 1
+            if len(history) >= history.maxlen:
+                dropped = history.pop(0)
+                if dropped.metadata is None and dropped._packed is None:  # dropped.size, inlined
+                    body = dropped.content
+                    size -= len(body) if body.isascii() else len(body.encode())
+                else:
+                    size -= dropped.size
+            history.append(message)
+            history.nbytes += size
+            if self.compress and len(history) > self.hot_messages:
+                saved = history[-self.hot_messages - 1].compress(COMPRESS_MIN_BYTES)
+                history.nbytes -= saved
+                size -= saved
+            if history.nbytes > history.budget:
+                before = history.nbytes
+                self._trim_messages(project_id)
+                size += history.nbytes - before
+            self.total_bytes += size
+            if evicted or self.total_bytes > self.max_total_bytes:
+                evicted = self._evict(project_id)
+        finally:
+            lock.release()
+        if evicted:
+            self._notify(evicted)
     
     def get_conversation(self, project_id: str, limit: int = 10) -> List[ConversationMessage]:
-        """Get recent conversation messages"""
-        if project_id not in self.conversations:
+        """Get recent conversation messages (lock-free: histories only change by single list operations)"""
+        history = self.conversations.get(project_id)
+        if history is None or limit <= 0:
             return []
-        return self.conversations[project_id][-limit:]
+        history.used = True
+        return history[-limit:]
     
     def set_file_context(self, project_id: str, files: Dict[str, str]):
-        """Store current file context for a project"""
-        self.file_contexts[project_id] = files
+        """Store current file context for a project (not kept if the files alone exceed the project budget)"""
+        size = _files_bytes(files)
+        evicted = []
+        with self._lock:
+            self.total_bytes += size - self._file_bytes.get(project_id, 0)
+            self._file_bytes[project_id] = size
+            self.file_contexts[project_id] = dict(files)  # A copy: in-place edits by the caller would skip the accounting
+            if size > self.max_project_bytes:
+                del self.file_contexts[project_id]
+                del self._file_bytes[project_id]
+                self.total_bytes -= size
+                self._update_budget(project_id)
+                evicted.append((project_id, "oversize", size))
+            else:
+                self._update_budget(project_id)
+                before = self._message_bytes(project_id)
+                self._trim_messages(project_id)
+                self.total_bytes += self._message_bytes(project_id) - before
+            evicted.extend(self._touch(project_id))
+        self._notify(evicted)
     
     def get_file_context(self, project_id: str) -> Dict[str, str]:
         """Get stored file context for a project"""
-        return self.file_contexts.get(project_id, {})
+        with self._lock:
+            if project_id in self._recency:
+                self._recency[project_id] = True
+            return self.file_contexts.get(project_id, {})
+    
+    def get_summary(self, project_id: str) -> Optional[ConversationSummary]:
+        """Get the project's rolling conversation summary, if any"""
+        with self._lock:
+            return self.summaries.get(project_id)
+    
+    def set_summary(self, project_id: str, summary: ConversationSummary):
+        """Store the project's rolling conversation summary (ignored once the project is gone)"""
+        with self._lock:
+            if project_id not in self._recency:
+                return
+            before = self._project_bytes(project_id)
+            self.summaries[project_id] = summary
+            self._update_budget(project_id)
+            self._trim_messages(project_id)
+            self.total_bytes += self._project_bytes(project_id) - before
+            evicted = self._touch(project_id)
+        self._notify(evicted)
     
     def clear_project(self, project_id: str):
         """Clear all context for a project"""
-        if project_id in self.conversations:
-            del self.conversations[project_id]
-        if project_id in self.file_contexts:
-            del self.file_contexts[project_id]
+        with self._lock:
+            self._drop(project_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Memory use overall and per project (tenant), roughly most recently used first"""
+        with self._lock:
+            tenants = {
+                project_id: {
+                    "bytes": self._project_bytes(project_id),
+                    "message_bytes": self._message_bytes(project_id),
+                    "file_bytes": self._file_bytes.get(project_id, 0),
+                    "summary_bytes": self._summary_bytes(project_id),
+                    "messages": len(self.conversations.get(project_id, ())),
+                    "files": len(self.file_contexts.get(project_id, ())),
+                }
+                for project_id in reversed(self._recency)
+            }
+            return {
+                "projects": len(self._recency),
+                "total_bytes": self.total_bytes,
+                "max_total_bytes": self.max_total_bytes,
+                "max_project_bytes": self.max_project_bytes,
+                "evictions": self.evictions,
+                "tenants": tenants,
+            }
+    
+    def _message_bytes(self, project_id: str) -> int:
+        history = self.conversations.get(project_id)
+        return history.nbytes if history is not None else 0
+    
+    def _summary_bytes(self, project_id: str) -> int:
+        summary = self.summaries.get(project_id)
+        return len(summary.text.encode()) if summary is not None else 0
+    
+    def _project_bytes(self, project_id: str) -> int:
+        return self._message_bytes(project_id) + self._file_bytes.get(project_id, 0) + self._summary_bytes(project_id)
+    
+    def _reserved_bytes(self, project_id: str) -> int:
+        """Bytes a project's files and summary take from its message budget"""
+        return self._file_bytes.get(project_id, 0) + self._summary_bytes(project_id)
+    
+    def _update_budget(self, project_id: str):
+        history = self.conversations.get(project_id)
+        if history is not None:
+            history.budget = self.max_project_bytes - self._reserved_bytes(project_id)
+    
+    def _trim_messages(self, project_id: str):
+        """Drop the oldest messages until the project fits its byte budget"""
+        history = self.conversations.get(project_id)
+        while history and history.nbytes > history.budget:
+            history.popleft()
+    
+    def _touch(self, project_id: str) -> List[Tuple[str, str, int]]:
+        """Mark a project used (new ones join at the back) and evict over the limits"""
+        recency = self._recency
+        recency[project_id] = project_id in recency
+        if len(recency) <= self.max_conversations and self.total_bytes <= self.max_total_bytes:
+            return []
+        return self._evict(project_id)
+    
+    def _evict(self, keep: str) -> List[Tuple[str, str, int]]:
+        """Evict from the front until within the limits, giving used projects and keep a second chance"""
+        recency = self._recency
+        evicted = []
+        while len(recency) > 1 and (len(recency) > self.max_conversations
+                                    or self.total_bytes > self.max_total_bytes):
+            victim, used = next(iter(recency.items()))
+            history = self.conversations.get(victim)
+            if used or victim == keep or (history is not None and history.used):
+                recency[victim] = False
+                if history is not None:
+                    history.used = False
+                recency.move_to_end(victim)
+                continue
+            reason = "count" if len(recency) > self.max_conversations else "bytes"
+            evicted.append((victim, reason, self._drop(victim)))
+            self.evictions += 1
+        return evicted
+    
+    def _drop(self, project_id: str) -> int:
+        freed = self._project_bytes(project_id)
+        self.conversations.pop(project_id, None)
+        self.file_contexts.pop(project_id, None)
+        self._file_bytes.pop(project_id, None)
+        self.summaries.pop(project_id, None)
+        self._recency.pop(project_id, None)
+        self.total_bytes -= freed
+        return freed
 
 
 class ContextManager:
@@ -83,17 +570,66 @@ class ContextManager:
     - Conversation memory with sliding window
     - File context tracking
     - Relevant code reference extraction
-    - Summary generation for long conversations
+    - BM25 file search over an incrementally maintained index
+    - Symbol-level chunk retrieval with file/line provenance
+    - File and symbol reference extraction (Aho-Corasick over project names)
+    - Optional hybrid keyword + vector ranking (hashed embeddings)
+    - Token-budgeted context assembly, memoized per project version
+    - Rolling conversation summaries, updated in the background
     """
     
-    def __init__(self, store: Optional[InMemoryContextStore] = None):
+    def __init__(
+        self,
+        store: Optional[ContextStore] = None,
+        summarizer: Optional["Summarizer"] = None,
+        summary_window: int = SUMMARY_WINDOW,
+        summary_batch: int = SUMMARY_BATCH,
+        hybrid_retrieval: bool = HYBRID_RETRIEVAL
+    ):
         """
         Initialize the context manager.
         
         Args:
             store: Context storage backend (default: in-memory)
+            summarizer: Folds turns into the rolling summary (default: none,
+                older turns are only described by keyword topics)
+            summary_window: Newest turns kept verbatim; older ones are summarized
+            summary_batch: Turns that must fall out of the window before a summary update
+            hybrid_retrieval: Default ranking of get_relevant_files (keyword
+                plus vector when True, keyword only otherwise)
         """
         self.store = store or InMemoryContextStore()
+        self.summarizer = summarizer
+        self.summary_window = summary_window
+        self.summary_batch = summary_batch
+        self.hybrid_retrieval = hybrid_retrieval
+        self._summary_jobs: Dict[str, Future] = {}
+        self._resets: Dict[str, int] = {}
+        self._summary_stats = {"updates": 0, "errors": 0, "last_error": None}
+        self._chat_prefixes: Dict[str, List[Tuple[str, int]]] = {}
+        self._chat_anchors: Dict[str, int] = {}
+        self._prompt_stats = {"prompts": 0, "tokens": 0, "reused_tokens": 0}
+        self._executor = ThreadPoolExecutor(SUMMARY_WORKERS, thread_name_prefix="context-summary") if summarizer else None
+        self._indexes: Dict[str, SearchIndex] = {}
+        self._chunk_indexes: Dict[str, ChunkIndex] = {}
+        self._vector_indexes: Dict[str, "VectorIndex"] = {}
+        self._reference_indexes: Dict[str, ReferenceIndex] = {}
+        self._versions: Dict[str, int] = {}
+        # Versions and reset marks are stamps from one counter, so a project's entries can be
+        # dropped on reset without a later stamp ever matching one taken before it
+        self._stamps = 0
+        self._floor = 0  # Stamp of projects without an entry; moves on every reset
+        self._assembled: Dict[str, "OrderedDict[Tuple, AssembledContext]"] = {}
+        self._lock = threading.Lock()
+        self.store.add_eviction_hook(self._on_evict)
+    
+    def _on_evict(self, project_id: str, reason: str, freed_bytes: int):
+        """Drop indexes and assembled prompts of a project the store evicted"""
+        self._indexes.pop(project_id, None)
+        self._chunk_indexes.pop(project_id, None)
+        self._vector_indexes.pop(project_id, None)
+        self._reference_indexes.pop(project_id, None)
+        self._reset(project_id)
     
     def add_conversation(self, project_id: str, role: str, content: str, metadata: Optional[Dict] = None):
         """
@@ -106,6 +642,32 @@ class ContextManager:
             metadata: Optional metadata (e.g., file references, code blocks)
         """
         self.store.add_message(project_id, role, content, metadata)
+        self._bump_version(project_id)
+        if self.summarizer is not None:
+            self._schedule_summary(project_id)
+    
+    def _bump_version(self, project_id: str):
+        """Invalidate assembled prompts after the project's files or conversation changed"""
+        with self._lock:
+            self._stamps += 1
+            self._versions[project_id] = self._stamps
+            self._assembled.pop(project_id, None)
+    
+    def _reset(self, project_id: str):
+        """Project cleared or evicted: forget its per-project state and discard in-flight summaries"""
+        with self._lock:
+            self._versions.pop(project_id, None)
+            self._resets.pop(project_id, None)
+            self._assembled.pop(project_id, None)
+            self._chat_prefixes.pop(project_id, None)
+            self._chat_anchors.pop(project_id, None)
+            self._stamps += 1
+            self._floor = self._stamps
+    
+    def project_version(self, project_id: str) -> int:
+        """Stamp that changes whenever the project's files or conversation change"""
+        with self._lock:
+            return self._versions.get(project_id, self._floor)
     
     def get_conversation_context(self, project_id: str, limit: int = 10) -> str:
         """
@@ -119,23 +681,32 @@ class ContextManager:
             Formatted conversation history string
         """
         messages = self.store.get_conversation(project_id, limit)
+        summary = self.store.get_summary(project_id)
         
         if not messages:
             return ""
         
-        formatted = ["## Previous Conversation:"]
+        formatted = []
+        if summary is not None:
+            formatted.extend(["## Conversation Summary:", summary.text, ""])
+        formatted.append("## Previous Conversation:")
         for msg in messages:
             role_name = "User" if msg.role == "user" else "Assistant"
             formatted.append(f"**{role_name}**: {msg.content[:500]}{'...' if len(msg.content) > 500 else ''}")
         
         return "\n".join(formatted)
     
-    def get_file_context(self, project_id: str) -> str:
+    def get_file_context(self, project_id: str, query: Optional[str] = None, limit: int = 8) -> str:
         """
         Get formatted file context for AI prompts.
         
-        Returns file structure and content summaries.
+        With a query, returns only the top-ranked symbol-level chunks, each
+        labelled with its file and line range. Without one, returns the
+        first lines of every file.
         """
+        if query:
+            return self.format_chunks(self.get_relevant_chunks(project_id, query, limit))
+        
         files = self.store.get_file_context(project_id)
         
         if not files:
@@ -153,37 +724,98 @@ class ContextManager:
         
         return "\n".join(formatted)
     
+    @staticmethod
+    def format_chunks(chunks: List[CodeChunk]) -> str:
+        """Format chunks for a prompt, each headed by its file, line range and symbol"""
+        if not chunks:
+            return ""
+        
+        formatted = ["## Relevant Code:"]
+        for chunk in chunks:
+            formatted.append(f"\n### {chunk.file} (lines {chunk.start_line}-{chunk.end_line}): {chunk.name}")
+            formatted.append("```")
+            formatted.append(chunk.text)
+            formatted.append("```")
+        
+        return "\n".join(formatted)
+    
     def update_project_files(self, project_id: str, files: Dict[str, str]):
-        """Update the stored file context for a project"""
+        """Update the stored file context for a project (only changed files are re-indexed)"""
         self.store.set_file_context(project_id, files)
+        stored = self.store.get_file_context(project_id)  # Empty if over the store's project budget
+        stats = self._search_index(project_id, build=False).update(stored)
+        self._chunk_index(project_id, build=False).update(stored)
+        self._reference_index(project_id, build=False).update(stored)
+        vectors = self._vector_indexes.get(project_id)
+        if vectors is not None:  # Built on the first hybrid query
+            vectors.update(stored)
+        if stats["added"] or stats["updated"] or stats["removed"]:
+            self._bump_version(project_id)
+    
+    def _search_index(self, project_id: str, build: bool = True) -> SearchIndex:
+        """The project's search index, built from the stored files on first use"""
+        index = self._indexes.get(project_id)
+        if index is None:
+            index = self._indexes[project_id] = SearchIndex()
+            if build:
+                index.update(self.store.get_file_context(project_id))
+        return index
+    
+    def _chunk_index(self, project_id: str, build: bool = True) -> ChunkIndex:
+        """The project's chunk index, built from the stored files on first use"""
+        index = self._chunk_indexes.get(project_id)
+        if index is None:
+            index = self._chunk_indexes[project_id] = ChunkIndex()
+            if build:
+                index.update(self.store.get_file_context(project_id))
+        return index
     
-    def extract_code_references(self, message: str) -> List[str]:
+    def _reference_index(self, project_id: str, build: bool = True) -> ReferenceIndex:
+        """The project's reference index, built from the stored files on first use"""
+        index = self._reference_indexes.get(project_id)
+        if index is None:
+            index = self._reference_indexes[project_id] = ReferenceIndex()
+            if build:
+                index.update(self.store.get_file_context(project_id))
+        return index
+    
+    def _vector_index(self, project_id: str) -> "VectorIndex":
+        """The project's vector index, built from the stored files on first use"""
+        index = self._vector_indexes.get(project_id)
+        if index is None:
+            index = self._vector_indexes[project_id] = VectorIndex()
+            index.update(self.store.get_file_context(project_id))
+        return index
+    
+    def extract_code_references(self, message: str, project_id: Optional[str] = None) -> List[str]:
         """
         Extract file and code references from a message.
         
-        Returns list of referenced files/components.
+        With a project, every file path, basename and exported symbol of the
+        project mentioned in the message is found in one pass. Backticked
+        filenames and conventionally named components are recognized either way.
+        
+        Returns list of referenced files/components, in order of first mention.
         """
         references = []
-        
-        # Common file patterns
-        import re
-        file_pattern = r'`([^`]+\.(tsx?|jsx?|py|css|html|json))`'
-        matches = re.findall(file_pattern, message, re.IGNORECASE)
-        references.extend([m[0] for m in matches])
-        
-        # Component/function references
-        component_pattern = r'\b([A-Z][a-zA-Z]+(?:Component|Page|Layout|Button|Form|Modal))\b'
-        components = re.findall(component_pattern, message)
-        references.extend(components)
-        
-        return list(set(references))
+        if project_id is not None:
+            references.extend(name for name, _ in self._reference_index(project_id).find(message))
+        references.extend(_FILE_REFERENCE.findall(message))
+        references.extend(_COMPONENT_REFERENCE.findall(message))
+        return list(dict.fromkeys(references))
+    
+    def referenced_files(self, project_id: str, message: str) -> List[str]:
+        """Project files a message names by path, basename or exported symbol, in order of first mention"""
+        return self._reference_index(project_id).files(message)
     
     def build_context_prompt(
         self, 
         project_id: str, 
         include_conversation: bool = True,
         include_files: bool = True,
-        conversation_limit: int = 5
+        conversation_limit: int = 5,
+        query: Optional[str] = None,
+        budget: Optional[int] = None
     ) -> str:
         """
         Build a comprehensive context prompt for AI.
@@ -193,14 +825,22 @@ class ContextManager:
             include_conversation: Include conversation history
             include_files: Include file context
             conversation_limit: Max conversation messages
+            query: Current request; when given, only relevant code chunks are included
+            budget: Token budget; when given, the prompt is packed by assemble_context
             
         Returns:
             Formatted context string for system prompt
         """
+        if budget is not None:
+            return self.assemble_context(
+                project_id, query, budget,
+                include_conversation=include_conversation, include_files=include_files
+            ).prompt
+        
         parts = []
         
         if include_files:
-            file_ctx = self.get_file_context(project_id)
+            file_ctx = self.get_file_context(project_id, query)
             if file_ctx:
                 parts.append(file_ctx)
         
@@ -214,50 +854,275 @@ class ContextManager:
         
         return "\n\n".join(parts)
     
-    def get_relevant_files(self, project_id: str, query: str) -> Dict[str, str]:
+    def get_relevant_files(
+        self,
+        project_id: str,
+        query: str,
+        limit: int = 5,
+        hybrid: Optional[bool] = None
+    ) -> Dict[str, str]:
         """
-        Get files most relevant to a query.
+        Get files most relevant to a query, best first.
         
-        Simple keyword-based matching. For production, use vector similarity.
+        Files the query names (by path, basename or exported symbol) come
+        first. The rest are ranked with BM25 over the project's inverted
+        index, boosted for matches in the file path and in declared
+        identifiers. With hybrid, BM25 scores are fused with cosine
+        similarity of hashed embeddings, which also matches related wording
+        ("auth" / "authentication"); keyword-only ranking is used when NumPy
+        is not installed. hybrid defaults to the manager's hybrid_retrieval
+        setting (CODEGENESIS_HYBRID_RETRIEVAL).
         """
         all_files = self.store.get_file_context(project_id)
         
         if not all_files:
             return {}
         
-        # Extract keywords from query
-        keywords = set(query.lower().split())
-        keywords.discard('the')
-        keywords.discard('and')
-        keywords.discard('a')
-        keywords.discard('to')
-        keywords.discard('in')
-        
-        # Score files by keyword matches
-        scored_files = []
-        for filename, content in all_files.items():
-            score = 0
-            lower_content = content.lower()
-            lower_filename = filename.lower()
+        if hybrid is None:
+            hybrid = self.hybrid_retrieval
+        if hybrid and VectorIndex is not None:
+            candidates = limit * 4
+            ranked = hybrid_rank(
+                self._search_index(project_id).search(query, candidates),
+                self._vector_index(project_id).search(query, candidates),
+                limit
+            )
+        else:
+            ranked = self._search_index(project_id).search(query, limit)
+        mentioned = self.referenced_files(project_id, query)
+        names = list(dict.fromkeys(mentioned + [filename for filename, _ in ranked]))[:limit]
+        return {filename: all_files[filename] for filename in names if filename in all_files}
+    
+    def get_relevant_chunks(self, project_id: str, query: str, limit: int = 8) -> List[CodeChunk]:
+        """
+        Get the symbol-level chunks most relevant to a query, best first.
+        
+        Chunks are functions, components, classes, CSS rule blocks or line
+        windows, each carrying its file and 1-based line range.
+        """
+        if not self.store.get_file_context(project_id):
+            return []
+        
+        return [chunk for chunk, _ in self._chunk_index(project_id).search(query, limit)]
+    
+    def assemble_context(
+        self,
+        project_id: str,
+        query: Optional[str] = None,
+        budget: int = DEFAULT_CONTEXT_BUDGET,
+        include_conversation: bool = True,
+        include_files: bool = True,
+        conversation_limit: int = 10,
+        chunk_limit: int = 12
+    ) -> AssembledContext:
+        """
+        Pack the most useful context into a token budget.
+        
+        Candidates are the file tree, the conversation summary, code chunks
+        relevant to the query and recent turns. They are taken greedily by
+        value per token (chunks are valued by relevance, turns decay with
+        age) and then laid out in a fixed section order. Results are
+        memoized until the project's files or conversation change.
+        
+        Args:
+            project_id: Project identifier
+            query: Current request, used to rank code chunks
+            budget: Maximum tokens for the assembled prompt
+            include_conversation: Consider summary and recent turns
+            include_files: Consider the file tree and code chunks
+            conversation_limit: Most recent turns to consider
+            chunk_limit: Most relevant chunks to consider
             
-            for keyword in keywords:
-                if keyword in lower_filename:
-                    score += 3  # Filename match is more important
-                if keyword in lower_content:
-                    score += 1
+        Returns:
+            The prompt with the labels of included and dropped pieces
+        """
+        key = (query, budget, include_conversation, include_files, conversation_limit, chunk_limit)
+        with self._lock:
+            version = self._versions.get(project_id, self._floor)
+            cached = self._assembled.get(project_id, {}).get(key)
+        if cached is not None:
+            return cached
+        
+        pieces = []
+        if include_files:
+            pieces.extend(self._file_pieces(project_id, query, chunk_limit))
+        if include_conversation:
+            pieces.extend(self._conversation_pieces(project_id, conversation_limit))
+        assembled = self._pack(pieces, budget)
+        
+        with self._lock:
+            if self._versions.get(project_id, self._floor) == version:
+                cache = self._assembled.setdefault(project_id, OrderedDict())
+                cache[key] = assembled
+                while len(cache) > MAX_ASSEMBLED_PER_PROJECT:
+                    cache.popitem(last=False)
+        return assembled
+    
+    def _file_pieces(self, project_id: str, query: Optional[str], limit: int) -> List[ContextPiece]:
+        files = self.store.get_file_context(project_id)
+        if not files:
+            return []
+        
+        pieces = [ContextPiece("file_tree", "file tree", "\n".join(sorted(files)), value=2.0)]
+        if query:
+            ranked = self._chunk_index(project_id).search(query, limit)
+            best = ranked[0][1] if ranked else 1.0
+            for rank, (chunk, score) in enumerate(ranked):
+                text = f"### {chunk.file} (lines {chunk.start_line}-{chunk.end_line}): {chunk.name}\n```\n{chunk.text}\n```"
+                pieces.append(ContextPiece("chunk", chunk.location, text, value=4.0 * score / best, order=rank))
+        return pieces
+    
+    def _conversation_pieces(self, project_id: str, limit: int) -> List[ContextPiece]:
+        pieces = []
+        summary = self.summarize_conversation(project_id)
+        if summary:
+            pieces.append(ContextPiece("summary", "conversation summary", summary, value=1.5))
+        
+        messages = self.store.get_conversation(project_id, limit)
+        for age, msg in enumerate(reversed(messages)):
+            role_name = "User" if msg.role == "user" else "Assistant"
+            content = msg.content[:MAX_TURN_CHARS] + ("..." if len(msg.content) > MAX_TURN_CHARS else "")
+            pieces.append(ContextPiece("turn", f"turn -{age + 1}", f"**{role_name}**: {content}",
+                                       value=3.0 * 0.8 ** age, order=-age))
+        return pieces
+    
+    def _pack(self, pieces: List[ContextPiece], budget: int) -> AssembledContext:
+        """Greedy knapsack by value per token; a section header is charged with its first piece"""
+        headers = dict(_CONTEXT_SECTIONS)
+        chosen: List[ContextPiece] = []
+        used = 0
+        opened = set()
+        for piece in sorted(pieces, key=lambda p: p.value / max(p.tokens, 1), reverse=True):
+            cost = piece.tokens + 1  # Separator
+            if piece.kind not in opened:
+                cost += estimate_tokens(headers[piece.kind]) + 1
+            if used + cost <= budget:
+                chosen.append(piece)
+                opened.add(piece.kind)
+                used += cost
+        
+        parts = []
+        for kind, header in _CONTEXT_SECTIONS:
+            section = sorted((p for p in chosen if p.kind == kind), key=lambda p: p.order)
+            if section:
+                parts.append("\n".join([header] + [p.text for p in section]))
+        prompt = "\n\n".join(parts)
+        
+        included = {id(p) for p in chosen}
+        return AssembledContext(
+            prompt=prompt,
+            budget=budget,
+            tokens=estimate_tokens(prompt),
+            included=[p.label for p in chosen],
+            dropped=[p.label for p in pieces if id(p) not in included],
+        )
+    
+    def build_chat_prompt(
+        self,
+        project_id: str,
+        message: str,
+        system_prompt: str,
+        pinned_files: Optional[List[str]] = None,
+        extra_context: Optional[str] = None
+    ) -> ChatPrompt:
+        """
+        Build the messages for a chat turn in prefix-stable order.
+        
+        Sections run from least to most frequently changing: system prompt,
+        file tree, pinned files, conversation summary, recent turns, then
+        the new message. Consecutive turns therefore share a long common
+        prefix that providers can serve from their prompt cache.
+        
+        Recent turns are the ones after the summary. Without a summary they
+        start at an anchor that is moved forward summary_window turns at a
+        time, so the turn list only grows between moves. It is not a
+        sliding window that changes the first turn on every request.
+        
+        Args:
+            project_id: Project identifier
+            message: The user's new message
+            system_prompt: Instructions for the model
+            pinned_files: Files to include in full (those not stored are skipped)
+            extra_context: Per-request context, placed after the turns
             
-            if score > 0:
-                scored_files.append((filename, content, score))
+        Returns:
+            The messages, their token estimate and the part reused from the
+            project's previous prompt
+        """
+        messages: List[BaseMessage] = [SystemMessage(content=system_prompt)]
+        
+        files = self.store.get_file_context(project_id)
+        if files:
+            messages.append(SystemMessage(content="## Project Files:\n" + "\n".join(sorted(files))))
+            pinned = sorted(name for name in set(pinned_files or ()) if name in files)
+            if pinned:
+                parts = ["## Pinned Files:"]
+                for name in pinned:
+                    parts.append(f"### {name}\n```\n{files[name][:PINNED_FILE_CHARS]}\n```")
+                messages.append(SystemMessage(content="\n".join(parts)))
+        
+        summary = self.store.get_summary(project_id)
+        if summary is not None:
+            messages.append(SystemMessage(content="## Conversation Summary:\n" + summary.text))
+        
+        for msg in self._chat_turns(project_id, summary):
+            content = msg.content[:MAX_TURN_CHARS]
+            messages.append(AIMessage(content=content) if msg.role == "assistant" else HumanMessage(content=content))
+        
+        if extra_context:
+            messages.append(SystemMessage(content=f"Additional context: {extra_context}"))
+        messages.append(HumanMessage(content=message))
         
-        # Return top 5 most relevant files
-        scored_files.sort(key=lambda x: x[2], reverse=True)
-        return {f[0]: f[1] for f in scored_files[:5]}
+        blocks = [
+            (hashlib.blake2b(f"{m.type}\0{m.content}".encode(), digest_size=16).hexdigest(), estimate_tokens(m.content))
+            for m in messages
+        ]
+        with self._lock:
+            previous = self._chat_prefixes.get(project_id, [])
+            reused = 0
+            for (digest, tokens), (before, _) in zip(blocks, previous):
+                if digest != before:
+                    break
+                reused += tokens
+            self._chat_prefixes[project_id] = blocks
+            total = sum(tokens for _, tokens in blocks)
+            self._prompt_stats["prompts"] += 1
+            self._prompt_stats["tokens"] += total
+            self._prompt_stats["reused_tokens"] += reused
+        return ChatPrompt(messages=messages, tokens=total, reused_tokens=reused)
+    
+    def _chat_turns(self, project_id: str, summary: Optional[ConversationSummary]) -> List[ConversationMessage]:
+        """Turns after the summary and the anchor, holding at most 2 * summary_window of them"""
+        window = max(self.summary_window, 1)
+        recent = self.store.get_conversation(project_id, 2 * window + 1)
+        through = summary.through if summary is not None else 0
+        with self._lock:
+            anchor = self._chat_anchors.get(project_id, 0)
+            turns = [m for m in recent if m.seq > through and m.seq >= anchor]
+            if len(turns) > 2 * window:
+                turns = turns[-window:]
+                self._chat_anchors[project_id] = turns[0].seq
+        return turns
+    
+    def prompt_stats(self) -> Dict[str, Any]:
+        """Chat prompts built and how many of their tokens repeated the previous prompt's prefix"""
+        with self._lock:
+            stats = dict(self._prompt_stats)
+        stats["prefix_reuse"] = round(stats["reused_tokens"] / stats["tokens"], 4) if stats["tokens"] else 0.0
+        return stats
     
     def summarize_conversation(self, project_id: str) -> str:
         """
         Generate a summary of the conversation.
         Useful for very long conversations.
+        
+        Returns the rolling summary when one exists, otherwise the topics
+        mentioned in the recent history.
         """
+        summary = self.store.get_summary(project_id)
+        if summary is not None:
+            return summary.text
+        
         messages = self.store.get_conversation(project_id, limit=50)
         
         if len(messages) < 5:
@@ -280,10 +1145,160 @@ class ContextManager:
         
         return ""
     
+    def _pending_turns(self, project_id: str) -> Tuple[Optional[ConversationSummary], List[ConversationMessage]]:
+        """The summary and the turns that left the recent window but are not folded into it yet"""
+        summary = self.store.get_summary(project_id)
+        messages = self.store.get_conversation(project_id, self.summary_window + SUMMARY_MAX_TURNS)
+        older = messages[:-self.summary_window] if self.summary_window else messages
+        through = summary.through if summary is not None else 0
+        return summary, [m for m in older if m.seq > through]
+    
+    def update_summary(self, project_id: str, min_turns: int = 1) -> bool:
+        """
+        Fold turns that left the recent window into the rolling summary.
+        
+        Blocks on the summarizer; add_conversation runs this in the
+        background. Summarizer failures are counted in summary_stats() and
+        leave the previous summary in place.
+        
+        Returns:
+            True if the summary was updated
+        """
+        if self.summarizer is None:
+            return False
+        with self._lock:
+            resets = self._resets.get(project_id)
+            if resets is None:
+                self._stamps += 1
+                resets = self._resets[project_id] = self._stamps
+        summary, pending = self._pending_turns(project_id)
+        if len(pending) < max(min_turns, 1):
+            return False
+        
+        try:
+            text = self.summarizer(summary.text if summary is not None else "", pending).strip()
+        except Exception as e:
+            with self._lock:
+                self._summary_stats["errors"] += 1
+                self._summary_stats["last_error"] = str(e)
+            return False
+        
+        updated = ConversationSummary(
+            text=text[:SUMMARY_MAX_CHARS],
+            through=pending[-1].seq,
+            turns=(summary.turns if summary is not None else 0) + len(pending),
+        )
+        with self._lock:
+            if self._resets.get(project_id) != resets:
+                return False  # Cleared or evicted meanwhile
+            self._summary_stats["updates"] += 1
+        self.store.set_summary(project_id, updated)
+        self._bump_version(project_id)
+        return True
+    
+    def _schedule_summary(self, project_id: str):
+        """Start a background summary update once summary_batch turns have left the window"""
+        _, pending = self._pending_turns(project_id)
+        if len(pending) < self.summary_batch:
+            return
+        with self._lock:
+            job = self._summary_jobs.get(project_id)
+            if job is not None and not job.done():
+                return  # The running job re-checks when it finishes
+            try:
+                self._summary_jobs[project_id] = self._executor.submit(self._summary_loop, project_id)
+            except RuntimeError:  # Shut down
+                pass
+    
+    def _summary_loop(self, project_id: str):
+        try:
+            while self.update_summary(project_id, self.summary_batch):
+                pass
+        finally:
+            with self._lock:
+                self._summary_jobs.pop(project_id, None)
+        # Turns added while the last update ran saw this job and skipped scheduling
+        self._schedule_summary(project_id)
+    
+    def wait_for_summaries(self, timeout: Optional[float] = None) -> bool:
+        """Wait for running background summary updates"""
+        with self._lock:
+            jobs = list(self._summary_jobs.values())
+        return not wait(jobs, timeout).not_done
+    
+    def summary_stats(self) -> Dict[str, Any]:
+        """Rolling summary updates, failures and running jobs"""
+        with self._lock:
+            return {
+                "enabled": self.summarizer is not None,
+                **self._summary_stats,
+                "running": sum(1 for job in self._summary_jobs.values() if not job.done()),
+            }
+    
+    def close(self):
+        """Finish running summary updates, then close the store"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        self.store.close()
+    
     def clear_project_context(self, project_id: str):
         """Clear all context for a project"""
         self.store.clear_project(project_id)
+        self._indexes.pop(project_id, None)
+        self._chunk_indexes.pop(project_id, None)
+        self._vector_indexes.pop(project_id, None)
+        self._reference_indexes.pop(project_id, None)
+        self._reset(project_id)
+
+
+Summarizer = Callable[[str, List[ConversationMessage]], str]
+
+_SUMMARY_PROMPT = """You maintain the running summary of a conversation about a software project.
+Merge the new turns into the current summary. Keep requirements, decisions, constraints,
+file and component names and open issues; drop greetings and code listings.
+Reply with the updated summary only, at most {words} words."""
+
+
+class LLMSummarizer:
+    """Summarizer backed by the platform LLM"""
+    
+    def __init__(self, temperature: float = 0.2):
+        self.llm = api_config.get_llm(context="platform", temperature=temperature)
+    
+    def __call__(self, summary: str, messages: List[ConversationMessage]) -> str:
+        turns = []
+        for msg in messages:
+            role_name = "User" if msg.role == "user" else "Assistant"
+            turns.append(f"{role_name}: {msg.content[:SUMMARY_TURN_CHARS]}")
+        response = self.llm.invoke([
+            SystemMessage(content=_SUMMARY_PROMPT.format(words=SUMMARY_MAX_CHARS // 8)),
+            HumanMessage(content=f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n" + "\n".join(turns)),
+        ])
+        return response.content
+
+
+def create_context_store() -> ContextStore:
+    """
+    Context store selected by CODEGENESIS_CONTEXT_STORE.
+    
+    "sqlite" persists to CODEGENESIS_CONTEXT_DB (see sqlite_store); anything
+    else keeps context in memory.
+    """
+    if os.getenv("CODEGENESIS_CONTEXT_STORE", "memory").lower() == "sqlite":
+        from sqlite_store import SQLiteContextStore
+        return SQLiteContextStore(os.getenv("CODEGENESIS_CONTEXT_DB", "codegenesis_context.db"))
+    return InMemoryContextStore()
+
+
+def create_summarizer() -> Optional[Summarizer]:
+    """
+    Rolling summaries use the platform LLM when its API key is configured,
+    unless CODEGENESIS_CONTEXT_SUMMARIES is "0".
+    """
+    if os.getenv("CODEGENESIS_CONTEXT_SUMMARIES", "1") == "0" or not api_config.platform_api_key:
+        return None
+    return LLMSummarizer()
 
 
 # Global context manager instance
-context_manager = ContextManager()
+context_manager = ContextManager(create_context_store(), create_summarizer())
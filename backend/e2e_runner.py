@@ -0,0 +1,360 @@
+"""
+End-to-End Test Runner for CodeGenesis
+Serves generated files locally and runs test cases in a pool of headless Chromium browsers
+"""
+import os
+import time
+import queue
+import mimetypes
+import posixpath
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+from functools import partial
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Dict, List, Any, Callable
+from dataclasses import dataclass, field, asdict
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:  # Test execution is skipped without Playwright
+    sync_playwright = None
+
+
+DEFAULT_POOL_SIZE = int(os.getenv("CODEGENESIS_BROWSER_POOL_SIZE", "2"))
+STEP_TIMEOUT_MS = 5000
+POOL_START_TIMEOUT = 60.0
+
+# Files the browser cannot load without a build step
+BUILD_EXTENSIONS = ('.ts', '.tsx', '.jsx', '.vue', '.svelte', '.scss')
+
+
+@dataclass
+class CaseResult:
+    """Outcome of a single test case"""
+    name: str
+    passed: bool
+    error: Optional[str] = None
+    failed_step: Optional[int] = None  # 0-based index into the case's steps
+    action: Optional[str] = None
+    selector: Optional[str] = None
+    console_errors: List[str] = field(default_factory=list)
+    duration_ms: int = 0
+
+    def describe(self) -> str:
+        """One-line failure description for the debugger"""
+        where = ""
+        if self.failed_step is not None:
+            where = f" at step {self.failed_step + 1} ({self.action}"
+            where += f" {self.selector})" if self.selector else ")"
+        message = f"Test '{self.name}' failed{where}: {self.error}"
+        if self.console_errors:
+            message += f" | console errors: {'; '.join(self.console_errors[:3])}"
+        return message
+
+
+@dataclass
+class RunReport:
+    """Results of running a generation's test cases"""
+    status: str  # 'passed', 'failed' or 'skipped'
+    results: List[CaseResult] = field(default_factory=list)
+    skipped_reason: Optional[str] = None
+    duration_ms: int = 0
+
+    @property
+    def failures(self) -> List[CaseResult]:
+        return [r for r in self.results if not r.passed]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "passed": len(self.results) - len(self.failures),
+            "failed": len(self.failures),
+            "skipped_reason": self.skipped_reason,
+            "duration_ms": self.duration_ms,
+            "results": [asdict(r) for r in self.results],
+        }
+
+
+def needs_build(files: Dict[str, str]) -> Optional[str]:
+    """Reason the project cannot be served as static files, or None if it can"""
+    if "index.html" not in files:
+        return "no index.html at the project root"
+    built = [name for name in files if name.lower().endswith(BUILD_EXTENSIONS)]
+    if built:
+        return f"requires a build step ({built[0]})"
+    return None
+
+
+class StaticServer:
+    """
+    Serve an in-memory project over HTTP on a free localhost port.
+
+    Unknown paths without an extension fall back to index.html so
+    client-side routes resolve.
+    """
+
+    def __init__(self, files: Dict[str, str]):
+        self.files = {name.lstrip("/"): content for name, content in files.items()}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        files = self.files
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = posixpath.normpath(self.path.split("?")[0].split("#")[0]).lstrip("/")
+                if path in ("", "."):
+                    path = "index.html"
+                if path not in files and f"{path}/index.html" in files:
+                    path = f"{path}/index.html"
+                if path not in files and not posixpath.splitext(path)[1]:
+                    path = "index.html"
+                if path not in files:
+                    self.send_error(404)
+                    return
+
+                body = files[path].encode()
+                content_type = mimetypes.guess_type(path)[0] or "text/plain"
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep test runs quiet
+
+        return Handler
+
+    def start(self) -> "StaticServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StaticServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@contextmanager
+def _launch_chromium():
+    """Launch a headless Chromium owned by the calling thread"""
+    if sync_playwright is None:
+        raise RuntimeError("playwright is not installed")
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        try:
+            yield browser
+        finally:
+            browser.close()
+
+
+class BrowserPool:
+    """
+    A fixed set of worker threads, each owning a pre-launched browser.
+
+    Playwright's sync API is bound to the thread that started it, so each
+    browser lives on its own worker and jobs are handed over through a
+    queue. Jobs are callables taking the browser; idle workers pick up the
+    next job, which shards independent tests across browsers.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, launcher: Callable = _launch_chromium):
+        self.size = max(1, size)
+        self._launcher = launcher
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._started = threading.Semaphore(0)
+        self._live = 0
+        self._lock = threading.Lock()
+        self.start_errors: List[str] = []
+
+    def start(self, timeout: float = POOL_START_TIMEOUT) -> "BrowserPool":
+        """Launch every browser; raises RuntimeError if none could be started"""
+        for i in range(self.size):
+            thread = threading.Thread(target=self._worker, name=f"codegenesis-browser-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        deadline = time.monotonic() + timeout
+        for _ in range(self.size):
+            if not self._started.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                break
+
+        if self._live == 0:
+            self.close()
+            raise RuntimeError("; ".join(self.start_errors) or "browser launch timed out")
+        return self
+
+    def _worker(self):
+        try:
+            with self._launcher() as browser:
+                with self._lock:
+                    self._live += 1
+                self._started.release()
+                self._serve(browser)
+        except Exception as e:
+            with self._lock:
+                self.start_errors.append(str(e))
+            self._started.release()
+
+    def _serve(self, browser):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            job, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(job(browser))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, job: Callable[[Any], Any]) -> Future:
+        """Run job(browser) on the next free browser"""
+        future: Future = Future()
+        self._jobs.put((job, future))
+        return future
+
+    def close(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+        self._threads = []
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """The shared browser pool, launched on first use and kept warm afterwards"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool().start()
+        return _pool
+
+
+def _run_step(page, step: Dict[str, Any], base_url: str):
+    action = step.get("action")
+    selector = step.get("selector")
+
+    if action == "goto":
+        page.goto(base_url + step.get("path", "/"))
+    elif action == "click":
+        page.click(selector)
+    elif action == "fill":
+        page.fill(selector, str(step.get("value", "")))
+    elif action == "press":
+        page.press(selector, step.get("key", "Enter"))
+    elif action == "check":
+        page.check(selector)
+    elif action == "select":
+        page.select_option(selector, str(step.get("value", "")))
+    elif action == "expect_visible":
+        page.wait_for_selector(selector, state="visible")
+    elif action == "expect_hidden":
+        page.wait_for_selector(selector, state="hidden")
+    elif action == "expect_text":
+        page.wait_for_selector(selector)
+        text = page.text_content(selector) or ""
+        if str(step.get("text", "")) not in text:
+            raise AssertionError(f"expected text {step.get('text')!r}, got {text.strip()[:100]!r}")
+    elif action == "expect_count":
+        count = page.locator(selector).count()
+        if count != int(step.get("count", 0)):
+            raise AssertionError(f"expected {step.get('count')} elements, found {count}")
+    elif action == "expect_url":
+        if str(step.get("contains", "")) not in page.url:
+            raise AssertionError(f"expected URL containing {step.get('contains')!r}, got {page.url!r}")
+    else:
+        raise ValueError(f"unknown action {action!r}")
+
+
+def run_case(browser, base_url: str, case: Dict[str, Any], timeout_ms: int = STEP_TIMEOUT_MS) -> CaseResult:
+    """Run one test case in a fresh browser context"""
+    started = time.perf_counter()
+    result = CaseResult(name=case.get("name", "unnamed test"), passed=False)
+    context = browser.new_context()
+    try:
+        page = context.new_page()
+        page.set_default_timeout(timeout_ms)
+        page.on("console", lambda msg: result.console_errors.append(msg.text) if msg.type == "error" else None)
+        page.on("pageerror", lambda error: result.console_errors.append(str(error)))
+
+        page.goto(base_url + case.get("path", "/"))
+        for index, step in enumerate(case.get("steps", [])):
+            try:
+                _run_step(page, step, base_url)
+            except Exception as e:
+                result.failed_step, result.action, result.selector = index, step.get("action"), step.get("selector")
+                result.error = str(e).split("\n")[0]
+                return result
+
+        result.passed = True
+        return result
+    except Exception as e:
+        result.error = str(e).split("\n")[0]
+        return result
+    finally:
+        result.duration_ms = int((time.perf_counter() - started) * 1000)
+        context.close()
+
+
+def run_test_cases(
+    files: Dict[str, str],
+    cases: List[Dict[str, Any]],
+    pool: Optional[BrowserPool] = None,
+    timeout_ms: int = STEP_TIMEOUT_MS
+) -> RunReport:
+    """
+    Serve the project and run every test case against it.
+
+    Cases run in parallel across the pool's browsers. Projects that need a
+    build step, an empty case list or a missing browser produce a
+    'skipped' report rather than an error.
+    """
+    started = time.perf_counter()
+
+    def skipped(reason: str) -> RunReport:
+        return RunReport(status="skipped", skipped_reason=reason,
+                             duration_ms=int((time.perf_counter() - started) * 1000))
+
+    if not cases:
+        return skipped("no test cases")
+    reason = needs_build(files)
+    if reason:
+        return skipped(reason)
+
+    try:
+        pool = pool or get_browser_pool()
+    except Exception as e:
+        return skipped(f"browser unavailable: {e}")
+
+    with StaticServer(files) as server:
+        futures = [pool.submit(partial(run_case, base_url=server.url, case=case, timeout_ms=timeout_ms))
+                   for case in cases]
+        results = [future.result() for future in futures]
+
+    return RunReport(
+        status="failed" if any(not r.passed for r in results) else "passed",
+        results=results,
+        duration_ms=int((time.perf_counter() - started) * 1000)
+    )
@@ -3,9 +3,13 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+import os
+import time
 import asyncio
 import json
-from orchestrator import CodeGenesisOrchestrator
+import threading
+from contextlib import asynccontextmanager
+from orchestrator import CodeGenesisOrchestrator, get_deferred_result
 from dotenv import load_dotenv
 from api_config import api_config
 from model_router import ModelRouter, TaskType, NoAvailableModelError
@@ -13,7 +17,20 @@ from langchain_core.messages import HumanMessage, SystemMessage
 
 load_dotenv()
 
-app = FastAPI(title="CodeGenesis API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Launch the test browser pool in the background when CODEGENESIS_PREWARM_BROWSERS is set
+    if os.getenv("CODEGENESIS_PREWARM_BROWSERS", "").lower() in ("1", "true", "yes"):
+        from e2e_runner import get_browser_pool
+        threading.Thread(target=get_browser_pool, daemon=True).start()
+    yield
+    # Commit queued context writes (persistent stores) before exiting
+    from context_manager import context_manager
+    context_manager.close()
+
+
+app = FastAPI(title="CodeGenesis API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -29,6 +46,20 @@ class GenerateRequest(BaseModel):
     user_api_key: Optional[str] = None
     user_provider: Optional[str] = None  # "openai", "anthropic", "gemini", "a4f", "custom"
     user_base_url: Optional[str] = None  # For custom API endpoints
+    defer_quality: bool = False  # Return files first, finish refactor/tests in the background
+    skip_refactor: bool = False
+    skip_tests: bool = False
+    llm_review: bool = False  # Add an LLM code review on top of the local quality score
+    run_tests: bool = False  # Execute generated tests in headless browsers and fix failures
+
+class EditRequest(BaseModel):
+    files: Dict[str, str]
+    change_request: str
+    project_id: Optional[str] = None
+    tech_stack: Optional[str] = None  # Inferred from file extensions if omitted
+    user_api_key: Optional[str] = None
+    user_provider: Optional[str] = None
+    user_base_url: Optional[str] = None
 
 class ChatRequest(BaseModel):
     message: str
@@ -60,7 +91,14 @@ def generate_app(request: GenerateRequest):
     )
     
     try:
-        result = orchestrator.generate_app(request.prompt)
+        result = orchestrator.generate_app(
+            request.prompt,
+            defer_quality=request.defer_quality,
+            skip_refactor=request.skip_refactor,
+            skip_tests=request.skip_tests,
+            llm_review=request.llm_review,
+            run_tests=request.run_tests
+        )
         return result
     except ValueError as e:
         return {
@@ -69,6 +107,54 @@ def generate_app(request: GenerateRequest):
             "status": "error"
         }
 
+@app.get("/api/generate/{generation_id}/quality")
+def get_generation_quality(generation_id: str):
+    """
+    Fetch refactor analysis and tests for a generation made with defer_quality.
+    Status is 'pending' until all background stages have finished.
+    """
+    result = get_deferred_result(generation_id)
+    if result is None:
+        return {
+            "error": "GENERATION_NOT_FOUND",
+            "message": f"No deferred results for generation: {generation_id}",
+            "status": "error"
+        }
+    return result
+
+@app.post("/api/edit")
+def edit_app(request: EditRequest):
+    """
+    Apply a follow-up change to an existing project.
+    Only the affected files are patched and re-checked; the full pipeline is not re-run.
+    """
+    if not request.user_api_key or not request.user_provider:
+        return {
+            "error": "API_KEY_REQUIRED",
+            "message": "Please configure your API key in Settings to edit projects.",
+            "status": "error"
+        }
+    
+    orchestrator = CodeGenesisOrchestrator(
+        user_api_key=request.user_api_key,
+        user_provider=request.user_provider,
+        user_base_url=request.user_base_url
+    )
+    
+    try:
+        return orchestrator.edit_app(
+            request.files,
+            request.change_request,
+            project_id=request.project_id,
+            tech_stack=request.tech_stack
+        )
+    except ValueError as e:
+        return {
+            "error": "INVALID_API_CONFIG",
+            "message": str(e),
+            "status": "error"
+        }
+
 @app.post("/api/chat")
 def chat(request: ChatRequest):
     """
@@ -120,7 +206,8 @@ def health_check():
 class SmartChatRequest(BaseModel):
     """Request for smart chat with automatic model routing"""
     message: str
-    project_id: Optional[str] = None
+    project_id: Optional[str] = None  # Builds the prompt from the project's files and conversation
+    pinned_files: Optional[List[str]] = None  # Project files to include in full
     context: Optional[str] = None
     api_keys: Optional[Dict[str, str]] = None  # {"groq": "key", "google_ai": "key", ...}
     stream: bool = False
@@ -134,11 +221,46 @@ class SmartGenerateRequest(BaseModel):
     preferred_provider: Optional[str] = None  # groq, google_ai, openrouter_free, cloudflare
 
 
+SMART_CHAT_SYSTEM_PROMPT = """You are CodeGenesis AI, an expert software architect and developer.
+You help users build applications from natural language descriptions.
+Provide helpful, accurate, and practical advice.
+When generating code, use modern best practices and well-structured patterns."""
+
+
+def build_smart_chat_messages(request: SmartChatRequest):
+    """
+    Messages for a smart chat request, and the project prompt stats when
+    the request names a project (None otherwise).
+    """
+    if request.project_id:
+        from context_manager import context_manager
+        prompt = context_manager.build_chat_prompt(
+            request.project_id, request.message, SMART_CHAT_SYSTEM_PROMPT,
+            pinned_files=request.pinned_files, extra_context=request.context
+        )
+        return prompt.messages, prompt
+    
+    messages = [SystemMessage(content=SMART_CHAT_SYSTEM_PROMPT)]
+    if request.context:
+        messages.append(SystemMessage(content=f"Project context: {request.context}"))
+    messages.append(HumanMessage(content=request.message))
+    return messages, None
+
+
+def record_smart_chat_turn(request: SmartChatRequest, response: str):
+    """Add a completed exchange to the project's conversation"""
+    from context_manager import context_manager
+    context_manager.add_conversation(request.project_id, "user", request.message)
+    context_manager.add_conversation(request.project_id, "assistant", response)
+
+
 @app.post("/api/chat/stream")
 async def stream_chat(request: SmartChatRequest):
     """
     Stream AI responses with automatic model routing.
     Uses Server-Sent Events (SSE) for real-time streaming.
+    With project_id, the prompt is built from the project's context and the
+    final event reports prefix reuse and time to first token.
     """
     # Initialize router with user's API keys
     router = ModelRouter(request.api_keys)
@@ -154,24 +276,17 @@ async def stream_chat(request: SmartChatRequest):
     }
     task_type = task_type_map.get(request.task_type, TaskType.GENERAL)
     
-    system_prompt = """You are CodeGenesis AI, an expert software architect and developer.
-You help users build applications from natural language descriptions.
-Provide helpful, accurate, and practical advice.
-When generating code, use modern best practices and well-structured patterns."""
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-    ]
-    
-    # Add context if provided
-    if request.context:
-        messages.append(SystemMessage(content=f"Project context: {request.context}"))
-    
-    messages.append(HumanMessage(content=request.message))
+    messages, prompt = await asyncio.to_thread(build_smart_chat_messages, request)
     
     async def generate():
+        started = time.perf_counter()
+        first_token_ms = None
+        parts = []
         try:
             async for chunk in router.stream_request(messages, task_type):
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                parts.append(chunk["content"])
                 data = json.dumps({
                     "content": chunk["content"],
                     "model": chunk["model_used"],
@@ -179,7 +294,13 @@ When generating code, use modern best practices and well-structured patterns."""
                 })
                 yield f"data: {data}\n\n"
             
-            yield f"data: {json.dumps({'done': True})}\n\n"
+            done: Dict[str, Any] = {"done": True}
+            if prompt is not None:
+                await asyncio.to_thread(record_smart_chat_turn, request, "".join(parts))
+                done["prompt"] = prompt.to_dict()
+                done["first_token_ms"] = first_token_ms
+                done["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            yield f"data: {json.dumps(done)}\n\n"
             
         except NoAvailableModelError as e:
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
@@ -193,6 +314,8 @@ When generating code, use modern best practices and well-structured patterns."""
 async def smart_chat(request: SmartChatRequest):
     """
     Non-streaming smart chat with automatic model routing and fallback.
+    With project_id, the prompt is built from the project's context and the
+    response reports prefix reuse and latency.
     """
     # Initialize router with user's API keys
     router = ModelRouter(request.api_keys)
@@ -207,28 +330,22 @@ async def smart_chat(request: SmartChatRequest):
     }
     task_type = task_type_map.get(request.task_type, TaskType.GENERAL)
     
-    system_prompt = """You are CodeGenesis AI, an expert software architect and developer.
-You help users build applications from natural language descriptions.
-Provide helpful, accurate, and practical advice.
-When generating code, use modern best practices and well-structured patterns."""
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-    ]
-    
-    if request.context:
-        messages.append(SystemMessage(content=f"Project context: {request.context}"))
-    
-    messages.append(HumanMessage(content=request.message))
+    messages, prompt = await asyncio.to_thread(build_smart_chat_messages, request)
     
     try:
+        started = time.perf_counter()
         result = await router.route_request(messages, task_type)
-        return {
+        response = {
             "response": result["content"],
             "model_used": result["model_used"],
             "provider": result["provider"],
             "status": "success"
         }
+        if prompt is not None:
+            await asyncio.to_thread(record_smart_chat_turn, request, result["content"])
+            response["prompt"] = prompt.to_dict()
+            response["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return response
     except NoAvailableModelError as e:
         return {
             "error": "NO_AVAILABLE_MODEL",
@@ -361,6 +478,28 @@ def get_router_stats():
     return model_router.get_stats()
 
 
+@app.get("/api/generate/stats")
+def get_generation_stats():
+    """
+    Get how often generated files hit the output token limit and needed continuations.
+    """
+    from agents.engineer import EngineerAgent
+    return {"continuations": EngineerAgent.get_continuation_stats()}
+
+
+@app.get("/api/context/stats")
+def get_context_stats():
+    """
+    Get memory use of the context store, overall and per project.
+    """
+    from context_manager import context_manager
+    return {
+        **context_manager.store.stats(),
+        "summaries": context_manager.summary_stats(),
+        "prompts": context_manager.prompt_stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
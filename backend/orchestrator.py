@@ -1,11 +1,22 @@
-from typing import TypedDict, Optional, Literal
+import os
+import re
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, InvalidStateError
+from typing import TypedDict, Optional, Literal, List, Dict
 from langgraph.graph import StateGraph, END
 from agents.architect import ArchitectAgent
-from agents.engineer import EngineerAgent
-from agents.testsprite import TestSpriteAgent
+from agents.engineer import EngineerAgent, extract_code
+from agents.testsprite import TestSpriteAgent, render_playwright_script
 from agents.debugger import DebuggerAgent
 from agents.refactorer import RefactorerAgent, DocumenterAgent
 from vfs import VirtualFileSystem
+from patcher import is_patch, parse_patch, edits_for_file, apply_edits
+from code_symbols import format_interfaces, import_graph, find_dependents
+from context_manager import ContextManager, context_manager
+from scaffold_templates import has_template, render_template, project_slug, detect_dependencies
+from e2e_runner import run_test_cases
 
 
 class CodeGenState(TypedDict):
@@ -21,6 +32,94 @@ class CodeGenState(TypedDict):
     refactor_results: dict
     quality_score: float
     iteration: int
+    include_docs: bool
+    readme: str
+    # Post-processing options
+    generation_id: str
+    defer_quality: bool
+    skip_refactor: bool
+    skip_tests: bool
+    llm_review: bool
+    templated_files: list  # Files rendered from scaffold templates instead of the LLM
+    # Test execution
+    run_tests: bool
+    tests_pending: bool  # Tests still have to run (or re-run after a fix)
+    test_cases: list
+    test_report: dict
+    test_rounds: int
+    # Edit mode (follow-up changes to an existing project)
+    project_id: Optional[str]
+    change_request: str
+    target_files: list
+    changed_files: list
+    analysis_scope: Optional[list]  # Files the debugger checks (None = all)
+
+
+# Background executor for deferred quality stages (shared across orchestrators)
+_post_processing_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="codegenesis-post")
+
+# Executor for file generation started while the architect plan is still streaming
+_engineer_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="codegenesis-engineer")
+
+# Deferred results by generation id, oldest evicted first
+_deferred_results: "OrderedDict[str, dict]" = OrderedDict()
+_deferred_lock = threading.Lock()
+MAX_DEFERRED_RESULTS = 500
+
+# Small boilerplate files that can share one generation request
+BATCHABLE_EXTENSIONS = {".css", ".scss", ".json", ".html", ".md", ".txt", ".svg", ".yml", ".yaml", ".toml"}
+_BATCHABLE_NAMES = re.compile(r'^(?:[\w-]+\.config\.[cm]?[jt]s|\.\w+rc(?:\.json)?|\.gitignore|\.env(?:\.\w+)?)$')
+
+
+def get_deferred_result(generation_id: str) -> Optional[dict]:
+    """
+    Get the deferred quality results for a generation.
+    
+    Returns:
+        Dict with 'status' ('pending' or 'complete'), 'quality' and 'tests',
+        or None if the generation id is unknown
+    """
+    with _deferred_lock:
+        record = _deferred_results.get(generation_id)
+        if record is None:
+            return None
+        return {**record, "quality": dict(record["quality"])}
+
+
+def _register_deferred(generation_id: str, stages: List[str]):
+    """Create a pending record for a generation's background stages."""
+    with _deferred_lock:
+        _deferred_results[generation_id] = {
+            "generation_id": generation_id,
+            "status": "pending",
+            "pending_stages": list(stages),
+            "quality": {"score": None, "refactor_suggestions": {}},
+            "tests": None
+        }
+        while len(_deferred_results) > MAX_DEFERRED_RESULTS:
+            _deferred_results.popitem(last=False)
+
+
+def _complete_deferred_stage(generation_id: str, stage: str, update: dict):
+    """Attach a finished background stage's output to its generation record."""
+    with _deferred_lock:
+        record = _deferred_results.get(generation_id)
+        if record is None:
+            return  # Evicted while the stage was running
+        
+        if "quality_score" in update:
+            record["quality"]["score"] = update["quality_score"]
+        if "refactor_results" in update:
+            record["quality"]["refactor_suggestions"] = update["refactor_results"]
+        if "test_script" in update:
+            record["tests"] = update["test_script"]
+        if "error" in update:
+            record.setdefault("errors", {})[stage] = update["error"]
+        
+        if stage in record["pending_stages"]:
+            record["pending_stages"].remove(stage)
+        if not record["pending_stages"]:
+            record["status"] = "complete"
 
 
 class CodeGenesisOrchestrator:
@@ -32,9 +131,13 @@ class CodeGenesisOrchestrator:
     - Automatic error detection and fixing
     - Code quality analysis and refactoring
     - Self-healing with iteration limits
+    - Refactor analysis, test and README generation run as parallel branches
     """
     
     MAX_DEBUG_ITERATIONS = 3
+    MAX_EDIT_FILES = 3  # Files an edit request may touch directly
+    MAX_BATCH_FILES = 4  # Small files generated per batched request
+    MAX_TEST_FIX_ROUNDS = 2  # Fix attempts driven by failing tests
     
     def __init__(self, user_api_key: Optional[str] = None, user_provider: Optional[str] = None, user_base_url: Optional[str] = None):
         """
@@ -58,8 +161,12 @@ class CodeGenesisOrchestrator:
         self.documenter = DocumenterAgent(user_api_key, user_provider, user_base_url)
         self.vfs = VirtualFileSystem()
         
+        # Files dispatched during planning: filename -> (description, tech_stack, future)
+        self._early_files: Dict[str, tuple] = {}
+        
         # Build the enhanced graph
         self.workflow = self._build_graph()
+        self.edit_workflow = self._build_edit_graph()
     
     def _build_graph(self):
         """Build the enhanced LangGraph workflow with debugging and refactoring."""
@@ -71,24 +178,103 @@ class CodeGenesisOrchestrator:
         workflow.add_node("debugger", self._debugger_node)
         workflow.add_node("refactorer", self._refactorer_node)
         workflow.add_node("testsprite", self._testsprite_node)
+        workflow.add_node("documenter", self._documenter_node)
+        workflow.add_node("runner", self._runner_node)
+        workflow.add_node("finalize", self._finalize_node)
         
         # Define edges with conditional routing
         workflow.set_entry_point("architect")
         workflow.add_edge("architect", "engineer")
         workflow.add_edge("engineer", "debugger")
+        workflow.add_conditional_edges(
+            "debugger",
+            self._route_after_debugging,
+            ["engineer", "refactorer", "testsprite", "documenter", "runner", "finalize"]
+        )
+        
+        # Post-debug stages are independent: fan out, then join before END.
+        # With run_tests, tests are generated and executed first, and failures
+        # go back to the engineer before the remaining stages fan out.
+        workflow.add_edge("refactorer", "finalize")
+        workflow.add_conditional_edges("testsprite", self._route_after_tests, ["runner", "finalize"])
+        workflow.add_conditional_edges(
+            "runner",
+            self._route_after_test_run,
+            ["engineer", "refactorer", "documenter", "finalize"]
+        )
+        workflow.add_edge("documenter", "finalize")
+        workflow.add_edge("finalize", END)
+        
+        return workflow.compile()
+    
+    def _build_edit_graph(self):
+        """
+        Build the edit-mode workflow for follow-up changes.
+        
+        Picks the affected files, patches only those, then runs the debug loop
+        over the changed files and the files that import them.
+        """
+        workflow = StateGraph(CodeGenState)
+        
+        workflow.add_node("select", self._select_node)
+        workflow.add_node("edit", self._edit_node)
+        workflow.add_node("engineer", self._engineer_node)
+        workflow.add_node("debugger", self._debugger_node)
+        
+        workflow.set_entry_point("select")
+        workflow.add_conditional_edges(
+            "select",
+            self._route_selection,
+            {"edit": "edit", "none": END}
+        )
+        workflow.add_edge("edit", "debugger")
         workflow.add_conditional_edges(
             "debugger",
             self._should_continue_debugging,
-            {
-                "continue": "engineer",  # Go back to fix issues
-                "proceed": "refactorer"  # No more issues, proceed
-            }
+            {"continue": "engineer", "proceed": END}
         )
-        workflow.add_edge("refactorer", "testsprite")
-        workflow.add_edge("testsprite", END)
+        workflow.add_edge("engineer", "debugger")
         
         return workflow.compile()
     
+    def _route_after_debugging(self, state: CodeGenState) -> List[str]:
+        """Go back to the engineer, or fan out to the post-debug stages in parallel."""
+        if self._should_continue_debugging(state) == "continue":
+            return ["engineer"]
+        
+        if state.get("tests_pending"):
+            return ["runner"] if state.get("test_cases") else ["testsprite"]
+        
+        return self._remaining_stages(state)
+    
+    def _remaining_stages(self, state: CodeGenState) -> List[str]:
+        """Post-debug stages to fan out to (tests are excluded once they have been run)."""
+        branches = self._quality_stages(state) if not state.get("defer_quality") else []
+        if state.get("run_tests"):
+            branches = [b for b in branches if b != "testsprite"]
+        if state.get("include_docs"):
+            branches.append("documenter")
+        return branches or ["finalize"]
+    
+    def _route_after_tests(self, state: CodeGenState) -> str:
+        """Execute freshly generated tests when run_tests is set."""
+        return "runner" if state.get("tests_pending") else "finalize"
+    
+    def _route_after_test_run(self, state: CodeGenState) -> List[str]:
+        """Fix failing tests via the engineer, or continue with the remaining stages."""
+        if state.get("tests_pending"):
+            return ["engineer"]
+        return self._remaining_stages(state)
+    
+    def _quality_stages(self, state: CodeGenState) -> List[str]:
+        """Quality stages requested for this generation."""
+        stages = []
+        if not state.get("skip_refactor"):
+            stages.append("refactorer")
+        if not state.get("skip_tests"):
+            stages.append("testsprite")
+        return stages
+    
     def _should_continue_debugging(self, state: CodeGenState) -> Literal["continue", "proceed"]:
         """Decide whether to continue debugging or proceed to refactoring."""
         errors = state.get("errors", [])
@@ -107,8 +293,35 @@ class CodeGenesisOrchestrator:
         return "proceed"
     
     def _architect_node(self, state: CodeGenState) -> CodeGenState:
-        """Architect planning node."""
-        plan = self.architect.plan(state["user_prompt"])
+        """
+        Architect planning node.
+        
+        The plan is streamed; each file entry is handed to the engineer as soon
+        as it is complete, so code generation overlaps with planning.
+        """
+        user_prompt = state["user_prompt"]
+        early_files = {}
+        pending_batch = {}
+        
+        def dispatch(filename: str, description: str, tech_stack: Optional[str], depends_on: List[str]):
+            # Files that import nothing can be written before the plan is complete
+            if not tech_stack or depends_on or has_template(tech_stack, filename):
+                return
+            if self._is_batchable(filename):
+                # Small files wait for a full batch; leftovers are batched by the engineer node
+                pending_batch[filename] = description
+                if len(pending_batch) >= self.MAX_BATCH_FILES:
+                    for name, future in self._submit_files(pending_batch, user_prompt, tech_stack).items():
+                        early_files[name] = (pending_batch[name], tech_stack, future)
+                    pending_batch.clear()
+            else:
+                future = _engineer_executor.submit(
+                    self.engineer.write_file, filename, description, user_prompt, tech_stack
+                )
+                early_files[filename] = (description, tech_stack, future)
+        
+        plan = self.architect.plan(user_prompt, on_file=dispatch)
+        self._early_files = early_files
         state["file_plan"] = plan
         state["status"] = "Planning complete"
         state["iteration"] = 0
@@ -123,39 +336,285 @@ class CodeGenesisOrchestrator:
         
         # If we have debug results, apply fixes
         if debug_results:
+            tech_stack = plan.get("tech_stack", "HTML/CSS/JS")
             for result in debug_results:
                 if hasattr(result, 'diff') and result.diff:
-                    # Apply the suggested fix
                     for affected_file in result.affected_files:
                         if affected_file in files:
-                            # Simple replacement - production would use proper diff application
-                            if result.diff:
-                                files[affected_file] = result.diff
+                            files[affected_file] = self._apply_fix(
+                                affected_file, files[affected_file], result, tech_stack
+                            )
+                            self.vfs.write_file(affected_file, files[affected_file])
         else:
-            # Fresh generation
-            for filename, description in plan.get("files", {}).items():
-                code = self.engineer.write_file(
-                    filename, 
-                    description, 
-                    state["user_prompt"],
-                    plan.get("tech_stack", "HTML/CSS/JS")
+            # Fresh generation, level by level through the dependency DAG
+            tech_stack = plan.get("tech_stack", "HTML/CSS/JS")
+            planned = plan.get("files", {})
+            dependencies = plan.get("dependencies", {})
+            early_files, self._early_files = self._early_files, {}
+            
+            # Boilerplate with a scaffold template needs no LLM call
+            project_name = project_slug(state["user_prompt"])
+            templated = {}
+            for filename in planned:
+                content = render_template(tech_stack, filename, project_name, planned)
+                if content is not None:
+                    templated[filename] = content
+                    files[filename] = content
+                    self.vfs.write_file(filename, content)
+            planned = {name: description for name, description in planned.items() if name not in templated}
+            
+            for level in self._dependency_levels(planned, dependencies):
+                futures = {}
+                batch = {}
+                for filename in level:
+                    description = planned[filename]
+                    depends_on = dependencies.get(filename, [])
+                    early = early_files.pop(filename, None)
+                    if early and early[0] == description and early[1] == tech_stack and not depends_on:
+                        # Already started while the plan was streaming
+                        futures[filename] = early[2]
+                    elif not depends_on and self._is_batchable(filename):
+                        batch[filename] = description
+                    else:
+                        futures[filename] = _engineer_executor.submit(
+                            self.engineer.write_file,
+                            filename,
+                            description,
+                            state["user_prompt"],
+                            tech_stack,
+                            format_interfaces(files, depends_on) or None
+                        )
+                futures.update(self._submit_files(batch, state["user_prompt"], tech_stack))
+                
+                for filename in level:
+                    future = futures[filename]
+                    files[filename] = future.result()
+                    self.vfs.write_file(filename, files[filename])
+            
+            # Entries the final plan dropped or changed
+            for _, _, future in early_files.values():
+                future.cancel()
+            
+            manifest = next((name for name in templated if name.lstrip("./") == "package.json"), None)
+            if manifest:
+                # Re-render with the packages the generated code actually imports
+                files[manifest] = render_template(
+                    tech_stack, manifest, project_name, plan.get("files", {}), detect_dependencies(files)
                 )
-                files[filename] = code
-                self.vfs.write_file(filename, code)
+                self.vfs.write_file(manifest, files[manifest])
+            state["templated_files"] = list(templated)
         
         state["generated_files"] = files
         state["status"] = "Code generation complete"
         state["debug_results"] = []  # Clear for next iteration
         return state
     
+    @staticmethod
+    def _is_batchable(filename: str) -> bool:
+        """Whether a file is small boilerplate that can share a batched request."""
+        basename = os.path.basename(filename)
+        return os.path.splitext(basename)[1].lower() in BATCHABLE_EXTENSIONS or bool(_BATCHABLE_NAMES.match(basename))
+    
+    def _submit_files(self, batch: Dict[str, str], user_prompt: str, tech_stack: str) -> Dict[str, Future]:
+        """
+        Generate small files in batches of up to MAX_BATCH_FILES per request.
+        
+        Returns one future per file, so batched files are consumed exactly like
+        files generated on their own.
+        """
+        names = list(batch)
+        futures: Dict[str, Future] = {}
+        for start in range(0, len(names), self.MAX_BATCH_FILES):
+            chunk = {name: batch[name] for name in names[start:start + self.MAX_BATCH_FILES]}
+            if len(chunk) == 1:
+                name, description = next(iter(chunk.items()))
+                futures[name] = _engineer_executor.submit(
+                    self.engineer.write_file, name, description, user_prompt, tech_stack
+                )
+                continue
+            
+            job = _engineer_executor.submit(self.engineer.write_files_batch, chunk, user_prompt, tech_stack)
+            members = {name: Future() for name in chunk}
+            
+            def resolve(done: Future, members: Dict[str, Future] = members):
+                try:
+                    results, error = done.result(), None
+                except BaseException as e:
+                    results, error = {}, e
+                for name, future in members.items():
+                    try:
+                        if error is None:
+                            future.set_result(results[name])
+                        else:
+                            future.set_exception(error)
+                    except InvalidStateError:
+                        pass  # Cancelled because the final plan changed
+            
+            job.add_done_callback(resolve)
+            futures.update(members)
+        return futures
+    
+    @staticmethod
+    def _dependency_levels(planned: Dict[str, str], dependencies: Dict[str, List[str]]) -> List[List[str]]:
+        """
+        Group planned files into levels so every file comes after the files it imports.
+        
+        Files within a level are independent and can be generated in parallel.
+        Files caught in a dependency cycle are placed together in a final level.
+        """
+        remaining = {
+            name: {d for d in dependencies.get(name, []) if d in planned and d != name}
+            for name in planned
+        }
+        levels = []
+        while remaining:
+            level = [name for name, deps in remaining.items() if not deps]
+            if not level:
+                levels.append(list(remaining))  # Cycle: generate the rest together
+                break
+            levels.append(level)
+            for name in level:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(level)
+        return levels
+    
+    def _apply_fix(self, filename: str, content: str, result, tech_stack: str) -> str:
+        """
+        Apply a debugger fix to a single file.
+        
+        The fix is applied as a patch (search/replace blocks or unified diff) and
+        kept only if it introduces no new static analysis errors. Otherwise the
+        file is regenerated in full with the suggested fix.
+        """
+        edits = edits_for_file(parse_patch(result.diff), filename)
+        patched = apply_edits(content, edits)
+        
+        if patched is not None:
+            errors_before = set(self._static_analysis(filename, content))
+            errors_after = set(self._static_analysis(filename, patched))
+            if errors_after <= errors_before:
+                return patched
+        
+        issue = f"{result.root_cause}\n{result.suggested_fix}"
+        return self.engineer.fix_file(filename, content, issue, tech_stack)
+    
+    def _select_node(self, state: CodeGenState) -> CodeGenState:
+        """Edit-mode node: pick the files a change request affects."""
+        files = state["generated_files"]
+        project_id = state.get("project_id")
+        
+        if project_id:
+            manager = context_manager
+        else:
+            manager, project_id = ContextManager(), "edit"
+        manager.update_project_files(project_id, files)
+        
+        request = state["change_request"]
+        targets = []
+        
+        # Files or components named explicitly in the request come first
+        for reference in manager.extract_code_references(request):
+            for filename in files:
+                basename = os.path.basename(filename)
+                if reference in (filename, basename, os.path.splitext(basename)[0]):
+                    targets.append(filename)
+        
+        # Otherwise ranked search; a file that only matched because it imports an
+        # already selected file is left to the dependent analysis instead
+        if not targets:
+            graph = import_graph(files)
+            for filename in manager.get_relevant_files(project_id, request):
+                if not graph.get(filename, set()) & set(targets):
+                    targets.append(filename)
+        targets = list(dict.fromkeys(targets))[:self.MAX_EDIT_FILES]
+        
+        # Nothing named or found: let the engineer pick from the file list
+        if not targets:
+            targets = self.engineer.select_files(request, list(files), self.MAX_EDIT_FILES)
+        
+        state["target_files"] = targets
+        if targets:
+            state["status"] = f"Selected {len(targets)} file(s) to edit"
+        else:
+            state["status"] = "No files match the change request"
+        return state
+    
+    def _route_selection(self, state: CodeGenState) -> str:
+        """Skip the edit when no file was selected."""
+        return "edit" if state["target_files"] else "none"
+    
+    def _edit_node(self, state: CodeGenState) -> CodeGenState:
+        """Edit-mode node: patch the selected files in parallel."""
+        files = dict(state["generated_files"])
+        request = state["change_request"]
+        tech_stack = state["file_plan"].get("tech_stack", "HTML/CSS/JS")
+        graph = import_graph(files)
+        
+        futures = {
+            filename: _engineer_executor.submit(
+                self.engineer.edit_file,
+                filename,
+                files[filename],
+                request,
+                tech_stack,
+                format_interfaces(files, sorted(graph.get(filename, ()))) or None
+            )
+            for filename in state["target_files"]
+        }
+        
+        changed = []
+        for filename, future in futures.items():
+            updated = self._apply_edit(filename, files[filename], future.result(), request, tech_stack)
+            if updated != files[filename]:
+                files[filename] = updated
+                self.vfs.write_file(filename, updated)
+                changed.append(filename)
+        
+        scope = set(changed) | find_dependents(files, changed)
+        
+        state["generated_files"] = files
+        state["changed_files"] = changed
+        state["analysis_scope"] = [f for f in files if f in scope]
+        state["status"] = f"Edited {len(changed)} file(s)"
+        return state
+    
+    def _apply_edit(self, filename: str, content: str, response: str, change_request: str, tech_stack: str) -> str:
+        """
+        Apply an engineer edit response to a file.
+        
+        Search/replace blocks are applied with the patcher; a response without
+        blocks is taken as the full new content if it is code. If the blocks do
+        not apply, or the response is only prose, the file is regenerated in
+        full with the change, and kept as it was if that is not code either.
+        """
+        if not response.strip():
+            return content
+        if is_patch(response):
+            patched = apply_edits(content, edits_for_file(parse_patch(response), filename))
+            if patched is not None:
+                return patched
+        else:
+            code = extract_code(response, filename)
+            if code is not None:
+                return code
+        
+        rewritten = self.engineer.fix_file(filename, content, change_request, tech_stack)
+        code = extract_code(rewritten, filename)
+        return code if code is not None else content
+    
     def _debugger_node(self, state: CodeGenState) -> CodeGenState:
         """Debugger analysis node - checks for potential issues."""
         files = state.get("generated_files", {})
         errors = []
         debug_results = []
         
+        # In edit mode only the changed files and their importers are analyzed
+        scope = state.get("analysis_scope")
+        analyzed = files if scope is None else {f: files[f] for f in scope if f in files}
+        
         # Basic static analysis for common issues
-        for filename, content in files.items():
+        for filename, content in analyzed.items():
             file_errors = self._static_analysis(filename, content)
             errors.extend(file_errors)
         
@@ -198,16 +657,30 @@ class CodeGenesisOrchestrator:
         
         return errors
     
-    def _refactorer_node(self, state: CodeGenState) -> CodeGenState:
-        """Refactorer optimization node."""
+    def _refactorer_node(self, state: CodeGenState) -> dict:
+        """
+        Refactorer optimization node.
+        
+        Runs in parallel with the other post-debug stages, so it only returns
+        the keys it owns. The quality score comes from local metrics; the LLM
+        review is only added when llm_review is requested.
+        """
         files = state.get("generated_files", {})
+        report = self.refactorer.score_locally(files)
         
-        try:
-            # Analyze code quality
-            result = self.refactorer.analyze(files, ['readability', 'best_practice'])
-            
-            state["refactor_results"] = {
-                "suggestions": [
+        refactor_results = {
+            "suggestions": [],
+            "quality_score": report.score,
+            "summary": f"Local analysis of {len(files)} files in {report.duration_ms}ms",
+            "metrics": report.to_dict()
+        }
+        
+        if state.get("llm_review"):
+            try:
+                # Optional LLM code review on top of the local score
+                result = self.refactorer.analyze(files, ['readability', 'best_practice'])
+                
+                refactor_results["suggestions"] = [
                     {
                         "category": s.category,
                         "file": s.file,
@@ -215,32 +688,113 @@ class CodeGenesisOrchestrator:
                         "priority": s.priority
                     }
                     for s in result.suggestions
-                ],
-                "quality_score": result.overall_quality_score,
-                "summary": result.summary
-            }
-            state["quality_score"] = result.overall_quality_score
-            
-        except Exception as e:
-            state["refactor_results"] = {"error": str(e)}
-            state["quality_score"] = 5.0
+                ]
+                refactor_results["llm_quality_score"] = result.overall_quality_score
+                refactor_results["summary"] = result.summary
+                refactor_results["shards"] = result.shard_stats
+                
+            except Exception as e:
+                refactor_results["llm_error"] = str(e)
         
-        state["status"] = "Refactoring analysis complete"
-        return state
+        return {"refactor_results": refactor_results, "quality_score": report.score}
     
-    def _testsprite_node(self, state: CodeGenState) -> CodeGenState:
-        """TestSprite QA node."""
+    def _testsprite_node(self, state: CodeGenState) -> dict:
+        """TestSprite QA node (parallel branch, or before the runner with run_tests)."""
+        if state.get("tests_pending"):
+            cases = self.testsprite.generate_test_cases(state["generated_files"], state["user_prompt"])
+            test_code = render_playwright_script(cases)
+            self.vfs.write_file("tests/app.spec.js", test_code)
+            return {"test_script": test_code, "test_cases": cases}
+        
         test_code = self.testsprite.generate_tests(
             state["generated_files"],
             state["user_prompt"]
         )
-        state["test_script"] = test_code
         self.vfs.write_file("tests/app.test.js", test_code)
-        state["status"] = "Tests generated"
-        return state
+        return {"test_script": test_code}
+    
+    def _runner_node(self, state: CodeGenState) -> dict:
+        """
+        Execute the generated test cases in headless browsers.
+        
+        Failures are diagnosed by the debugger and sent back to the engineer,
+        up to MAX_TEST_FIX_ROUNDS times.
+        """
+        files = state["generated_files"]
+        report = run_test_cases(files, state.get("test_cases", []))
+        rounds = state.get("test_rounds", 0) + 1
+        update = {"test_report": report.to_dict(), "test_rounds": rounds, "tests_pending": False}
+        
+        failures = [result.describe() for result in report.failures]
+        if failures and rounds <= self.MAX_TEST_FIX_ROUNDS:
+            update["tests_pending"] = True
+            update["errors"] = failures
+            debug_results = [self.debugger.diagnose(error, files) for error in failures[:3]]
+            for result in debug_results:
+                # Test failures rarely name a file; target the files the patch applies to
+                if not result.affected_files and result.diff:
+                    result.affected_files = self._patch_targets(result.diff, files)
+            update["debug_results"] = debug_results
+            update["status"] = f"{len(failures)} test(s) failed, fixing"
+        return update
+    
+    @staticmethod
+    def _patch_targets(diff: str, files: Dict[str, str]) -> List[str]:
+        """Files a patch names, or for unscoped blocks, the files it applies to cleanly."""
+        edits = parse_patch(diff)
+        named = [f for f in files if any(e.file for e in edits_for_file(edits, f))]
+        if named:
+            return named
+        return [f for f, content in files.items() if edits and apply_edits(content, edits) is not None]
     
-    def generate_app(self, user_prompt: str) -> dict:
-        """Main entry point to generate an app."""
+    def _documenter_node(self, state: CodeGenState) -> dict:
+        """README generation node (parallel branch, only when docs are requested)."""
+        readme = self.documenter.generate_readme(
+            state["generated_files"],
+            state["user_prompt"]
+        )
+        self.vfs.write_file("README.md", readme)
+        return {"readme": readme}
+    
+    def _finalize_node(self, state: CodeGenState) -> dict:
+        """Join point for the parallel post-debug stages."""
+        return {"status": "Generation complete"}
+    
+    def _run_deferred_stage(self, generation_id: str, stage: str, state: CodeGenState):
+        """Run a quality stage on the background executor and record its output."""
+        node = self._refactorer_node if stage == "refactorer" else self._testsprite_node
+        try:
+            update = node(state)
+        except Exception as e:
+            update = {"error": str(e)}
+        _complete_deferred_stage(generation_id, stage, update)
+    
+    def generate_app(
+        self,
+        user_prompt: str,
+        include_docs: bool = False,
+        defer_quality: bool = False,
+        skip_refactor: bool = False,
+        skip_tests: bool = False,
+        llm_review: bool = False,
+        run_tests: bool = False
+    ) -> dict:
+        """
+        Main entry point to generate an app.
+        
+        Args:
+            user_prompt: Description of the app to build
+            include_docs: Also generate a README.md alongside the other post-debug stages
+            defer_quality: Return as soon as the debug loop converges and finish the
+                           refactor analysis and tests in the background
+                           (fetch them later with get_deferred_result)
+            skip_refactor: Skip the refactor analysis entirely
+            skip_tests: Skip test generation entirely
+            llm_review: Add an LLM code review to the local quality metrics
+            run_tests: Generate executable test cases, run them in headless browsers
+                       and feed failures back to the engineer (ignores skip_tests)
+        """
+        generation_id = str(uuid.uuid4())
         initial_state: CodeGenState = {
             "user_prompt": user_prompt,
             "file_plan": {},
@@ -251,34 +805,152 @@ class CodeGenesisOrchestrator:
             "debug_results": [],
             "refactor_results": {},
             "quality_score": 0.0,
-            "iteration": 0
+            "iteration": 0,
+            "include_docs": include_docs,
+            "readme": "",
+            "generation_id": generation_id,
+            "defer_quality": defer_quality,
+            "skip_refactor": skip_refactor,
+            "skip_tests": skip_tests,
+            "llm_review": llm_review,
+            "templated_files": [],
+            "run_tests": run_tests,
+            "tests_pending": run_tests,
+            "test_cases": [],
+            "test_report": {},
+            "test_rounds": 0,
+            "project_id": None,
+            "change_request": "",
+            "target_files": [],
+            "changed_files": [],
+            "analysis_scope": None
         }
         
         # Run the workflow
         final_state = self.workflow.invoke(initial_state)
         
+        files = dict(final_state["generated_files"])
+        if final_state.get("readme"):
+            files["README.md"] = final_state["readme"]
+        
+        deferred_stages = self._quality_stages(final_state) if defer_quality else []
+        if run_tests:
+            deferred_stages = [s for s in deferred_stages if s != "testsprite"]
+        if deferred_stages:
+            _register_deferred(generation_id, deferred_stages)
+            for stage in deferred_stages:
+                _post_processing_executor.submit(
+                    self._run_deferred_stage, generation_id, stage, dict(final_state)
+                )
+        
         return {
-            "files": final_state["generated_files"],
+            "generation_id": generation_id,
+            "deferred": bool(deferred_stages),
+            "files": files,
             "tests": final_state["test_script"],
             "plan": final_state["file_plan"],
             "status": final_state["status"],
             "quality": {
-                "score": final_state.get("quality_score", 0),
+                "score": None if "refactorer" in deferred_stages else final_state.get("quality_score", 0),
                 "refactor_suggestions": final_state.get("refactor_results", {})
             },
-            "debug_iterations": final_state.get("iteration", 0)
+            "debug_iterations": final_state.get("iteration", 0),
+            "test_report": final_state.get("test_report") or None,
+            "templated_files": final_state.get("templated_files", []),
+            "llm_calls_skipped": len(final_state.get("templated_files", []))
         }
     
     def generate_with_documentation(self, user_prompt: str) -> dict:
         """Generate app with automatic documentation."""
-        result = self.generate_app(user_prompt)
+        return self.generate_app(user_prompt, include_docs=True)
+    
+    def edit_app(
+        self,
+        files: Dict[str, str],
+        change_request: str,
+        project_id: Optional[str] = None,
+        tech_stack: Optional[str] = None
+    ) -> dict:
+        """
+        Apply a follow-up change to an existing project.
         
-        # Generate README
-        readme = self.documenter.generate_readme(
-            result["files"],
-            user_prompt
-        )
-        result["files"]["README.md"] = readme
+        Only the files relevant to the request are patched, and the debug loop
+        only analyzes changed files and the files that import them. Planning,
+        refactor analysis and test generation are not re-run.
         
-        return result
-
+        Args:
+            files: Current project files
+            change_request: The requested change (e.g. "make the header blue")
+            project_id: Project whose stored context should be used and updated
+            tech_stack: Tech stack of the project (inferred from extensions if omitted)
+        """
+        initial_state: CodeGenState = {
+            "user_prompt": change_request,
+            "file_plan": {"tech_stack": tech_stack or self._infer_tech_stack(files)},
+            "generated_files": dict(files),
+            "test_script": "",
+            "status": "Starting edit",
+            "errors": [],
+            "debug_results": [],
+            "refactor_results": {},
+            "quality_score": 0.0,
+            "iteration": 0,
+            "include_docs": False,
+            "readme": "",
+            "generation_id": str(uuid.uuid4()),
+            "defer_quality": False,
+            "skip_refactor": True,
+            "skip_tests": True,
+            "llm_review": False,
+            "templated_files": [],
+            "run_tests": False,
+            "tests_pending": False,
+            "test_cases": [],
+            "test_report": {},
+            "test_rounds": 0,
+            "project_id": project_id,
+            "change_request": change_request,
+            "target_files": [],
+            "changed_files": [],
+            "analysis_scope": None
+        }
+        
+        final_state = self.edit_workflow.invoke(initial_state)
+        
+        if not final_state["target_files"]:
+            return {
+                "error": "NO_MATCHING_FILES",
+                "message": "No project file matches the change request. Name the file or component to change.",
+                "generation_id": final_state["generation_id"],
+                "files": files,
+                "target_files": [],
+                "changed_files": [],
+                "status": "error"
+            }
+        
+        edited = final_state["generated_files"]
+        if project_id:
+            context_manager.update_project_files(project_id, edited)
+        
+        return {
+            "generation_id": final_state["generation_id"],
+            "files": edited,
+            "target_files": final_state["target_files"],
+            "changed_files": [f for f in edited if edited[f] != files.get(f)],
+            "analysis_scope": final_state["analysis_scope"],
+            "status": "Edit complete",
+            "errors": final_state.get("errors", []),
+            "debug_iterations": final_state.get("iteration", 0)
+        }
+    
+    @staticmethod
+    def _infer_tech_stack(files: Dict[str, str]) -> str:
+        """Best guess at a project's tech stack from its file extensions."""
+        extensions = {os.path.splitext(f)[1].lower() for f in files}
+        if extensions & {".tsx", ".ts"}:
+            return "React/TypeScript"
+        if ".jsx" in extensions:
+            return "React"
+        if ".py" in extensions:
+            return "Python"
+        return "HTML/CSS/JS"
@@ -0,0 +1,215 @@
+"""
+Partial JSON Parsing for CodeGenesis
+Tolerant parsing of LLM JSON output and incremental parsing of streamed plans
+"""
+import json
+from typing import Optional, Dict, List, Tuple, Any
+
+
+def _repair(text: str) -> str:
+    """
+    Make almost-JSON parseable.
+
+    Drops trailing commas, closes an unterminated string and closes any
+    brackets left open by a truncated response.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = escape = False
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]':
+            # Remove a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            if stack:
+                stack.pop()
+        out.append(char)
+
+    if in_string:
+        out.append('"')
+    while out and (out[-1].isspace() or out[-1] in ',:'):
+        out.pop()
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+def _outer_object(text: str) -> Optional[str]:
+    """Slice from the first '{' to its matching '}' (or to the end if unclosed)"""
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = escape = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def parse_lenient_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a JSON object from an LLM response.
+
+    Accepts markdown fences, prose before/after the object, trailing
+    commas and truncated output. Returns None if no object can be recovered.
+    """
+    if not text:
+        return None
+
+    candidate = _outer_object(text)
+    if candidate is None:
+        return None
+
+    for attempt in (candidate, _repair(candidate)):
+        try:
+            value = json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+class PlanStreamParser:
+    """
+    Incremental parser for a streamed architect plan.
+
+    Feed response chunks as they arrive; each call returns the entries of
+    the "files" object that became complete, so work on them can start
+    before the rest of the plan has been generated. Top-level string
+    fields (e.g. "tech_stack") are exposed in `fields` as soon as they
+    are complete.
+    """
+
+    def __init__(self, section: str = "files"):
+        self.section = section
+        self.buffer = ""
+        self.fields: Dict[str, str] = {}
+        self.files: Dict[str, Any] = {}
+        self._pos = 0
+        self._started = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._section_depth: Optional[int] = None
+        self._entry_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return newly completed (filename, value) entries"""
+        self.buffer += chunk
+        completed: List[Tuple[str, Any]] = []
+        buffer = self.buffer
+
+        while self._pos < len(buffer):
+            i = self._pos
+            char = buffer[i]
+            self._pos += 1
+
+            if not self._started:
+                if char == '{':
+                    self._started = True
+                    self._stack.append('{')
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(buffer[self._string_start:i + 1])
+                continue
+
+            depth = len(self._stack)
+            in_section = self._section_depth is not None and depth == self._section_depth
+
+            if in_section and self._entry_start is None and not char.isspace() and char not in ',}':
+                self._entry_start = i
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ':':
+                self._pending_key = self._last_string
+                self._last_string = None
+            elif char in '{[':
+                if char == '{' and depth == 1 and self._pending_key == self.section:
+                    self._section_depth = depth + 1
+                self._stack.append(char)
+            elif char in '}]':
+                if in_section and char == '}':
+                    self._complete_entry(buffer, i, completed)
+                    self._section_depth = None
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._started = False
+            elif char == ',':
+                if in_section:
+                    self._complete_entry(buffer, i, completed)
+                elif depth == 1:
+                    self._pending_key = None
+
+        return completed
+
+    def _close_string(self, literal: str):
+        try:
+            value = json.loads(literal)
+        except json.JSONDecodeError:
+            value = literal[1:-1]
+
+        if len(self._stack) == 1 and self._pending_key is not None and self._last_string is None:
+            # Top-level "key": "value" pair finished
+            self.fields[self._pending_key] = value
+            self._pending_key = None
+        else:
+            self._last_string = value
+
+    def _complete_entry(self, buffer: str, end: int, completed: List[Tuple[str, Any]]):
+        start, self._entry_start = self._entry_start, None
+        if start is None:
+            # Empty element, e.g. between the commas of ",," or after a trailing ","
+            return
+        entry = parse_lenient_json("{" + buffer[start:end] + "}")
+        if not entry:
+            return
+        for name, value in entry.items():
+            if name not in self.files:
+                self.files[name] = value
+                completed.append((name, value))
@@ -0,0 +1,227 @@
+"""
+Patch Application for CodeGenesis
+Applies search/replace blocks and unified diffs with fuzzy context matching
+"""
+import os
+import re
+import difflib
+from typing import Optional, List, Tuple
+from dataclasses import dataclass
+
+
+@dataclass
+class PatchEdit:
+    """A single search/replace edit, optionally scoped to a file"""
+    search: str
+    replace: str
+    file: Optional[str] = None
+
+
+SEARCH_MARKER = "<<<<<<< SEARCH"
+DIVIDER_MARKER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+
+# Minimum similarity for a fuzzy match of a search block
+FUZZY_THRESHOLD = 0.85
+
+_HUNK_HEADER = re.compile(r'^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@')
+_FILE_HEADER = re.compile(r'^\+\+\+ (?:b/)?(\S+)')
+_FILE_LINE = re.compile(r'^(?:FILE:\s*)?([\w./@-]+\.\w+)\s*$')
+
+
+def is_patch(text: Optional[str]) -> bool:
+    """Check whether text contains search/replace blocks or a unified diff"""
+    if not text:
+        return False
+    if SEARCH_MARKER in text and REPLACE_MARKER in text:
+        return True
+    return any(_HUNK_HEADER.match(line) for line in text.splitlines())
+
+
+def _parse_search_replace(text: str) -> List[PatchEdit]:
+    """Parse search/replace blocks, honouring a filename line before each block"""
+    edits = []
+    lines = text.splitlines()
+    current_file = None
+    i = 0
+
+    while i < len(lines):
+        line = lines[i]
+        if line.strip() == SEARCH_MARKER:
+            search, replace = [], []
+            i += 1
+            while i < len(lines) and lines[i].strip() != DIVIDER_MARKER:
+                search.append(lines[i])
+                i += 1
+            i += 1
+            while i < len(lines) and lines[i].strip() != REPLACE_MARKER:
+                replace.append(lines[i])
+                i += 1
+            edits.append(PatchEdit("\n".join(search), "\n".join(replace), current_file))
+        else:
+            match = _FILE_LINE.match(line.strip().strip('`*#: '))
+            if match:
+                current_file = match.group(1)
+        i += 1
+
+    return edits
+
+
+def _parse_unified_diff(text: str) -> List[PatchEdit]:
+    """Convert unified diff hunks into search/replace edits"""
+    edits = []
+    current_file = None
+    search: Optional[List[str]] = None
+    replace: List[str] = []
+
+    def flush():
+        if search is not None and (search or replace):
+            edits.append(PatchEdit("\n".join(search), "\n".join(replace), current_file))
+
+    for line in text.splitlines():
+        file_match = _FILE_HEADER.match(line)
+        if file_match:
+            flush()
+            search, replace = None, []
+            current_file = file_match.group(1)
+        elif line.startswith('--- '):
+            continue
+        elif _HUNK_HEADER.match(line):
+            flush()
+            search, replace = [], []
+        elif search is None:
+            continue
+        elif line.startswith('+'):
+            replace.append(line[1:])
+        elif line.startswith('-'):
+            search.append(line[1:])
+        elif line.startswith('\\'):
+            continue  # "\ No newline at end of file"
+        else:
+            context = line[1:] if line.startswith(' ') else line
+            search.append(context)
+            replace.append(context)
+
+    flush()
+    return edits
+
+
+def parse_patch(text: str) -> List[PatchEdit]:
+    """
+    Parse a patch into edits.
+
+    Supports search/replace blocks:
+        path/to/file.tsx
+        <<<<<<< SEARCH
+        old code
+        =======
+        new code
+        >>>>>>> REPLACE
+
+    and unified diffs (``--- a/file`` / ``+++ b/file`` / ``@@`` hunks).
+    """
+    if not text:
+        return []
+    if SEARCH_MARKER in text:
+        return _parse_search_replace(text)
+    return _parse_unified_diff(text)
+
+
+def edits_for_file(edits: List[PatchEdit], filename: str) -> List[PatchEdit]:
+    """Select the edits that target a file (unscoped edits apply to any file)"""
+    basename = os.path.basename(filename)
+    return [
+        e for e in edits
+        if e.file is None or e.file == filename or os.path.basename(e.file) == basename
+    ]
+
+
+def _locate(content: str, search: str) -> Optional[Tuple[int, int]]:
+    """
+    Find the character span of a search block in content.
+
+    Tries an exact match first, then a whitespace-insensitive line match,
+    then a fuzzy line-window match above FUZZY_THRESHOLD.
+    """
+    if not search.strip():
+        return None
+
+    index = content.find(search)
+    if index != -1:
+        return index, index + len(search)
+
+    lines = content.split('\n')
+    search_lines = search.strip('\n').split('\n')
+    window = len(search_lines)
+    if window > len(lines):
+        return None
+
+    # Line offsets so a line range can be mapped back to a character span
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+
+    def span(start: int) -> Tuple[int, int]:
+        return offsets[start], offsets[start + window] - 1
+
+    normalized_search = [l.strip() for l in search_lines]
+    stripped = [l.strip() for l in lines]
+    for start in range(len(lines) - window + 1):
+        if stripped[start:start + window] == normalized_search:
+            return span(start)
+
+    best_start, best_ratio = None, FUZZY_THRESHOLD
+    target = "\n".join(normalized_search)
+    matcher = difflib.SequenceMatcher(autojunk=False)
+    matcher.set_seq2(target)
+    for start in range(len(lines) - window + 1):
+        matcher.set_seq1("\n".join(stripped[start:start + window]))
+        if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio:
+            best_start, best_ratio = start, ratio
+
+    return span(best_start) if best_start is not None else None
+
+
+def _reindent(replace: str, original: str, search: str) -> str:
+    """Shift replacement lines by the indentation difference of a fuzzy match"""
+    def indent(text: str) -> str:
+        for line in text.split('\n'):
+            if line.strip():
+                return line[:len(line) - len(line.lstrip())]
+        return ""
+
+    found, expected = indent(original), indent(search)
+    if found == expected:
+        return replace
+
+    lines = []
+    for line in replace.split('\n'):
+        if line.startswith(expected):
+            line = found + line[len(expected):]
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def apply_edits(content: str, edits: List[PatchEdit]) -> Optional[str]:
+    """
+    Apply edits to file content in order.
+
+    Returns:
+        Patched content, or None if any edit does not apply cleanly
+    """
+    if not edits:
+        return None
+
+    for edit in edits:
+        location = _locate(content, edit.search)
+        if location is None:
+            return None
+        start, end = location
+        original = content[start:end]
+        replacement = edit.replace if original == edit.search else _reindent(edit.replace, original, edit.search)
+        content = content[:start] + replacement + content[end:]
+
+    return content
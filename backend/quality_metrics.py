@@ -0,0 +1,313 @@
+"""
+Quality Metrics for CodeGenesis
+Deterministic local code quality scoring (no LLM calls)
+"""
+import os
+import re
+import time
+import hashlib
+from typing import Optional, Dict, List, Callable, Any
+from dataclasses import dataclass, field, asdict
+
+
+# Extension -> language name understood by RefactorerAgent.get_quick_improvements
+LANGUAGES = {
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.mjs': 'javascript',
+    '.py': 'python',
+    '.css': 'css',
+    '.scss': 'css',
+    '.html': 'html',
+    '.json': 'json',
+}
+
+# Thresholds above which a metric starts costing points
+MAX_COMPLEXITY = 10
+MAX_FUNCTION_LINES = 50
+MAX_NESTING = 4
+MAX_FILE_LINES = 400
+DUPLICATION_WINDOW = 4
+
+_STRINGS_AND_COMMENTS = {
+    'brace': re.compile(r'//[^\n]*|/\*.*?\*/|`(?:\\.|[^`\\])*`|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S),
+    'python': re.compile(r'#[^\n]*|"""(?:.|\n)*?"""|\'\'\'(?:.|\n)*?\'\'\'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\''),
+}
+
+_DECISIONS = {
+    'brace': re.compile(r'\b(?:if|for|while|case|catch)\b|&&|\|\||\?\?|\?(?![.?])'),
+    'python': re.compile(r'\b(?:if|elif|for|while|except|and|or)\b'),
+}
+
+_FUNCTION_STARTS = {
+    'brace': re.compile(
+        r'\bfunction\b\s*\*?\s*(\w*)\s*\([^)]*\)[^{;]*\{'
+        r'|\b(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*(?::[^=]+)?=>\s*\{'
+        r'|^\s*(?:async\s+|static\s+|public\s+|private\s+|protected\s+)*(\w+)\s*\([^)]*\)\s*(?::[^{]+)?\{',
+        re.M
+    ),
+    'python': re.compile(r'^([ \t]*)(?:async\s+)?def\s+(\w+)', re.M),
+}
+
+_CONTROL_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'with', 'return'}
+
+
+@dataclass
+class FunctionMetrics:
+    """Metrics for a single function"""
+    name: str
+    line: int
+    length: int
+    complexity: int
+
+
+@dataclass
+class FileMetrics:
+    """Metrics for a single file"""
+    file: str
+    language: str
+    lines: int
+    functions: List[FunctionMetrics] = field(default_factory=list)
+    max_complexity: int = 0
+    max_function_length: int = 0
+    max_nesting: int = 0
+    lint_hits: List[str] = field(default_factory=list)
+
+
+@dataclass
+class QualityReport:
+    """Project-wide quality report with a reproducible 0-10 score"""
+    score: float
+    files: Dict[str, FileMetrics]
+    duplication_ratio: float
+    size_distribution: Dict[str, float]
+    penalties: Dict[str, float]
+    duration_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the report for API responses"""
+        return asdict(self)
+
+
+def detect_language(filename: str) -> str:
+    """Map a filename to a language name"""
+    return LANGUAGES.get(os.path.splitext(filename)[1].lower(), 'text')
+
+
+def _family(language: str) -> Optional[str]:
+    if language in ('typescript', 'javascript'):
+        return 'brace'
+    if language == 'python':
+        return 'python'
+    return None
+
+
+def _blank(match) -> str:
+    return re.sub(r'[^\n]', ' ', match.group(0))
+
+
+def strip_strings_and_comments(code: str, language: str) -> str:
+    """
+    Blank out strings and comments, preserving line and column positions.
+
+    Code in languages without a known syntax is returned unchanged.
+    """
+    family = _family(language)
+    if family is None:
+        return code
+    return _STRINGS_AND_COMMENTS[family].sub(_blank, code)
+
+
+def _brace_functions(code: str) -> List[FunctionMetrics]:
+    """Find functions in brace languages by matching their body braces"""
+    functions = []
+    for match in _FUNCTION_STARTS['brace'].finditer(code):
+        name = next((g for g in match.groups() if g), '<anonymous>')
+        if name in _CONTROL_KEYWORDS:
+            continue
+
+        depth, end = 0, len(code)
+        for i in range(match.end() - 1, len(code)):
+            if code[i] == '{':
+                depth += 1
+            elif code[i] == '}':
+                depth -= 1
+                if depth == 0:
+                    end = i + 1
+                    break
+
+        body = code[match.start():end]
+        functions.append(FunctionMetrics(
+            name=name,
+            line=code.count('\n', 0, match.start()) + 1,
+            length=body.count('\n') + 1,
+            complexity=1 + len(_DECISIONS['brace'].findall(body))
+        ))
+    return functions
+
+
+def _python_functions(code: str) -> List[FunctionMetrics]:
+    """Find Python functions by indentation"""
+    lines = code.split('\n')
+    functions = []
+    for match in _FUNCTION_STARTS['python'].finditer(code):
+        indent = len(match.group(1).expandtabs())
+        start = code.count('\n', 0, match.start())
+        end = start + 1
+        while end < len(lines):
+            line = lines[end]
+            if line.strip() and len(line) - len(line.lstrip()) <= indent:
+                break
+            end += 1
+        while end > start + 1 and not lines[end - 1].strip():
+            end -= 1
+
+        body = '\n'.join(lines[start:end])
+        functions.append(FunctionMetrics(
+            name=match.group(2),
+            line=start + 1,
+            length=end - start,
+            complexity=1 + len(_DECISIONS['python'].findall(body))
+        ))
+    return functions
+
+
+def _max_nesting(code: str, family: Optional[str]) -> int:
+    """Maximum block nesting depth"""
+    if family == 'python':
+        depths = [
+            (len(line) - len(line.lstrip())) // 4
+            for line in code.expandtabs(4).split('\n') if line.strip()
+        ]
+        return max(depths, default=0)
+
+    depth = deepest = 0
+    for char in code:
+        if char == '{':
+            depth += 1
+            deepest = max(deepest, depth)
+        elif char == '}':
+            depth = max(depth - 1, 0)
+    return deepest
+
+
+def analyze_file(
+    filename: str,
+    content: str,
+    lint: Optional[Callable[[str, str], List[str]]] = None
+) -> FileMetrics:
+    """Compute metrics for a single file"""
+    language = detect_language(filename)
+    family = _family(language)
+    metrics = FileMetrics(file=filename, language=language, lines=content.count('\n') + 1)
+
+    if family:
+        code = strip_strings_and_comments(content, language)
+        metrics.functions = _brace_functions(code) if family == 'brace' else _python_functions(code)
+        metrics.max_nesting = _max_nesting(code, family)
+    elif language == 'css':
+        metrics.max_nesting = _max_nesting(content, None)
+
+    metrics.max_complexity = max((f.complexity for f in metrics.functions), default=0)
+    metrics.max_function_length = max((f.length for f in metrics.functions), default=0)
+
+    if lint and family:
+        metrics.lint_hits = lint(content, language)
+
+    return metrics
+
+
+def duplication_ratio(files: Dict[str, str], window: int = DUPLICATION_WINDOW) -> float:
+    """
+    Fraction of significant lines that belong to a repeated block.
+
+    Lines are whitespace-normalized; a block is `window` consecutive
+    significant lines appearing more than once across the project.
+    """
+    seen: Dict[bytes, int] = {}
+    sequences = []
+    for content in files.values():
+        lines = [l.strip() for l in content.split('\n')]
+        lines = [l for l in lines if len(l) > 3]
+        keys = [
+            hashlib.blake2b('\n'.join(lines[i:i + window]).encode(), digest_size=8).digest()
+            for i in range(len(lines) - window + 1)
+        ]
+        sequences.append((len(lines), keys))
+        for key in keys:
+            seen[key] = seen.get(key, 0) + 1
+
+    total = duplicated = 0
+    for count, keys in sequences:
+        total += count
+        flags = [False] * count
+        for i, key in enumerate(keys):
+            if seen[key] > 1:
+                flags[i:i + window] = [True] * window
+        duplicated += sum(flags)
+
+    return duplicated / total if total else 0.0
+
+
+def _share(items: list, predicate: Callable[[Any], bool]) -> float:
+    if not items:
+        return 0.0
+    return sum(1 for item in items if predicate(item)) / len(items)
+
+
+def _size_distribution(file_metrics: List[FileMetrics]) -> Dict[str, float]:
+    sizes = sorted(m.lines for m in file_metrics)
+    if not sizes:
+        return {"files": 0, "mean": 0.0, "p90": 0.0, "max": 0.0}
+    return {
+        "files": len(sizes),
+        "mean": round(sum(sizes) / len(sizes), 1),
+        "p90": float(sizes[min(len(sizes) - 1, int(len(sizes) * 0.9))]),
+        "max": float(sizes[-1]),
+    }
+
+
+def compute_quality(
+    files: Dict[str, str],
+    lint: Optional[Callable[[str, str], List[str]]] = None
+) -> QualityReport:
+    """
+    Score a project from 0 to 10 using local metrics only.
+
+    Args:
+        files: Dict mapping filenames to their content
+        lint: Optional callable (code, language) -> list of hints,
+              e.g. RefactorerAgent.get_quick_improvements
+
+    Returns:
+        QualityReport; identical input always produces an identical score
+    """
+    started = time.perf_counter()
+    file_metrics = {name: analyze_file(name, content, lint) for name, content in files.items()}
+    metrics = list(file_metrics.values())
+    functions = [f for m in metrics for f in m.functions]
+
+    penalties = {
+        # Share of functions over the threshold, up to 2.5 points each
+        "complexity": 2.5 * _share(functions, lambda f: f.complexity > MAX_COMPLEXITY),
+        "function_length": 2.0 * _share(functions, lambda f: f.length > MAX_FUNCTION_LINES),
+        "nesting": 1.5 * _share(metrics, lambda m: m.max_nesting > MAX_NESTING),
+        "file_size": 1.0 * _share(metrics, lambda m: m.lines > MAX_FILE_LINES),
+        # Each lint hit costs 0.25, capped at 2 points
+        "lint": min(2.0, 0.25 * sum(len(m.lint_hits) for m in metrics)),
+    }
+    ratio = duplication_ratio(files)
+    penalties["duplication"] = min(1.0, ratio * 2)
+
+    score = max(0.0, 10.0 - sum(penalties.values())) if files else 0.0
+
+    return QualityReport(
+        score=round(score, 1),
+        files=file_metrics,
+        duplication_ratio=round(ratio, 3),
+        size_distribution=_size_distribution(metrics),
+        penalties={k: round(v, 2) for k, v in penalties.items()},
+        duration_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
@@ -0,0 +1,149 @@
+"""
+Reference Index for CodeGenesis
+Finds the project files and exported symbols a text mentions in one Aho-Corasick pass
+"""
+import os
+import string
+import threading
+from typing import Dict, List, Set, Tuple, Optional
+
+from aho_corasick import AhoCorasick
+from code_symbols import extract_symbols
+from search_index import SearchIndex, STOPWORDS
+
+
+# Shorter exported names ("app", "api") match too many ordinary words
+MIN_SYMBOL_LENGTH = 4
+_WORD_CHARS = frozenset(string.ascii_letters + string.digits + "_$")
+
+
+class ReferenceIndex:
+    """
+    Names a project's files can be referred to by (full path, basename and
+    exported symbols), compiled into one Aho-Corasick automaton.
+
+    update() re-extracts names only from files whose content hash changed.
+    Names new to the project are added to the existing trie. Names that
+    disappear stay in it and their matches are ignored; the automaton is
+    recompiled once such dead names outnumber live ones. Failure links
+    are rebuilt lazily on the next lookup, so edits that keep a file's
+    exports leave the automaton untouched.
+
+    Matches must begin and end at identifier boundaries, and overlapping
+    matches resolve to the leftmost-longest one: "src/Header.jsx" is a
+    single reference, not also "Header.jsx" and "Header".
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, str] = {}
+        self._names: Dict[str, Set[str]] = {}  # File -> names
+        self._owners: Dict[str, Set[str]] = {}  # Name -> files
+        self._matcher: Optional[AhoCorasick] = None
+        self._compiled_names: Set[str] = set()  # Patterns in the automaton, live or dead
+        self._stale = False  # Patterns added since the failure links were built
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    @staticmethod
+    def _file_names(filename: str, content: str) -> Set[str]:
+        names = {filename, os.path.basename(filename)}
+        for symbol in extract_symbols(filename, content):
+            if len(symbol) >= MIN_SYMBOL_LENGTH and symbol.lower() not in STOPWORDS:
+                names.add(symbol)
+        return names
+
+    def update(self, files: Dict[str, str], prune: bool = True) -> Dict[str, int]:
+        """
+        Sync the index with the project's files.
+
+        Args:
+            files: Filename -> content
+            prune: Drop indexed files missing from files; pass False to add
+                or update only the given files
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            if prune:
+                stale = [filename for filename in self._hashes if filename not in files]
+                for filename in stale:
+                    self._set_names(filename, set())
+                    del self._hashes[filename]
+                stats["removed"] = len(stale)
+
+            for filename, content in files.items():
+                digest = SearchIndex._hash(content)
+                previous = self._hashes.get(filename)
+                if previous == digest:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated" if previous is not None else "added"] += 1
+                self._hashes[filename] = digest
+                self._set_names(filename, self._file_names(filename, content))
+        return stats
+
+    def _set_names(self, filename: str, names: Set[str]):
+        old = self._names.pop(filename, set())
+        if names:
+            self._names[filename] = names
+        for name in old - names:
+            owners = self._owners[name]
+            owners.discard(filename)
+            if not owners:
+                del self._owners[name]
+        for name in names - old:
+            owners = self._owners.get(name)
+            if owners is None:
+                owners = self._owners[name] = set()
+                if self._matcher is not None and name not in self._compiled_names:
+                    self._matcher.add(name)
+                    self._compiled_names.add(name)
+                    self._stale = True
+            owners.add(filename)
+        if len(self._compiled_names) > 2 * len(self._owners):
+            self._matcher = None
+            self._compiled_names = set()
+            self._stale = False
+
+    def _compiled(self) -> Optional[AhoCorasick]:
+        if self._matcher is None and self._owners:
+            self._matcher = AhoCorasick(self._owners)
+            self._compiled_names = set(self._owners)
+            self._stale = False
+        elif self._stale:
+            self._matcher.build()
+            self._stale = False
+        return self._matcher
+
+    def find(self, text: str) -> List[Tuple[str, List[str]]]:
+        """(name, files it refers to) for each distinct name in text, in order of first mention"""
+        with self._lock:
+            matcher = self._compiled()
+            if matcher is None:
+                return []
+            patterns, owners, size = matcher.patterns, self._owners, len(text)
+            matches = [
+                (start, end, index) for start, end, index in matcher.iter_matches(text)
+                if patterns[index] in owners
+                and not (start and text[start - 1] in _WORD_CHARS) and not (end < size and text[end] in _WORD_CHARS)
+            ]
+            matches.sort(key=lambda match: (match[0], -match[1]))
+
+            found: Dict[str, List[str]] = {}
+            covered = 0
+            for start, end, index in matches:
+                if start < covered:
+                    continue
+                covered = end
+                name = patterns[index]
+                if name not in found:
+                    found[name] = sorted(owners[name])
+            return list(found.items())
+
+    def files(self, text: str) -> List[str]:
+        """Files text refers to by path, basename or exported symbol, in order of first mention"""
+        return list(dict.fromkeys(filename for _, owners in self.find(text) for filename in owners))
@@ -0,0 +1,392 @@
+"""
+Scaffold Templates for CodeGenesis
+Deterministic boilerplate (package.json, configs, HTML shells) for common tech stacks
+"""
+import re
+import json
+from typing import Optional, Dict, Callable, Iterable, Set
+from dataclasses import dataclass, field
+from code_symbols import extract_imports
+
+
+# Normalized stack keys
+STATIC = "static"
+REACT = "react"
+REACT_TAILWIND = "react-tailwind"
+NEXTJS = "nextjs"
+
+# Versions pinned for packages the generated code commonly imports
+KNOWN_VERSIONS = {
+    "react": "^18.3.1",
+    "react-dom": "^18.3.1",
+    "next": "14.2.5",
+    "react-router-dom": "^6.26.0",
+    "axios": "^1.7.2",
+    "zustand": "^4.5.4",
+    "lucide-react": "^0.424.0",
+    "framer-motion": "^11.3.21",
+    "clsx": "^2.1.1",
+    "date-fns": "^3.6.0",
+    "uuid": "^10.0.0",
+    "recharts": "^2.12.7",
+    "@tanstack/react-query": "^5.51.21",
+}
+
+_NODE_BUILTINS = {
+    "fs", "path", "os", "url", "http", "https", "crypto", "events", "stream",
+    "util", "child_process", "buffer", "zlib", "assert", "querystring",
+}
+
+
+@dataclass
+class ScaffoldContext:
+    """Parameters a template is rendered with"""
+    project_name: str
+    planned: Set[str] = field(default_factory=set)
+    dependencies: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def typescript(self) -> bool:
+        return any(name.endswith((".ts", ".tsx")) for name in self.planned)
+
+    def first_planned(self, *names: str) -> Optional[str]:
+        return next((name for name in names if name in self.planned), None)
+
+
+def normalize_stack(tech_stack: Optional[str]) -> Optional[str]:
+    """Map a free-form tech stack (e.g. "React + Tailwind") to a template key"""
+    if not tech_stack:
+        return None
+    stack = tech_stack.lower()
+    if re.search(r'\bnext(?:\.?js)?\b', stack):
+        return NEXTJS
+    if "react" in stack:
+        return REACT_TAILWIND if "tailwind" in stack else REACT
+    if re.search(r'\b(?:vue|svelte|angular|python|flask|django|fastapi|node|express)\b', stack):
+        return None
+    if "html" in stack:
+        return STATIC
+    return None
+
+
+def project_slug(text: str, max_length: int = 40) -> str:
+    """Package-name-safe project name derived from a prompt"""
+    words = re.findall(r'[a-z0-9]+', text.lower())[:5]
+    slug = "-".join(words)[:max_length].strip("-")
+    return slug or "codegenesis-app"
+
+
+def detect_dependencies(files: Dict[str, str]) -> Dict[str, str]:
+    """npm packages imported by the generated JS/TS files, with known versions where available"""
+    packages = {}
+    for filename, content in files.items():
+        if not filename.endswith((".js", ".jsx", ".ts", ".tsx", ".mjs")):
+            continue
+        for specifier in extract_imports(filename, content):
+            if specifier.startswith((".", "/", "@/", "~/", "node:")):
+                continue
+            parts = specifier.split("/")
+            name = "/".join(parts[:2]) if specifier.startswith("@") else parts[0]
+            if name and name not in _NODE_BUILTINS:
+                packages[name] = KNOWN_VERSIONS.get(name, "latest")
+    return dict(sorted(packages.items()))
+
+
+def _package_json(ctx: ScaffoldContext, scripts: Dict[str, str], dependencies: Dict[str, str],
+                  dev_dependencies: Dict[str, str]) -> str:
+    merged = dict(dependencies)
+    for name, version in ctx.dependencies.items():
+        if name not in dev_dependencies:
+            merged.setdefault(name, version)
+    package = {
+        "name": ctx.project_name,
+        "private": True,
+        "version": "0.1.0",
+        "scripts": scripts,
+        "dependencies": dict(sorted(merged.items())),
+    }
+    if ctx.typescript:
+        dev_dependencies = {**dev_dependencies, "typescript": "^5.5.4"}
+        if "react" in merged:
+            dev_dependencies.update({"@types/react": "^18.3.3", "@types/react-dom": "^18.3.0"})
+    if dev_dependencies:
+        package["devDependencies"] = dict(sorted(dev_dependencies.items()))
+    if "vite" in dev_dependencies:
+        package["type"] = "module"  # Vite and PostCSS configs use ESM
+    return json.dumps(package, indent=2) + "\n"
+
+
+_GITIGNORE = """node_modules
+dist
+.next
+out
+.env*.local
+*.log
+.DS_Store
+"""
+
+
+# ---------- Plain HTML/CSS/JS ----------
+
+def _static_package_json(ctx: ScaffoldContext) -> str:
+    return _package_json(ctx, {"start": "npx serve ."}, {}, {})
+
+
+# ---------- React (Vite) ----------
+
+_VITE_DEV = {"vite": "^5.4.0", "@vitejs/plugin-react": "^4.3.1"}
+_TAILWIND_DEV = {"tailwindcss": "^3.4.7", "postcss": "^8.4.40", "autoprefixer": "^10.4.19"}
+
+
+def _react_package_json(ctx: ScaffoldContext, tailwind: bool = False) -> str:
+    dev = dict(_VITE_DEV, **(_TAILWIND_DEV if tailwind else {}))
+    return _package_json(
+        ctx,
+        {"dev": "vite", "build": "vite build", "preview": "vite preview"},
+        {"react": KNOWN_VERSIONS["react"], "react-dom": KNOWN_VERSIONS["react-dom"]},
+        dev
+    )
+
+
+def _react_entry(ctx: ScaffoldContext) -> str:
+    return ctx.first_planned("src/main.tsx", "src/main.jsx", "src/index.tsx", "src/index.jsx") or (
+        "src/main.tsx" if ctx.typescript else "src/main.jsx"
+    )
+
+
+def _react_index_html(ctx: ScaffoldContext) -> str:
+    return f"""<!DOCTYPE html>
+<html lang="en">
+  <head>
+    <meta charset="UTF-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <title>{ctx.project_name.replace("-", " ").title()}</title>
+  </head>
+  <body>
+    <div id="root"></div>
+    <script type="module" src="/{_react_entry(ctx)}"></script>
+  </body>
+</html>
+"""
+
+
+def _react_main(ctx: ScaffoldContext) -> Optional[str]:
+    if not ctx.first_planned("src/App.tsx", "src/App.jsx", "src/App.js", "src/App.ts"):
+        return None  # Entry point for an unusual layout: leave it to the LLM
+    style = ctx.first_planned("src/index.css", "src/App.css", "src/styles.css")
+    style_import = f"import './{style[len('src/'):]}';\n" if style else ""
+    root = "document.getElementById('root')!" if ctx.typescript else "document.getElementById('root')"
+    return f"""import React from 'react';
+import ReactDOM from 'react-dom/client';
+import App from './App';
+{style_import}
+ReactDOM.createRoot({root}).render(
+  <React.StrictMode>
+    <App />
+  </React.StrictMode>
+);
+"""
+
+
+def _vite_config(ctx: ScaffoldContext) -> str:
+    return """import { defineConfig } from 'vite';
+import react from '@vitejs/plugin-react';
+
+export default defineConfig({
+  plugins: [react()],
+});
+"""
+
+
+def _react_tsconfig(ctx: ScaffoldContext) -> str:
+    return json.dumps({
+        "compilerOptions": {
+            "target": "ES2020",
+            "useDefineForClassFields": True,
+            "lib": ["ES2020", "DOM", "DOM.Iterable"],
+            "module": "ESNext",
+            "skipLibCheck": True,
+            "moduleResolution": "bundler",
+            "resolveJsonModule": True,
+            "isolatedModules": True,
+            "noEmit": True,
+            "jsx": "react-jsx",
+            "strict": True,
+            "baseUrl": ".",
+            "paths": {"@/*": ["src/*"]}
+        },
+        "include": ["src"]
+    }, indent=2) + "\n"
+
+
+def _tailwind_config(content_globs: Iterable[str]) -> Callable[[ScaffoldContext], str]:
+    globs = ", ".join(f"'{g}'" for g in content_globs)
+
+    def render(ctx: ScaffoldContext) -> str:
+        return f"""/** @type {{import('tailwindcss').Config}} */
+export default {{
+  content: [{globs}],
+  theme: {{
+    extend: {{}},
+  }},
+  plugins: [],
+}};
+"""
+    return render
+
+
+def _postcss_config(ctx: ScaffoldContext) -> str:
+    return """export default {
+  plugins: {
+    tailwindcss: {},
+    autoprefixer: {},
+  },
+};
+"""
+
+
+# ---------- Next.js ----------
+
+def _next_package_json(ctx: ScaffoldContext) -> str:
+    return _package_json(
+        ctx,
+        {"dev": "next dev", "build": "next build", "start": "next start", "lint": "next lint"},
+        {"next": KNOWN_VERSIONS["next"], "react": KNOWN_VERSIONS["react"], "react-dom": KNOWN_VERSIONS["react-dom"]},
+        dict(_TAILWIND_DEV, **({"@types/node": "^20.14.14"} if ctx.typescript else {}))
+    )
+
+
+def _next_config(ctx: ScaffoldContext) -> str:
+    return """/** @type {import('next').NextConfig} */
+const nextConfig = {
+  reactStrictMode: true,
+};
+
+module.exports = nextConfig;
+"""
+
+
+def _next_config_mjs(ctx: ScaffoldContext) -> str:
+    return _next_config(ctx).replace("module.exports = nextConfig;", "export default nextConfig;")
+
+
+def _next_tsconfig(ctx: ScaffoldContext) -> str:
+    return json.dumps({
+        "compilerOptions": {
+            "target": "ES2017",
+            "lib": ["dom", "dom.iterable", "esnext"],
+            "allowJs": True,
+            "skipLibCheck": True,
+            "strict": True,
+            "noEmit": True,
+            "esModuleInterop": True,
+            "module": "esnext",
+            "moduleResolution": "bundler",
+            "resolveJsonModule": True,
+            "isolatedModules": True,
+            "jsx": "preserve",
+            "incremental": True,
+            "plugins": [{"name": "next"}],
+            "paths": {"@/*": ["./*"]}
+        },
+        "include": ["next-env.d.ts", "**/*.ts", "**/*.tsx", ".next/types/**/*.ts"],
+        "exclude": ["node_modules"]
+    }, indent=2) + "\n"
+
+
+def _next_env(ctx: ScaffoldContext) -> str:
+    return """/// <reference types="next" />
+/// <reference types="next/image-types/global" />
+
+// NOTE: This file should not be edited
+// see https://nextjs.org/docs/basic-features/typescript for more information.
+"""
+
+
+def _next_postcss(ctx: ScaffoldContext) -> str:
+    return _postcss_config(ctx).replace("export default", "module.exports =")
+
+
+_REACT_TEMPLATES: Dict[str, Callable[[ScaffoldContext], Optional[str]]] = {
+    "package.json": _react_package_json,
+    "index.html": _react_index_html,
+    "vite.config.js": _vite_config,
+    "vite.config.ts": _vite_config,
+    "tsconfig.json": _react_tsconfig,
+    "src/main.jsx": _react_main,
+    "src/main.tsx": _react_main,
+    ".gitignore": lambda ctx: _GITIGNORE,
+}
+
+# A template may return None to decline a project it does not fit
+TEMPLATES: Dict[str, Dict[str, Callable[[ScaffoldContext], Optional[str]]]] = {
+    STATIC: {
+        "package.json": _static_package_json,
+        ".gitignore": lambda ctx: _GITIGNORE,
+    },
+    REACT: _REACT_TEMPLATES,
+    REACT_TAILWIND: {
+        **_REACT_TEMPLATES,
+        "package.json": lambda ctx: _react_package_json(ctx, tailwind=True),
+        "tailwind.config.js": _tailwind_config(["./index.html", "./src/**/*.{js,ts,jsx,tsx}"]),
+        "postcss.config.js": _postcss_config,
+    },
+    NEXTJS: {
+        "package.json": _next_package_json,
+        "next.config.js": _next_config,
+        "next.config.mjs": _next_config_mjs,
+        "tsconfig.json": _next_tsconfig,
+        "next-env.d.ts": _next_env,
+        "tailwind.config.js": lambda ctx: _tailwind_config(
+            ["./app/**/*.{js,ts,jsx,tsx}", "./pages/**/*.{js,ts,jsx,tsx}", "./components/**/*.{js,ts,jsx,tsx}",
+             "./src/**/*.{js,ts,jsx,tsx}"]
+        )(ctx).replace("export default", "module.exports ="),
+        "postcss.config.js": _next_postcss,
+        ".gitignore": lambda ctx: _GITIGNORE,
+    },
+}
+
+
+def _normalize_path(filename: str) -> str:
+    return filename[2:] if filename.startswith("./") else filename
+
+
+def has_template(tech_stack: Optional[str], filename: str) -> bool:
+    """Whether a planned file can be rendered from a template instead of generated"""
+    stack = normalize_stack(tech_stack)
+    return stack is not None and _normalize_path(filename) in TEMPLATES[stack]
+
+
+def render_template(
+    tech_stack: Optional[str],
+    filename: str,
+    project_name: str,
+    planned: Iterable[str] = (),
+    dependencies: Optional[Dict[str, str]] = None
+) -> Optional[str]:
+    """
+    Render a scaffold file.
+
+    Args:
+        tech_stack: Tech stack from the plan (normalized with normalize_stack)
+        filename: Planned file path
+        project_name: Package-safe project name
+        planned: Every planned filename, so shells reference the right entry/style files
+        dependencies: Extra npm packages to add to package.json
+
+    Returns:
+        File content, or None if there is no template for this stack and file
+        (or the template does not fit the planned layout)
+    """
+    stack = normalize_stack(tech_stack)
+    if stack is None:
+        return None
+    template = TEMPLATES[stack].get(_normalize_path(filename))
+    if template is None:
+        return None
+    context = ScaffoldContext(
+        project_name=project_name,
+        planned={_normalize_path(name) for name in planned},
+        dependencies=dict(dependencies or {})
+    )
+    return template(context)
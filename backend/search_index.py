@@ -0,0 +1,416 @@
+"""
+Search Index for CodeGenesis
+Incrementally maintained inverted index with BM25 ranking over project files
+"""
+import re
+import math
+import heapq
+import hashlib
+import threading
+from bisect import bisect_left, insort
+from operator import itemgetter
+from typing import Callable, Dict, List, Set, Tuple, Iterable
+from code_symbols import CodeChunk, chunk_file
+
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+me my of on or our please should so that the their them then there these this to too
+us was we what when where which while who why will with would you your
+""".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Extra weight (in units of a term's idf) when it appears in the path or a declared name
+FILENAME_BOOST = 2.0
+IDENTIFIER_BOOST = 1.0
+
+_WORD = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*|\d+')
+_CAMEL_PARTS = re.compile(r'[A-Z]+(?=[A-Z][a-z]|\d|\b)|[A-Z]?[a-z]+|[A-Z]+|\d+')
+_DECLARATION = re.compile(
+    r'\b(?:function|class|def|interface|type|enum|const|let|var)\s+([A-Za-z_$][\w$]*)'
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms for indexing and queries.
+
+    Identifiers contribute the whole word and their camelCase/snake_case
+    parts, so "TodoList" matches queries for "todolist", "todo" and "list".
+    """
+    terms = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        if lower in STOPWORDS:
+            continue
+        terms.append(lower)
+        if len(word) > 3 and (not word.islower() or '_' in word):
+            parts = [p.lower() for p in _CAMEL_PARTS.findall(word.replace('$', '_'))]
+            if len(parts) > 1:
+                terms.extend(p for p in parts if len(p) > 1 and p not in STOPWORDS)
+    return terms
+
+
+def _path_terms(filename: str) -> Set[str]:
+    return set(tokenize(re.sub(r'[/\\.\-]', ' ', filename)))
+
+
+def _identifier_terms(content: str) -> Set[str]:
+    return set(tokenize(" ".join(_DECLARATION.findall(content))))
+
+
+def _by_weight(weights: Dict[str, float]) -> Callable[[str], Tuple[float, str]]:
+    """Sort key ordering files by weight descending, then name (unique, so bisect finds a file exactly)"""
+    return lambda doc: (-weights[doc], doc)
+
+
+# Relative change in file count or average length that triggers a full re-normalization
+NORM_DRIFT = 0.05
+
+
+class SearchIndex:
+    """
+    BM25 inverted index over one project's files.
+
+    update() re-indexes only files whose content hash changed, so keeping
+    the index in sync costs a hash per file plus work proportional to the
+    edited files.
+
+    Queries use per-term impact lists (each file's contribution for the
+    term, sorted descending) and stop scanning as soon as no unseen file can
+    reach the current top results, so common terms do not cost a full pass
+    over their postings. Impact lists are maintained at index time:
+    update() and remove() re-weigh only the entries of the files they
+    touched, so queries never build them. The weights leave out idf, which
+    is applied per query, so a change in a term's document frequency does
+    not reorder its list. Length normalization uses the average file length
+    captured when norms were last rebuilt (as Lucene does at index time),
+    and norms and impact lists are rebuilt once the project has drifted by
+    more than NORM_DRIFT.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, str] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._name_postings: Dict[str, Set[str]] = {}
+        self._ident_postings: Dict[str, Set[str]] = {}
+        self._name_terms: Dict[str, Set[str]] = {}
+        self._ident_terms: Dict[str, Set[str]] = {}
+        self._total_len = 0
+        self._norms: Dict[str, float] = {}
+        self._norm_average = 0.0
+        self._norm_count = 0
+        self._impacts: Dict[str, Tuple[Dict[str, float], List[str]]] = {}  # Term -> weights, files by weight
+        self._stale: Dict[str, Set[str]] = {}  # Term -> files whose weight must be refreshed
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._hashes
+
+    @staticmethod
+    def _hash(content: str) -> str:
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+    def update(self, files: Dict[str, str], prune: bool = True) -> Dict[str, int]:
+        """
+        Sync the index with the project's current files.
+
+        Args:
+            files: Filename -> content
+            prune: Drop indexed files missing from files; pass False to
+                add or update only the given entries
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            for filename in [f for f in self._hashes if f not in files] if prune else ():
+                self._remove(filename)
+                stats["removed"] += 1
+
+            for filename, content in files.items():
+                digest = self._hash(content)
+                previous = self._hashes.get(filename)
+                if previous == digest:
+                    stats["unchanged"] += 1
+                    continue
+                if previous is not None:
+                    self._remove(filename)
+                    stats["updated"] += 1
+                else:
+                    stats["added"] += 1
+                self._add(filename, content, digest)
+
+            if stats["added"] or stats["updated"] or stats["removed"]:
+                self._check_drift()
+                self._refresh_impacts()
+        return stats
+
+    def remove(self, filenames: Iterable[str]):
+        """Drop files from the index"""
+        with self._lock:
+            for filename in filenames:
+                if filename in self._hashes:
+                    self._remove(filename)
+            self._check_drift()
+            self._refresh_impacts()
+
+    def _add(self, filename: str, content: str, digest: str):
+        counts: Dict[str, int] = {}
+        for term in tokenize(content):
+            counts[term] = counts.get(term, 0) + 1
+
+        self._hashes[filename] = digest
+        self._doc_terms[filename] = counts
+        self._doc_len[filename] = sum(counts.values())
+        self._total_len += self._doc_len[filename]
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[filename] = tf
+
+        self._name_terms[filename] = _path_terms(filename)
+        for term in self._name_terms[filename]:
+            self._name_postings.setdefault(term, set()).add(filename)
+        self._ident_terms[filename] = _identifier_terms(content)
+        for term in self._ident_terms[filename]:
+            self._ident_postings.setdefault(term, set()).add(filename)
+
+        if self._norm_count:
+            self._norms[filename] = self._norm(self._doc_len[filename])
+        self._invalidate(filename)
+
+    def _remove(self, filename: str):
+        self._invalidate(filename)
+        for term in self._doc_terms.pop(filename):
+            postings = self._postings[term]
+            del postings[filename]
+            if not postings:
+                del self._postings[term]
+        for term in self._name_terms.pop(filename):
+            self._discard(self._name_postings, term, filename)
+        for term in self._ident_terms.pop(filename):
+            self._discard(self._ident_postings, term, filename)
+        self._total_len -= self._doc_len.pop(filename)
+        self._norms.pop(filename, None)
+        del self._hashes[filename]
+
+    def _invalidate(self, filename: str):
+        """Mark the file's entry stale in the impact list of every term it contributes to"""
+        if not self._norm_count:
+            return  # Everything is rebuilt with the norms
+        stale = self._stale
+        for terms in (self._doc_terms.get(filename, ()), self._name_terms.get(filename, ()),
+                      self._ident_terms.get(filename, ())):
+            for term in terms:
+                docs = stale.get(term)
+                if docs is None:
+                    stale[term] = {filename}
+                else:
+                    docs.add(filename)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], term: str, filename: str):
+        docs = postings[term]
+        docs.discard(filename)
+        if not docs:
+            del postings[term]
+
+    def _norm(self, length: int) -> float:
+        return K1 * (1 - B + B * length / self._norm_average)
+
+    def _check_drift(self):
+        """Flag length norms (and so all impact lists) for rebuilding once the project has changed enough"""
+        count = len(self._doc_len)
+        if not self._norm_count or not count:
+            self._norm_count = 0
+            return
+        average = self._total_len / count
+        if (abs(count - self._norm_count) > NORM_DRIFT * self._norm_count
+                or abs(average - self._norm_average) > NORM_DRIFT * self._norm_average):
+            self._norm_count = 0
+
+    def _refresh_impacts(self):
+        """Bring impact lists up to date with the index, rebuilding them all if the norms are stale"""
+        if not self._norm_count:
+            count = len(self._doc_len)
+            self._norm_average = (self._total_len / count if count else 0.0) or 1.0
+            self._norm_count = count
+            self._norms = {doc: self._norm(length) for doc, length in self._doc_len.items()}
+            self._impacts = {}
+            for term in self._postings.keys() | self._name_postings.keys() | self._ident_postings.keys():
+                weights = self._term_weights(term)
+                ranked = sorted(weights)
+                ranked.sort(key=weights.__getitem__, reverse=True)  # Stable, so in _by_weight order
+                self._impacts[term] = (weights, ranked)
+            self._stale.clear()
+            return
+
+        for term, docs in self._stale.items():
+            # Copied rather than changed in place: searches read lists outside the lock
+            weights, ranked = self._impacts.get(term, ({}, []))
+            weights, ranked = dict(weights), ranked[:]
+            order = _by_weight(weights)
+            for doc in docs:
+                if doc in weights:
+                    del ranked[bisect_left(ranked, order(doc), key=order)]
+                    del weights[doc]
+                weight = self._weight(term, doc)
+                if weight:
+                    weights[doc] = weight
+                    insort(ranked, doc, key=order)
+            if weights:
+                self._impacts[term] = (weights, ranked)
+            else:
+                self._impacts.pop(term, None)
+        self._stale.clear()
+
+    def _term_weights(self, term: str) -> Dict[str, float]:
+        """Each file's score contribution for a term, before idf"""
+        norms = self._norms
+        weights = {doc: tf * (K1 + 1) / (tf + norms[doc]) for doc, tf in self._postings.get(term, {}).items()}
+        for doc in self._name_postings.get(term, ()):
+            weights[doc] = weights.get(doc, 0.0) + FILENAME_BOOST
+        for doc in self._ident_postings.get(term, ()):
+            weights[doc] = weights.get(doc, 0.0) + IDENTIFIER_BOOST
+        return weights
+
+    def _weight(self, term: str, filename: str) -> float:
+        """One file's score contribution for a term, before idf (0 if it does not match)"""
+        counts = self._doc_terms.get(filename)
+        if counts is None:
+            return 0.0
+        tf = counts.get(term, 0)
+        weight = tf * (K1 + 1) / (tf + self._norms[filename]) if tf else 0.0
+        if term in self._name_terms[filename]:
+            weight += FILENAME_BOOST
+        if term in self._ident_terms[filename]:
+            weight += IDENTIFIER_BOOST
+        return weight
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Rank files for a query.
+
+        Returns:
+            Up to limit (filename, score) pairs, best first; only files
+            matching at least one query term are returned
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not terms or not self._hashes or limit <= 0:
+                return []
+            count = len(self._hashes)
+            lists = []
+            for term in terms:
+                impacts = self._impacts.get(term)
+                if impacts is not None:
+                    df = len(self._postings.get(term, ())) or 1
+                    lists.append((math.log(1 + (count - df + 0.5) / (df + 0.5)),) + impacts)
+
+        if not lists:
+            return []
+        if len(lists) == 1:
+            idf, weights, ranked = lists[0]
+            return [(doc, idf * weights[doc]) for doc in ranked[:limit]]
+
+        # Threshold algorithm: walk the impact lists in parallel; a file not
+        # seen yet can score at most the sum of the weights at the current depth
+        top: List[Tuple[float, str]] = []
+        seen: Set[str] = set()
+        for depth in range(max(len(ranked) for _, _, ranked in lists)):
+            threshold = 0.0
+            for idf, weights, ranked in lists:
+                if depth >= len(ranked):
+                    continue
+                doc = ranked[depth]
+                threshold += idf * weights[doc]
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                score = sum(factor * impacts.get(doc, 0.0) for factor, impacts, _ in lists)
+                if len(top) < limit:
+                    heapq.heappush(top, (score, doc))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, doc))
+            if len(top) == limit and top[0][0] >= threshold:
+                break
+
+        return [(doc, score) for score, doc in sorted(top, key=itemgetter(0), reverse=True)]
+
+
+class ChunkIndex:
+    """
+    BM25 search over symbol-level chunks of a project's files.
+
+    Files are re-chunked only when their content hash changes; each chunk is
+    indexed as a document keyed by "file#symbol", so the file path and the
+    symbol name both get the filename boost.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, str] = {}
+        self._file_chunks: Dict[str, List[str]] = {}
+        self._chunks: Dict[str, CodeChunk] = {}
+        self._index = SearchIndex()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def update(self, files: Dict[str, str]) -> Dict[str, int]:
+        """
+        Sync chunks with the project's current files.
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            stale: List[str] = []
+            for filename in [f for f in self._hashes if f not in files]:
+                stale.extend(self._drop(filename))
+                stats["removed"] += 1
+
+            fresh: Dict[str, str] = {}
+            for filename, content in files.items():
+                digest = SearchIndex._hash(content)
+                previous = self._hashes.get(filename)
+                if previous == digest:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated" if previous is not None else "added"] += 1
+                stale.extend(self._drop(filename))
+                self._hashes[filename] = digest
+                self._file_chunks[filename] = []
+                for chunk in chunk_file(filename, content):
+                    key = f"{filename}#{chunk.name}"
+                    if key in self._chunks:
+                        key += f"@{chunk.start_line}"
+                    self._chunks[key] = chunk
+                    self._file_chunks[filename].append(key)
+                    fresh[key] = chunk.text
+
+            self._index.remove(k for k in stale if k not in fresh)
+            self._index.update(fresh, prune=False)
+        return stats
+
+    def _drop(self, filename: str) -> List[str]:
+        self._hashes.pop(filename, None)
+        keys = self._file_chunks.pop(filename, [])
+        for key in keys:
+            del self._chunks[key]
+        return keys
+
+    def search(self, query: str, limit: int = 8) -> List[Tuple[CodeChunk, float]]:
+        """Up to limit (chunk, score) pairs, best first"""
+        with self._lock:
+            return [(self._chunks[key], score) for key, score in self._index.search(query, limit)
+                    if key in self._chunks]
@@ -0,0 +1,381 @@
+"""
+SQLite Context Store for CodeGenesis
+Persistent conversation and file storage in WAL mode with a background batched writer
+"""
+import os
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, List, Any, Tuple
+
+from context_manager import (
+    ContextStore, ConversationMessage, ConversationSummary, MessageHistory, MAX_MESSAGES_PER_PROJECT
+)
+
+
+DEFAULT_DB_PATH = os.getenv("CODEGENESIS_CONTEXT_DB", "codegenesis_context.db")
+CACHE_PROJECTS = 256  # Conversations kept in the read cache
+CACHE_FILE_PROJECTS = 32  # File contexts kept in the read cache
+BATCH_SIZE = 512  # Most queued writes committed in one transaction
+_STRIPES = 64  # Write sequence stripes used to keep cache fills consistent
+_LIVENESS_CHECK = 1.0  # Seconds between writer-thread liveness checks while a read waits
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_project ON messages (project_id, id);
+CREATE TABLE IF NOT EXISTS files (
+    project_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (project_id, filename)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summaries (
+    project_id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    through INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Fixed SQL text, so each connection's statement cache keeps them prepared
+_INSERT_MESSAGE = "INSERT INTO messages (id, project_id, role, content, created, metadata) VALUES (?, ?, ?, ?, ?, ?)"
+_TRIM_MESSAGES = (
+    "DELETE FROM messages WHERE project_id = ? AND id <= "
+    "(SELECT id FROM messages WHERE project_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)"
+)
+_SELECT_MESSAGES = "SELECT id, role, content, created, metadata FROM messages WHERE project_id = ? ORDER BY id DESC LIMIT ?"
+_DELETE_MESSAGES = "DELETE FROM messages WHERE project_id = ?"
+_UPSERT_FILE = "INSERT OR REPLACE INTO files (project_id, filename, content) VALUES (?, ?, ?)"
+_DELETE_FILE = "DELETE FROM files WHERE project_id = ? AND filename = ?"
+_DELETE_FILES = "DELETE FROM files WHERE project_id = ?"
+_SELECT_FILES = "SELECT filename, content FROM files WHERE project_id = ?"
+_UPSERT_SUMMARY = "INSERT OR REPLACE INTO summaries (project_id, text, through, turns, updated) VALUES (?, ?, ?, ?, ?)"
+_DELETE_SUMMARY = "DELETE FROM summaries WHERE project_id = ?"
+_SELECT_SUMMARY = "SELECT text, through, turns, updated FROM summaries WHERE project_id = ?"
+_LAST_MESSAGE_ID = "SELECT seq FROM sqlite_sequence WHERE name = 'messages'"
+
+_STOP = ("stop",)
+_NO_SUMMARY = ConversationSummary("", 0)  # Cached for projects without a summary
+
+
+class SQLiteContextStore(ContextStore):
+    """
+    Persistent context store backed by a local SQLite database.
+
+    Drop-in replacement for InMemoryContextStore. Writes are queued and
+    committed by a background thread in batches (one transaction per
+    batch), so add_message does not wait for the disk. Reads go through a
+    small LRU cache that writes keep up to date; a cache miss first waits
+    for queued writes to the same project, then reads the database, so
+    readers always see their own writes. WAL mode lets reads proceed while
+    the writer commits.
+
+    Projects are never evicted from the database; each keeps its newest
+    max_messages messages. Eviction hooks are called (reason "cache",
+    freed_bytes 0) when a project drops out of every read cache, so
+    derived state such as search indexes can be released and rebuilt on
+    the next use. Message ids are handed out here (they are the
+    messages' seq), so one store instance should own a database file.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        max_messages: int = MAX_MESSAGES_PER_PROJECT,
+        cache_projects: int = CACHE_PROJECTS,
+        cache_file_projects: int = CACHE_FILE_PROJECTS,
+        batch_size: int = BATCH_SIZE
+    ):
+        super().__init__()
+        self.path = path
+        self.max_messages = max_messages
+        self.cache_projects = cache_projects
+        self.cache_file_projects = cache_file_projects
+        self.batch_size = batch_size
+
+        self._histories: "OrderedDict[str, MessageHistory]" = OrderedDict()
+        self._files: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._summaries: "OrderedDict[str, ConversationSummary]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stripe_seq = [0] * _STRIPES
+        self._submitted = 0
+        self._applied = 0
+        self._applied_cond = threading.Condition()
+        self._queue: "queue.Queue[Tuple]" = queue.Queue()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._counters = {"cache_hits": 0, "cache_misses": 0, "batches": 0, "write_errors": 0}
+        self.last_error: Optional[str] = None
+        self._closed = False
+
+        writer = self._connect()
+        writer.executescript(_SCHEMA)
+        row = writer.execute(_LAST_MESSAGE_ID).fetchone()
+        self._last_id = row[0] if row else 0
+        self._writer = threading.Thread(target=self._write_loop, args=(writer,), name="sqlite-context-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """A connection per reading thread (sqlite3 connections are not safe to share concurrently)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    # Writes
+
+    def _submit(self, project_id: str, op: Tuple):
+        """Queue a write (caller holds self._lock)"""
+        if self._closed:
+            raise RuntimeError("Context store is closed")
+        self._submitted += 1
+        self._stripe_seq[hash(project_id) % _STRIPES] = self._submitted
+        self._queue.put(op)
+
+    def _write_loop(self, conn: sqlite3.Connection):
+        while True:
+            batch = [self._queue.get()]
+            # Group commit: take whatever queued up while the last batch was being written
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(op is _STOP for op in batch)
+            ops = [op for op in batch if op is not _STOP]
+            if ops and not self._apply(conn, ops) and len(ops) > 1:
+                # Retry one at a time so a single bad write doesn't take the rest of the batch with it
+                for op in ops:
+                    self._apply(conn, [op])
+            with self._applied_cond:
+                self._applied += len(ops)
+                self._applied_cond.notify_all()
+            if stop:
+                conn.close()
+                return
+
+    def _apply(self, conn: sqlite3.Connection, ops: List[Tuple]) -> bool:
+        """Write a batch in one transaction, keeping the order of operations; False if it was rolled back"""
+        rows: List[Tuple] = []
+        touched = set()
+        try:
+            conn.execute("BEGIN")
+            for op in ops:
+                kind = op[0]
+                if kind == "message":
+                    rows.append(op[1])
+                    touched.add(op[1][1])
+                    continue
+                if rows:
+                    conn.executemany(_INSERT_MESSAGE, rows)
+                    rows = []
+                if kind == "files":
+                    _, project_id, upserts, deletes, replace = op
+                    if replace:
+                        conn.execute(_DELETE_FILES, (project_id,))
+                    conn.executemany(_DELETE_FILE, [(project_id, name) for name in deletes])
+                    conn.executemany(_UPSERT_FILE, [(project_id, name, content) for name, content in upserts])
+                elif kind == "summary":
+                    conn.execute(_UPSERT_SUMMARY, op[1])
+                elif kind == "clear":
+                    conn.execute(_DELETE_MESSAGES, (op[1],))
+                    conn.execute(_DELETE_FILES, (op[1],))
+                    conn.execute(_DELETE_SUMMARY, (op[1],))
+            if rows:
+                conn.executemany(_INSERT_MESSAGE, rows)
+            for project_id in touched:
+                conn.execute(_TRIM_MESSAGES, (project_id, project_id, self.max_messages))
+            conn.execute("COMMIT")
+            self._counters["batches"] += 1
+            return True
+        except Exception as e:
+            # Not only sqlite3.Error: a bad value (e.g. a lone surrogate) must not kill the writer thread
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self._counters["write_errors"] += 1
+            self.last_error = str(e)
+            return False
+
+    def _wait_applied(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Wait until write seq is applied; gives up after timeout or if the writer thread has died"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._applied_cond:
+            while self._applied < seq:
+                if not self._writer.is_alive():
+                    return False
+                remaining = _LIVENESS_CHECK if deadline is None else min(deadline - time.monotonic(), _LIVENESS_CHECK)
+                if remaining <= 0:
+                    return False
+                self._applied_cond.wait(remaining)
+            return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write queued so far is committed"""
+        return self._wait_applied(self._submitted, timeout)
+
+    def add_message(self, project_id: str, role: str, content: str, metadata: Optional[Dict] = None):
+        """Add a message to the conversation history"""
+        message = ConversationMessage(role, content, project_id=project_id, metadata=metadata)
+        metadata_json = json.dumps(metadata, default=str) if metadata else None
+        with self._lock:
+            self._last_id += 1
+            message.seq = self._last_id
+            row = (message.seq, project_id, role, content, message.created, metadata_json)
+            history = self._histories.get(project_id)
+            if history is not None:
+                history.push(message, 0)
+                self._histories.move_to_end(project_id)
+            self._submit(project_id, ("message", row))
+
+    def set_file_context(self, project_id: str, files: Dict[str, str]):
+        """Store current file context for a project (only changed files are written when it is cached)"""
+        files = dict(files)  # Diffed against on the next call, so it must not change under us
+        with self._lock:
+            previous = self._files.get(project_id)
+            if previous is None:
+                op = ("files", project_id, list(files.items()), [], True)
+            else:
+                upserts = [(name, content) for name, content in files.items() if previous.get(name) != content]
+                deletes = [name for name in previous if name not in files]
+                op = ("files", project_id, upserts, deletes, False)
+            evicted = self._cache(self._files, project_id, files, self.cache_file_projects)
+            self._submit(project_id, op)
+        self._notify(evicted)
+
+    def set_summary(self, project_id: str, summary: ConversationSummary):
+        """Store the project's rolling conversation summary"""
+        row = (project_id, summary.text, summary.through, summary.turns, summary.updated)
+        with self._lock:
+            evicted = self._cache(self._summaries, project_id, summary, self.cache_projects)
+            self._submit(project_id, ("summary", row))
+        self._notify(evicted)
+    
+    def clear_project(self, project_id: str):
+        """Clear all context for a project"""
+        with self._lock:
+            self._histories.pop(project_id, None)
+            self._files.pop(project_id, None)
+            self._summaries.pop(project_id, None)
+            self._submit(project_id, ("clear", project_id))
+
+    # Reads
+
+    def _cache(self, cache: OrderedDict, key: str, value, capacity: int) -> List[Tuple[str, str, int]]:
+        """Cache value (caller holds self._lock); returns eviction events for projects no longer cached at all"""
+        cache[key] = value
+        cache.move_to_end(key)
+        evicted = []
+        while len(cache) > capacity:
+            dropped, _ = cache.popitem(last=False)
+            if dropped not in self._histories and dropped not in self._files and dropped not in self._summaries:
+                evicted.append((dropped, "cache", 0))
+        return evicted
+
+    def _read_through(self, cache: OrderedDict, project_id: str, load, capacity: int):
+        """Serve from cache, or wait for the project's queued writes, load and cache the result"""
+        with self._lock:
+            cached = cache.get(project_id)
+            if cached is not None:
+                cache.move_to_end(project_id)
+                self._counters["cache_hits"] += 1
+                return cached
+            self._counters["cache_misses"] += 1
+            stripe = hash(project_id) % _STRIPES
+            seq = self._stripe_seq[stripe]
+
+        self._wait_applied(seq)
+        value = load(self._reader(), project_id)
+        evicted = []
+        with self._lock:
+            # Only cache if no write to this stripe was queued meanwhile (it could be missing from value)
+            if self._stripe_seq[stripe] == seq:
+                evicted = self._cache(cache, project_id, value, capacity)
+        self._notify(evicted)
+        return value
+
+    def _load_history(self, conn: sqlite3.Connection, project_id: str) -> MessageHistory:
+        history = MessageHistory(self.max_messages)
+        rows = conn.execute(_SELECT_MESSAGES, (project_id, self.max_messages)).fetchall()
+        for seq, role, content, created, metadata in reversed(rows):
+            message = ConversationMessage(role, content, project_id=project_id,
+                                          metadata=json.loads(metadata) if metadata else None)
+            message.created = created
+            message.seq = seq
+            history.push(message, 0)
+        return history
+
+    @staticmethod
+    def _load_files(conn: sqlite3.Connection, project_id: str) -> Dict[str, str]:
+        return dict(conn.execute(_SELECT_FILES, (project_id,)).fetchall())
+
+    @staticmethod
+    def _load_summary(conn: sqlite3.Connection, project_id: str) -> ConversationSummary:
+        row = conn.execute(_SELECT_SUMMARY, (project_id,)).fetchone()
+        if row is None:
+            return _NO_SUMMARY
+        text, through, turns, updated = row
+        return ConversationSummary(text, int(through), turns, updated)
+    
+    def get_conversation(self, project_id: str, limit: int = 10) -> List[ConversationMessage]:
+        """Get recent conversation messages"""
+        history = self._read_through(self._histories, project_id, self._load_history, self.cache_projects)
+        with self._lock:
+            return history.tail(limit)
+
+    def get_file_context(self, project_id: str) -> Dict[str, str]:
+        """Get stored file context for a project"""
+        return self._read_through(self._files, project_id, self._load_files, self.cache_file_projects)
+    
+    def get_summary(self, project_id: str) -> Optional[ConversationSummary]:
+        """Get the project's rolling conversation summary, if any"""
+        summary = self._read_through(self._summaries, project_id, self._load_summary, self.cache_projects)
+        return summary if summary is not _NO_SUMMARY else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Write queue, cache and database size statistics"""
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "backend": "sqlite",
+                "path": self.path,
+                "pending_writes": self._submitted - self._applied,
+                "cached_projects": len(self._histories),
+                "cached_file_projects": len(self._files),
+                **self._counters,
+                "last_error": self.last_error,
+            }
+        stats["db_bytes"] = sum(
+            os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix)
+        )
+        return stats
+
+    def close(self):
+        """Commit queued writes, stop the writer and close connections"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._writer.join()
+        for conn in self._readers:
+            conn.close()
+        self._readers.clear()
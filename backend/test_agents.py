@@ -5,15 +5,19 @@ import pytest
 import os
 from unittest.mock import patch, MagicMock
 from agents.architect import ArchitectAgent
-from agents.engineer import EngineerAgent
-from agents.testsprite import TestSpriteAgent
+from agents.engineer import EngineerAgent, extract_code, split_batch_response, stitch
+from agents.testsprite import TestSpriteAgent, render_playwright_script
+from agents.refactorer import RefactorerAgent, RefactorSuggestion
+from agents.debugger import DebuggerAgent
 
 # Mock API config for all tests
 @pytest.fixture(autouse=True)
 def mock_api_config():
     with patch("agents.architect.api_config") as mock_config1, \
          patch("agents.engineer.api_config") as mock_config2, \
-         patch("agents.testsprite.api_config") as mock_config3:
+         patch("agents.testsprite.api_config") as mock_config3, \
+         patch("agents.refactorer.api_config") as mock_config4, \
+         patch("agents.debugger.api_config") as mock_config5:
         
         mock_llm = MagicMock()
         mock_llm.invoke.return_value.content = "Mocked response"
@@ -21,6 +25,8 @@ def mock_api_config():
         mock_config1.get_llm.return_value = mock_llm
         mock_config2.get_llm.return_value = mock_llm
         mock_config3.get_llm.return_value = mock_llm
+        mock_config4.get_llm.return_value = mock_llm
+        mock_config5.get_llm.return_value = mock_llm
         
         yield
 
@@ -38,14 +44,44 @@ class TestArchitectAgent:
     
     def test_plan_returns_structure(self):
         """Test that plan method returns correct structure"""
-        # Mock the LLM response to return valid JSON for planning
-        self.agent.llm.invoke.return_value.content = '{"tech_stack": "React", "files": {"index.html": "content"}}'
+        # Mock the streamed LLM response to return valid JSON for planning
+        self.agent.llm.stream.return_value = [
+            MagicMock(content='{"tech_stack": "React", '),
+            MagicMock(content='"files": {"index.html": "content"}}')
+        ]
         
         result = self.agent.plan("Create a simple calculator")
         
         assert isinstance(result, dict)
         assert "tech_stack" in result
         assert "files" in result
+    
+    def test_plan_dispatches_files_early(self):
+        """Test that each file entry is reported as soon as it is complete"""
+        seen = []
+        
+        def chunks():
+            yield MagicMock(content='{"tech_stack": "React", "files": {"App.tsx": "Root", ')
+            assert seen == [("App.tsx", "Root", "React", [])]
+            yield MagicMock(content='"index.html": {"description": "Shell", "depends_on": ["App.tsx"]}}}')
+        
+        self.agent.llm.stream.return_value = chunks()
+        
+        result = self.agent.plan("Create a simple calculator", on_file=lambda *entry: seen.append(entry))
+        
+        assert seen[-1] == ("index.html", "Shell", "React", ["App.tsx"])
+        assert result["files"] == {"App.tsx": "Root", "index.html": "Shell"}
+        assert result["dependencies"] == {"App.tsx": [], "index.html": ["App.tsx"]}
+    
+    def test_plan_recovers_malformed_json(self):
+        """Test that prose and trailing commas do not discard the plan"""
+        self.agent.llm.stream.return_value = [
+            MagicMock(content='Sure! Here is the plan:\n```json\n{"tech_stack": "Vue", "files": {"App.vue": "Root",},}\n```')
+        ]
+        
+        result = self.agent.plan("Create a todo app")
+        
+        assert result == {"tech_stack": "Vue", "files": {"App.vue": "Root"}, "dependencies": {"App.vue": []}}
 
 class TestEngineerAgent:
     """Test the Engineer Agent"""
@@ -72,6 +108,113 @@ class TestEngineerAgent:
         
         assert isinstance(code, str)
         assert len(code) > 0
+    
+    def test_split_batch_response(self):
+        """Test that only files with both delimiters and content are accepted"""
+        text = """=== FILE: styles.css ===
+```css
+body { margin: 0; }
+```
+=== END FILE: styles.css ===
+=== FILE: config.json ===
+
+=== END FILE: config.json ===
+=== FILE: index.html ===
+<html>"""
+        
+        files, missing = split_batch_response(text, ["styles.css", "config.json", "index.html", "README.md"])
+        
+        assert files == {"styles.css": "body { margin: 0; }"}
+        assert missing == ["config.json", "index.html", "README.md"]
+    
+    def test_write_files_batch_retries_missing(self):
+        """Test that a truncated batch falls back to single-file requests"""
+        self.agent.llm.invoke.side_effect = [
+            MagicMock(content="=== FILE: a.css ===\na {}\n=== END FILE: a.css ===\n=== FILE: b.json ===\n{\"na"),
+            MagicMock(content='{"name": "app"}'),
+        ]
+        
+        files = self.agent.write_files_batch({"a.css": "Styles", "b.json": "Config"}, "App", "HTML/CSS")
+        
+        assert files == {"a.css": "a {}", "b.json": '{"name": "app"}'}
+        assert self.agent.llm.invoke.call_count == 2
+
+    def test_truncated_batch_is_continued(self):
+        """Test that a batch cut off at the token limit is resumed before it is split"""
+        before = EngineerAgent.get_continuation_stats()
+        self.agent.llm.invoke.side_effect = [
+            MagicMock(
+                content="=== FILE: a.css ===\na {}\n=== END FILE: a.css ===\n=== FILE: b.json ===\n{\"na",
+                response_metadata={"finish_reason": "length"}
+            ),
+            MagicMock(content='me": "app"}\n=== END FILE: b.json ===', response_metadata={"finish_reason": "stop"}),
+        ]
+        
+        files = self.agent.write_files_batch({"a.css": "Styles", "b.json": "Config"}, "App", "HTML/CSS")
+        
+        assert files == {"a.css": "a {}", "b.json": '{"name": "app"}'}
+        assert "a.css, b.json" in self.agent.llm.invoke.call_args_list[1][0][0][1].content
+        after = EngineerAgent.get_continuation_stats()
+        assert after["requests"] - before["requests"] == 1
+        assert after["continuations"] - before["continuations"] == 1
+
+    def test_truncated_output_is_continued(self):
+        """Test that output cut off at the token limit is resumed and stitched"""
+        before = EngineerAgent.get_continuation_stats()
+        self.agent.llm.invoke.side_effect = [
+            MagicMock(content="function main() {\n    run(", response_metadata={"finish_reason": "length"}),
+            MagicMock(content="    run();\n}", response_metadata={"finish_reason": "stop"}),
+        ]
+        
+        code = self.agent.write_file("app.js", "Entry", "App", "JS")
+        
+        assert code == "function main() {\n    run();\n}"
+        tail_prompt = self.agent.llm.invoke.call_args_list[1][0][0][1].content
+        assert "cut off" in tail_prompt and "run(" in tail_prompt
+        after = EngineerAgent.get_continuation_stats()
+        assert after["truncated"] - before["truncated"] == 1
+        assert after["continuations"] - before["continuations"] == 1
+    
+    def test_continuations_are_capped(self):
+        """Test that a file that never finishes stops after MAX_CONTINUATIONS"""
+        before = EngineerAgent.get_continuation_stats()
+        self.agent.llm.invoke.return_value = MagicMock(content="x", response_metadata={"stop_reason": "max_tokens"})
+        
+        self.agent.write_file("app.js", "Entry", "App", "JS")
+        
+        assert self.agent.llm.invoke.call_count == 1 + EngineerAgent.MAX_CONTINUATIONS
+        assert EngineerAgent.get_continuation_stats()["unresolved"] - before["unresolved"] == 1
+    
+    def test_stitch_drops_repeated_overlap(self):
+        """Test overlap detection between a file and its continuation"""
+        assert stitch("a = 1;\nb = ", "b = 2;\n") == "a = 1;\nb = 2;\n"
+        assert stitch("a = 1;\n", "```js\nb = 2;") == "a = 1;\nb = 2;"
+        assert stitch("abc", "def") == "abcdef"
+
+    def test_stitch_keeps_short_coincidental_overlap(self):
+        """Test that a short overlap that is not a restated line is kept"""
+        existing = "function f() {\n  if (x) {\n    y()\n  }"
+
+        assert stitch(existing, "}\n") == existing + "}\n"
+        assert stitch("a = 1;\n}", "}\n") == "a = 1;\n}}\n"
+        assert stitch("const total = compute(", "compute(items);") == "const total = compute(compute(items);"
+
+    def test_extract_code_rejects_prose(self):
+        """Test that explanations are never taken as file content"""
+        assert extract_code("The header already uses blue, so no change is needed.", "src/Header.jsx") is None
+        assert extract_code("Done.", "styles.css") is None
+        assert extract_code("Here is the file:\n```css\nbody { color: blue; }\n```\nEnjoy!", "a.css") == "body { color: blue; }"
+        assert extract_code("FROM node:18 AS build\nRUN npm ci", "Dockerfile") == "FROM node:18 AS build\nRUN npm ci"
+        assert extract_code("node_modules\ndist", ".gitignore") == "node_modules\ndist"
+        assert extract_code("Run the app with npm start.", "README.md") == "Run the app with npm start."
+
+    def test_select_files_keeps_known_names(self):
+        """Test that only listed project files are selected, in order and up to the limit"""
+        self.agent.llm.invoke.return_value.content = "1. `src/App.jsx`\n- src/Missing.jsx\n- 404.html\n- index.html"
+
+        selected = self.agent.select_files("Add a dark mode", ["index.html", "404.html", "src/App.jsx"], 2)
+
+        assert selected == ["src/App.jsx", "404.html"]
 
 class TestTestSpriteAgent:
     """Test the TestSprite Agent"""
@@ -98,6 +241,158 @@ class TestTestSpriteAgent:
         
         assert isinstance(tests, str)
         assert len(tests) > 0
+    
+    def test_prompt_uses_ui_summary(self):
+        """Test that the prompt carries selectors instead of raw file previews"""
+        self.agent.llm.invoke.return_value.content = "test code"
+        body = "<body>" + "<p>filler</p>" * 50 + '<button id="save">Save</button></body>'
+        
+        self.agent.generate_tests({"index.html": body}, "Notes app")
+        
+        prompt = self.agent.llm.invoke.call_args[0][0][1].content
+        assert 'ids: #save' in prompt
+        assert 'buttons: "Save"' in prompt
+        assert "filler" not in prompt
+    
+    def test_generate_test_cases_filters_steps(self):
+        """Test that unknown actions and malformed cases are dropped"""
+        self.agent.llm.invoke.return_value.content = """```json
+{"tests": [
+  {"name": "saves", "steps": [{"action": "click", "selector": "#save"}, {"action": "hover", "selector": "#x"}]},
+  {"name": "bad", "steps": "click save"},
+  {"name": "empty", "steps": [{"action": "teleport"}]}
+]}
+```"""
+        
+        cases = self.agent.generate_test_cases({"index.html": "<button id='save'>Save</button>"}, "Notes")
+        
+        assert cases == [{"name": "saves", "path": "/", "steps": [{"action": "click", "selector": "#save"}]}]
+        assert render_playwright_script(cases) == """import { test, expect } from '@playwright/test';
+
+test("saves", async ({ page }) => {
+  await page.goto("/");
+  await page.click("#save");
+});
+"""
+
+class TestRefactorerAgent:
+    """Test the Refactorer Agent"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.agent = RefactorerAgent(user_api_key="test", user_provider="openai")
+        self.agent.SHARD_TOKEN_BUDGET = 100  # 400 characters per shard
+    
+    def test_shards_cover_every_file(self):
+        """Test that sharding keeps all files and splits oversized ones"""
+        files = {f"file{i}.js": "const x = 1;\n" * 10 for i in range(8)}
+        files["big.js"] = "let value = compute();\n" * 60
+        
+        shards = self.agent._build_shards(files)
+        labels = [label for shard in shards for label, _ in shard]
+        
+        assert all(f"file{i}.js" in labels for i in range(8))
+        assert any(label.startswith("big.js (part 1/") for label in labels)
+        assert "".join(c for shard in shards for l, c in shard if l.startswith("big.js")) == files["big.js"]
+        assert all(sum(len(c) for _, c in shard) <= 400 for shard in shards)
+    
+    def test_analyze_merges_shards(self):
+        """Test that shard results are deduplicated and size-weighted"""
+        responses = iter([
+            '{"overall_quality_score": 8.0, "summary": "A", "suggestions": ['
+            '{"file": "a.js", "description": "Use const", "before": "var x", "after": "const x", "priority": "low"}]}',
+            '{"overall_quality_score": 4.0, "summary": "B", "suggestions": ['
+            '{"file": "a.js", "description": "Use const!", "before": "var  x", "after": "const x", "priority": "low"},'
+            '{"file": "b.js", "description": "Avoid eval", "before": "eval(s)", "after": "", "priority": "high"}]}',
+        ])
+        self.agent.MAX_PARALLEL_SHARDS = 1
+        self.agent.llm.invoke.side_effect = lambda messages: MagicMock(content=next(responses), usage_metadata=None)
+        
+        result = self.agent.analyze({"a.js": "x" * 301, "b.js": "y" * 100})
+        
+        assert len(result.shard_stats) == 2
+        assert [s.file for s in result.suggestions] == ["b.js", "a.js"]
+        assert result.overall_quality_score == 7.0
+        assert all("duration_ms" in s and s["input_tokens"] > 0 for s in result.shard_stats)
+    
+    def test_summaries_keep_shard_numbers(self):
+        """Test that a failed shard does not renumber the summaries after it"""
+        responses = iter([
+            '{"overall_quality_score": 8.0, "summary": "A", "suggestions": []}',
+            "not json",
+            '{"overall_quality_score": 6.0, "summary": "C", "suggestions": []}',
+        ])
+        self.agent.MAX_PARALLEL_SHARDS = 1
+        self.agent.llm.invoke.side_effect = lambda messages: MagicMock(content=next(responses), usage_metadata=None)
+        
+        result = self.agent.analyze({"a.js": "x" * 300, "b.js": "y" * 300, "c.js": "z" * 300})
+        
+        assert result.summary == "[1/3] A [3/3] C"
+        assert result.shard_stats[1]["error"] == "parse_failed"
+    
+    def test_analyze_parse_failure(self):
+        """Test that unparseable responses fall back to a neutral score"""
+        self.agent.llm.invoke.return_value.content = "not json"
+        
+        result = self.agent.analyze({"a.js": "const a = 1;"})
+        
+        assert result.overall_quality_score == 5.0
+        assert result.shard_stats[0]["error"] == "parse_failed"
+    
+    def test_apply_refactorings_in_one_pass(self):
+        """Test that non-conflicting suggestions are applied and the rest reported"""
+        code = "var a = 1;\nvar b = 2;\nif (a == b) {}\n"
+        
+        def suggestion(before, after):
+            return RefactorSuggestion("style", "a.js", "", before, after, "low")
+        
+        suggestions = [
+            suggestion("var a", "const a"),
+            suggestion("a == b", "a === b"),
+            suggestion("var b = 2", "let b = 2"),
+            suggestion("1;\nvar b", "1;\nconst b"),   # overlaps the previous edit
+            suggestion("var a", "let a"),            # conflicts with the first edit
+            suggestion("missing()", "present()"),
+        ]
+        
+        result = self.agent.apply_refactorings(code, suggestions)
+        
+        assert result.content == "const a = 1;\nlet b = 2;\nif (a === b) {}\n"
+        assert len(result.applied) == 3
+        assert [reason for _, reason in result.skipped] == ["conflict", "not_found", "overlap"]
+        assert self.agent.apply_refactoring(code, suggestions[0]) == code.replace("var a", "const a", 1)
+
+class TestDebuggerAgent:
+    """Test the Debugger Agent"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.agent = DebuggerAgent(user_api_key="test", user_provider="openai")
+        self.files = {
+            "src/components/TodoList.jsx": "export default function TodoList({ items }) { return items.map(i => i); }",
+            "src/components/TodoItem.jsx": "export function TodoItem() { return null; }",
+            "src/utils/format.js": "export function formatDate(d) { return d.toISOString(); }",
+        }
+    
+    def test_affected_files_by_path_and_symbol(self):
+        """Test that files named by path or exported symbol are found, in order of mention"""
+        error = ("TypeError: Cannot read properties of undefined (reading 'map')\n"
+                 "    at TodoList (http://localhost:5173/src/components/TodoList.jsx:1:60)\n"
+                 "    at formatDate")
+        
+        affected = self.agent._extract_affected_files(error, self.files)
+        
+        assert affected[:2] == ["src/components/TodoList.jsx", "src/utils/format.js"]
+        assert "src/components/TodoItem.jsx" not in affected
+    
+    def test_affected_files_follow_file_changes(self):
+        """Test that the reference index picks up new and renamed exports"""
+        self.agent._extract_affected_files("boom", self.files)
+        files = dict(self.files)
+        files["src/utils/format.js"] = "export function formatTime(d) { return d.getTime(); }"
+        
+        assert self.agent._extract_affected_files("ReferenceError: formatDate is not defined", files) == []
+        assert self.agent._extract_affected_files("at formatTime", files) == ["src/utils/format.js"]
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
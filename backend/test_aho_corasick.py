@@ -0,0 +1,51 @@
+"""
+Unit tests for the Aho-Corasick matcher
+"""
+import pytest
+from aho_corasick import AhoCorasick
+
+
+class TestAhoCorasick:
+    """Test multi-pattern matching"""
+
+    def test_overlapping_matches(self):
+        """Test that overlapping and nested patterns are all reported"""
+        matcher = AhoCorasick(["he", "she", "hers", "his"])
+
+        matches = sorted(matcher.iter_matches("ushers"))
+
+        assert matches == [(1, 4, 1), (2, 4, 0), (2, 6, 2)]
+
+    def test_first_occurrences(self):
+        """Test that the leftmost span of each pattern is returned"""
+        matcher = AhoCorasick(["ab", "b"])
+
+        assert matcher.first_occurrences("xabab") == {0: (1, 3), 1: (2, 3)}
+
+    def test_case_insensitive(self):
+        """Test matching ignoring case"""
+        matcher = AhoCorasick(["Header"], case_sensitive=False)
+
+        assert [m[:2] for m in matcher.iter_matches("the HEADER and header")] == [(4, 10), (15, 21)]
+
+    def test_case_insensitive_offsets_survive_length_changes(self):
+        """Test that characters whose lowercase is longer do not shift match offsets"""
+        text = "İİ Header ΟΔΟΣ"
+        matcher = AhoCorasick(["header", "οδοσ", "İ"], case_sensitive=False)
+
+        matches = sorted(matcher.iter_matches(text))
+
+        assert matches == [(0, 1, 2), (1, 2, 2), (3, 9, 0), (10, 14, 1)]
+        assert [text[start:end] for start, end, _ in matches] == ["İ", "İ", "Header", "ΟΔΟΣ"]
+
+    def test_add_after_build(self):
+        """Test that patterns added later are matched after a rebuild"""
+        matcher = AhoCorasick(["app"])
+        matcher.add("pp")
+
+        assert sorted(m[2] for m in matcher.iter_matches("apps")) == [0, 1]
+        assert len(matcher) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
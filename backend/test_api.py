@@ -3,7 +3,7 @@ Test suite for CodeGenesis backend API
 """
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from main import app
 
 client = TestClient(app)
@@ -37,6 +37,13 @@ class TestHealthEndpoints:
         data = response.json()
         assert data["status"] == "healthy"
         assert "agents" in data
+    
+    def test_context_stats(self):
+        """Test context store memory stats endpoint"""
+        response = client.get("/api/context/stats")
+        assert response.status_code == 200
+        data = response.json()
+        assert {"projects", "total_bytes", "evictions", "tenants", "summaries", "prompts"} <= set(data)
 
 class TestGenerateEndpoint:
     """Test code generation endpoint"""
@@ -77,6 +84,54 @@ class TestGenerateEndpoint:
             assert "files" in data
             assert data["status"] == "Completed"
 
+    def test_deferred_quality_not_found(self):
+        """Test fetching deferred results for an unknown generation"""
+        response = client.get("/api/generate/unknown-id/quality")
+        assert response.status_code == 200
+        assert response.json()["error"] == "GENERATION_NOT_FOUND"
+    
+    def test_deferred_quality_pending(self):
+        """Test fetching deferred results while stages are still running"""
+        with patch("main.get_deferred_result") as mock_result:
+            mock_result.return_value = {"generation_id": "abc", "status": "pending"}
+            
+            response = client.get("/api/generate/abc/quality")
+            assert response.status_code == 200
+            assert response.json()["status"] == "pending"
+
+class TestEditEndpoint:
+    """Test follow-up edit endpoint"""
+
+    def test_edit_requires_auth(self):
+        """Test that edit endpoint requires API key"""
+        response = client.post(
+            "/api/edit",
+            json={"files": {"index.html": "<html></html>"}, "change_request": "Add a title"}
+        )
+        assert response.status_code == 200
+        assert response.json()["error"] == "API_KEY_REQUIRED"
+
+    def test_edit_with_auth(self):
+        """Test that the request is passed to the orchestrator"""
+        with patch("orchestrator.CodeGenesisOrchestrator.edit_app") as mock_edit:
+            mock_edit.return_value = {"files": {"index.html": "<html><title>T</title></html>"}, "status": "Edit complete"}
+
+            response = client.post(
+                "/api/edit",
+                json={
+                    "files": {"index.html": "<html></html>"},
+                    "change_request": "Add a title",
+                    "project_id": "p1",
+                    "user_api_key": "test-key",
+                    "user_provider": "openai"
+                }
+            )
+            assert response.status_code == 200
+            assert response.json()["status"] == "Edit complete"
+            mock_edit.assert_called_once_with(
+                {"index.html": "<html></html>"}, "Add a title", project_id="p1", tech_stack=None
+            )
+
 class TestChatEndpoint:
     """Test chatbot endpoint"""
     
@@ -90,5 +145,25 @@ class TestChatEndpoint:
         data = response.json()
         assert "response" in data
 
+    def test_smart_chat_with_project(self):
+        """Test that project chats are built server-side and report prefix reuse"""
+        from context_manager import context_manager
+        context_manager.clear_project_context("chat-p1")
+        context_manager.update_project_files("chat-p1", {"src/Header.jsx": "export function Header() {}"})
+
+        with patch("main.ModelRouter") as mock_router:
+            mock_router.return_value.route_request = AsyncMock(
+                return_value={"content": "Done", "model_used": "m", "provider": "p"}
+            )
+            body = {"message": "make the header blue", "project_id": "chat-p1", "pinned_files": ["src/Header.jsx"]}
+            first = client.post("/api/chat/smart", json=body).json()
+            second = client.post("/api/chat/smart", json={**body, "message": "now sticky"}).json()
+
+        messages = mock_router.return_value.route_request.call_args.args[0]
+        assert [m.content for m in messages[-3:]] == ["make the header blue", "Done", "now sticky"]
+        assert first["prompt"]["reused_tokens"] == 0 and second["prompt"]["prefix_reuse"] > 0.5
+        assert "latency_ms" in second
+        context_manager.clear_project_context("chat-p1")
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,211 @@
+"""
+Unit tests for code symbol extraction
+"""
+import pytest
+from code_symbols import (
+    extract_interface, format_interfaces, import_graph, find_dependents, extract_ui_summary, chunk_file,
+    extract_symbols, MAX_CHUNK_LINES
+)
+
+
+class TestExtractInterface:
+    """Test export and signature summaries"""
+
+    def test_typescript_exports(self):
+        """Test that exported functions, constants and types are summarized"""
+        code = """import React from 'react';
+
+export default function App({ title }: Props) {
+    return <h1>{title}</h1>;
+}
+export const useCounter = (start: number) => {
+    return start;
+};
+export interface Props { title: string }
+function internal() {}
+"""
+        summary = extract_interface("App.tsx", code).split("\n")
+
+        assert summary == [
+            "export default function App({ title }: Props)",
+            "export const useCounter = (start: number) =>",
+            "export interface Props",
+        ]
+
+    def test_python_css_and_html(self):
+        """Test summaries for other languages"""
+        assert extract_interface("util.py", "def load(path: str) -> dict:\n    pass\n") == "def load(path: str) -> dict"
+        assert extract_interface("style.css", ".card { } #main .btn:hover { }") == ".card #main .btn"
+        assert extract_interface("index.html", '<div id="root"></div><script src="app.js"></script>') == "ids: #root\nloads: app.js"
+
+    def test_summary_is_capped(self):
+        """Test that long summaries are truncated"""
+        code = "\n".join(f"export const value{i} = {i};" for i in range(200))
+
+        summary = extract_interface("values.js", code, max_chars=100)
+
+        assert len(summary) <= 104
+        assert summary.endswith("...")
+
+    def test_format_interfaces(self):
+        """Test that summaries are formatted per file and missing files skipped"""
+        files = {"a.js": "export function a() {}", "b.json": "{}"}
+
+        assert format_interfaces(files, ["a.js", "b.json", "c.js"]) == "### a.js\nexport function a()\n\n### b.json\n(no exports)"
+
+
+class TestExtractSymbols:
+    """Test exported name extraction"""
+
+    def test_js_exports(self):
+        """Test declared, listed, default and CommonJS exports"""
+        content = (
+            "export default function App() {}\n"
+            "export const useAuth = () => null;\n"
+            "const helper = 1, other = 2;\n"
+            "export { helper, other as renamed };\n"
+        )
+
+        assert extract_symbols("src/App.jsx", content) == ["App", "useAuth", "helper", "renamed"]
+        assert extract_symbols("util.js", "module.exports = { validate, format };") == ["validate", "format"]
+
+    def test_python_public_names(self):
+        """Test that only public top-level functions and classes are exported"""
+        content = "def run():\n    def inner(): pass\n\nclass Config:\n    pass\n\ndef _private(): pass\n"
+
+        assert extract_symbols("app.py", content) == ["run", "Config"]
+        assert extract_symbols("styles.css", ".nav { color: red; }") == []
+
+
+class TestImportGraph:
+    """Test import resolution and dependent lookup"""
+
+    FILES = {
+        "index.html": '<script type="module" src="/src/main.tsx"></script>',
+        "src/main.tsx": "import App from './App';\nimport './styles.css';",
+        "src/App.tsx": "import { Header } from './components/Header';",
+        "src/components/Header.tsx": "import { api } from '../lib/api';\nconst m = await import('@/lib/api');",
+        "src/lib/api.ts": "export const api = {};",
+        "src/styles.css": "@import './base.css';",
+        "src/base.css": "body {}",
+    }
+
+    def test_imports_resolve_to_project_files(self):
+        """Test relative, root and alias imports across file types"""
+        graph = import_graph(self.FILES)
+
+        assert graph["index.html"] == {"src/main.tsx"}
+        assert graph["src/main.tsx"] == {"src/App.tsx", "src/styles.css"}
+        assert graph["src/components/Header.tsx"] == {"src/lib/api.ts"}
+        assert graph["src/styles.css"] == {"src/base.css"}
+        assert graph["src/lib/api.ts"] == set()
+
+    def test_dependents_are_transitive(self):
+        """Test that every importer up the chain is a dependent"""
+        assert find_dependents(self.FILES, ["src/lib/api.ts"]) == {
+            "src/components/Header.tsx", "src/App.tsx", "src/main.tsx", "index.html"
+        }
+        assert find_dependents(self.FILES, ["src/base.css"]) == {"src/styles.css", "src/main.tsx", "index.html"}
+
+    def test_python_relative_imports(self):
+        """Test Python package-relative and absolute imports"""
+        files = {"pkg/app.py": "from .util import x\nimport pkg.db", "pkg/util.py": "", "pkg/db.py": ""}
+
+        assert import_graph(files)["pkg/app.py"] == {"pkg/util.py", "pkg/db.py"}
+        assert find_dependents(files, ["pkg/db.py"]) == {"pkg/app.py"}
+
+
+class TestUiSummary:
+    """Test the UI structure summaries used for test generation"""
+
+    def test_jsx_summary(self):
+        """Test components, selectors, fields, buttons and routes in JSX"""
+        code = """export default function TodoApp() {
+  return (
+    <div id="app" data-testid="todo-app">
+      <h1>My {count} Todos</h1>
+      <input type="text" name="title" placeholder="What needs doing?" onChange={(e) => set(e.target.value)} />
+      <button type="submit" data-testid="add-btn">Add <Icon /></button>
+      <button aria-label="Clear all" onClick={() => clear()}>{icon}</button>
+      <Route path="/about" element={<About />} />
+      <Link to="/settings">Settings</Link>
+    </div>
+  );
+}"""
+
+        assert extract_ui_summary("src/App.tsx", code).split("\n") == [
+            "components: TodoApp",
+            "ids: #app",
+            "testids: todo-app add-btn",
+            'fields: input[type=text][name=title][placeholder="What needs doing?"]',
+            'buttons: "Add"[submit], "Clear all"',
+            'headings: h1 "My Todos"',
+            "routes: /about /settings",
+        ]
+
+    def test_file_based_routes_and_non_ui_files(self):
+        """Test Next.js routes from file paths and that plain modules have no summary"""
+        page = "export default function Page() { return <h2>Dashboard</h2>; }"
+
+        assert extract_ui_summary("app/(admin)/dashboard/page.tsx", page).endswith("routes: /dashboard")
+        assert extract_ui_summary("src/api.ts", "export const get = () => fetch('/x');") == ""
+        assert extract_ui_summary("styles.css", "#app { color: red; }") == ""
+
+
+class TestChunkFile:
+    """Test symbol-level chunking"""
+
+    def test_js_symbols(self):
+        """Test that components, hooks and constants become chunks with line ranges"""
+        code = """import React from 'react';
+
+const API = '/api';
+const LIMIT = 10;
+
+// Page header
+export function Header({ title }) {
+  return <h1>{title}</h1>;
+}
+
+export const useTodos = () => {
+  return [];
+};
+"""
+        chunks = chunk_file("src/App.jsx", code)
+
+        assert [(c.name, c.kind, c.start_line, c.end_line) for c in chunks] == [
+            ("(module)", "module", 1, 1),
+            ("API, LIMIT", "group", 3, 4),
+            ("Header", "component", 6, 9),
+            ("useTodos", "function", 11, 13),
+        ]
+        assert chunks[2].text.startswith("// Page header\nexport function Header")
+        assert chunks[2].location == "src/App.jsx:6-9"
+
+    def test_python_and_css(self):
+        """Test Python defs with decorators and CSS rule blocks"""
+        py = "import os\n\n@cache\ndef load():\n    pass\n\n\nclass Store:\n    pass\n"
+        css = "/* base */\nbody { margin: 0; }\n.nav,\n.nav a { color: blue; }\n@media (max-width: 600px) {\n  .nav { display: none; }\n}\n"
+
+        assert [(c.name, c.start_line) for c in chunk_file("app.py", py)] == [
+            ("(module)", 1), ("load", 3), ("Store", 8)
+        ]
+        assert [(c.name, c.kind, c.start_line, c.end_line) for c in chunk_file("styles.css", css)] == [
+            ("body", "rule", 1, 2),
+            (".nav, .nav a", "rule", 3, 4),
+            ("@media (max-width: 600px)", "at-rule", 5, 7),
+        ]
+
+    def test_long_symbols_and_other_files(self):
+        """Test that long symbols are split into parts and other files into windows"""
+        code = "export function Big() {\n" + "  step();\n" * (MAX_CHUNK_LINES + 10) + "}\n"
+
+        parts = chunk_file("big.js", code)
+
+        assert [c.name for c in parts] == ["Big (1/2)", "Big (2/2)"]
+        assert parts[1].start_line == MAX_CHUNK_LINES + 1
+        assert [c.name for c in chunk_file("index.html", "<p>hi</p>\n" * 50)] == ["lines 1-40", "lines 41-50"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,412 @@
+"""
+Unit tests for the context store and manager
+"""
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from context_manager import (
+    InMemoryContextStore, ContextManager, ConversationMessage, ConversationSummary, LLMSummarizer, estimate_tokens
+)
+
+
+FILES = {
+    "src/components/Header.jsx": "export function Header() { return <header className='nav'>Logo</header>; }",
+    "src/components/LoginForm.jsx": "export function LoginForm() { const [email, setEmail] = useState(''); validate(email); }",
+    "src/utils/validate.js": "export function validate(value) { return value.includes('@'); }",
+    "src/styles.css": "body { color: black; } .nav { color: blue; }",
+}
+
+
+class TestInMemoryContextStore:
+    """Test bounded storage, LRU eviction and byte accounting"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.evicted = []
+        self.store = InMemoryContextStore(max_conversations=3, max_messages=5,
+                                          max_project_bytes=1000, max_total_bytes=2500)
+        self.store.add_eviction_hook(lambda *event: self.evicted.append(event))
+
+    def test_bytes_are_accounted(self):
+        """Test that messages and files are counted per project and in total"""
+        self.store.add_message("p1", "user", "hello")
+        self.store.set_file_context("p1", {"a.js": "x" * 100})
+
+        tenant = self.store.stats()["tenants"]["p1"]
+        assert tenant == {"bytes": 109, "message_bytes": 5, "file_bytes": 104, "summary_bytes": 0, "messages": 1, "files": 1}
+        assert self.store.total_bytes == 109
+
+        self.store.set_file_context("p1", {"a.js": "x"})
+        assert self.store.total_bytes == 10
+
+    def test_stored_files_are_a_copy(self):
+        """Test that editing the caller's dict in place does not change what is stored"""
+        files = {"a.js": "old"}
+        self.store.set_file_context("p1", files)
+        files["a.js"] = "x" * 5000
+
+        assert self.store.get_file_context("p1") == {"a.js": "old"}
+        self.store.set_file_context("p1", files)
+        assert self.store.get_file_context("p1") == {} and self.store.total_bytes == 0
+
+    def test_project_count_evicts_least_recently_used(self):
+        """Test that the oldest untouched project is evicted when over max_conversations"""
+        for project_id in ("p1", "p2", "p3"):
+            self.store.add_message(project_id, "user", "hi")
+        self.store.get_conversation("p1")  # p2 is now least recently used
+        self.store.add_message("p4", "user", "hi")
+
+        assert set(self.store.stats()["tenants"]) == {"p1", "p3", "p4"}
+        assert self.evicted == [("p2", "count", 2)]
+        assert self.store.get_conversation("p2") == []
+
+    def test_used_projects_get_a_second_chance(self):
+        """Test that a project read since the last eviction pass survives it, and reads don't revive evicted ones"""
+        for project_id in ("p1", "p2", "p3", "p4"):
+            self.store.add_message(project_id, "user", "hi")
+        self.store.get_conversation("p3")
+        self.store.add_message("p5", "user", "hi")
+        self.store.add_message("p6", "user", "hi")
+
+        assert [victim for victim, _, _ in self.evicted] == ["p1", "p2", "p4"]
+        assert self.store.get_conversation("p4") == []
+        assert set(self.store.stats()["tenants"]) == {"p3", "p5", "p6"}
+
+    def test_total_bytes_evicts(self):
+        """Test that projects are evicted until the total fits"""
+        self.store.set_file_context("p1", {"a": "x" * 900})
+        self.store.set_file_context("p2", {"a": "x" * 900})
+        self.store.set_file_context("p3", {"a": "x" * 900})
+
+        assert list(self.store.stats()["tenants"]) == ["p3", "p2"]
+        assert self.evicted == [("p1", "bytes", 901)]
+        assert self.store.total_bytes == 1802
+
+    def test_project_budget_trims_oldest_messages(self):
+        """Test that messages are trimmed by count and by the project byte budget"""
+        for i in range(7):
+            self.store.add_message("p1", "user", f"m{i}")
+        assert [m.content for m in self.store.get_conversation("p1", 10)] == ["m2", "m3", "m4", "m5", "m6"]
+
+        self.store.set_file_context("p1", {"a": "x" * 994})
+        assert [m.content for m in self.store.get_conversation("p1", 10)] == ["m5", "m6"]
+        assert self.store.stats()["tenants"]["p1"]["bytes"] <= 1000
+
+    def test_oversized_files_are_not_kept(self):
+        """Test that a file set larger than the project budget is rejected with a hook call"""
+        self.store.add_message("p1", "user", "keep me")
+        self.store.set_file_context("p1", {"big": "x" * 2000})
+
+        assert self.store.get_file_context("p1") == {}
+        assert self.store.get_conversation("p1")[0].content == "keep me"
+        assert self.evicted == [("p1", "oversize", 2003)]
+        assert self.store.total_bytes == 7
+
+    def test_summary_counts_toward_budgets(self):
+        """Test that storing a summary trims messages and evicts like other writes"""
+        self.store.add_eviction_hook(lambda *event: self.store.stats())  # Hooks run outside the lock
+        for i in range(5):
+            self.store.add_message("p1", "user", f"{i}" * 190)
+        self.store.set_summary("p1", ConversationSummary("s" * 300, through=2))
+
+        assert [m.content[0] for m in self.store.get_conversation("p1", 10)] == ["2", "3", "4"]
+        assert self.store.stats()["tenants"]["p1"]["bytes"] == 870
+
+        self.store.set_file_context("p2", {"a": "x" * 999})
+        self.store.set_file_context("p3", {"a": "x" * 599})
+        self.store.set_summary("p1", ConversationSummary("s" * 400, through=2))
+
+        assert self.evicted == [("p2", "bytes", 1000)]
+        assert list(self.store.stats()["tenants"]) == ["p1", "p3"]
+        assert self.store.total_bytes == sum(t["bytes"] for t in self.store.stats()["tenants"].values())
+
+
+class TestConversationHistory:
+    """Test ring-buffer histories and message compression"""
+
+    def test_ring_buffer_keeps_newest(self):
+        """Test that a full history drops its oldest message and keeps byte counts exact"""
+        store = InMemoryContextStore(max_messages=3)
+        for i in range(5):
+            store.add_message("p1", "user", f"m{i}")
+
+        assert [m.content for m in store.get_conversation("p1", 10)] == ["m2", "m3", "m4"]
+        assert [m.content for m in store.get_conversation("p1", 2)] == ["m3", "m4"]
+        assert store.total_bytes == 6
+
+    def test_old_bodies_are_compressed(self):
+        """Test that messages outside the hot window are stored compressed"""
+        store = InMemoryContextStore(compress=True, hot_messages=2)
+        body = "the header should use the brand colour " * 20
+        for i in range(4):
+            store.add_message("p1", "assistant", f"{i} {body}")
+
+        history = store.get_conversation("p1", 10)
+        assert [m.compressed for m in history] == [True, True, False, False]
+        assert history[0].content == f"0 {body}"
+        assert history[0].size < len(body) / 5
+        assert store.total_bytes == sum(m.size for m in history)
+
+    def test_message_record(self):
+        """Test the slotted message keeps the public fields"""
+        message = ConversationMessage("user", "hi", project_id="p1", metadata={"files": ["a.js"]})
+
+        assert not hasattr(message, "__dict__")
+        assert message.timestamp.year >= 2024
+        assert message.size == 2 + len('{"files": ["a.js"]}')
+        assert message.compress() == 0 and message.content == "hi"
+
+
+class TestContextManagerEviction:
+    """Test that derived state follows store evictions"""
+
+    def test_indexes_dropped_on_eviction(self):
+        """Test that search indexes of evicted projects are released"""
+        manager = ContextManager(InMemoryContextStore(max_conversations=1))
+        manager.update_project_files("p1", {"Header.jsx": "export function Header() {}"})
+        assert manager.get_relevant_files("p1", "header")
+
+        manager.update_project_files("p2", {"Footer.jsx": "export function Footer() {}"})
+
+        assert "p1" not in manager._indexes and "p1" not in manager._chunk_indexes
+        assert manager.get_relevant_files("p1", "header") == {}
+
+
+class TestAssembleContext:
+    """Test token-budgeted prompt assembly"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.manager = ContextManager()
+        self.manager.update_project_files("p1", FILES)
+        for i in range(4):
+            self.manager.add_conversation("p1", "user" if i % 2 == 0 else "assistant", f"turn {i} " + "details " * 40)
+
+    def test_respects_budget_and_reports_drops(self):
+        """Test that the prompt fits the budget and every candidate is accounted for"""
+        assembled = self.manager.assemble_context("p1", "email validation", budget=150)
+
+        assert assembled.tokens <= 150
+        assert estimate_tokens(assembled.prompt) == assembled.tokens
+        assert "file tree" in assembled.included
+        assert "src/components/LoginForm.jsx:1-1" in assembled.included
+        assert "turn -4" in assembled.dropped
+        assert set(assembled.included).isdisjoint(assembled.dropped)
+
+    def test_large_budget_keeps_everything_in_section_order(self):
+        """Test that sections are laid out in a fixed order with turns chronological"""
+        assembled = self.manager.assemble_context("p1", "email validation", budget=10000)
+
+        assert assembled.dropped == []
+        prompt = assembled.prompt
+        assert prompt.index("## Project Files:") < prompt.index("## Relevant Code:") < prompt.index("## Previous")
+        assert prompt.index("turn 0") < prompt.index("turn 3")
+
+    def test_memoized_per_project_version(self):
+        """Test that the assembled prompt is reused until files or conversation change"""
+        first = self.manager.assemble_context("p1", "email", budget=500)
+
+        assert self.manager.assemble_context("p1", "email", budget=500) is first
+        self.manager.update_project_files("p1", dict(FILES))
+        assert self.manager.assemble_context("p1", "email", budget=500) is first
+
+        self.manager.add_conversation("p1", "user", "also check the header")
+        assert self.manager.assemble_context("p1", "email", budget=500) is not first
+
+    def test_build_context_prompt_with_budget(self):
+        """Test that build_context_prompt delegates to the assembler when given a budget"""
+        prompt = self.manager.build_context_prompt("p1", query="email", budget=80)
+
+        assert estimate_tokens(prompt) <= 80
+
+
+class FakeSummarizer:
+    """Records calls and appends the folded turns to the summary"""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, summary, messages):
+        self.calls.append((summary, [m.content for m in messages]))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return " ".join(filter(None, [summary] + [m.content for m in messages]))
+
+
+class TestRollingSummary:
+    """Test incremental conversation summaries"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.summarizer = FakeSummarizer()
+        self.manager = ContextManager(summarizer=self.summarizer, summary_window=4, summary_batch=1)
+
+    def teardown_method(self):
+        """Stop background summary workers"""
+        self.manager.close()
+
+    def add_turns(self, count, start=0):
+        for i in range(start, start + count):
+            self.manager.add_conversation("p1", "user" if i % 2 == 0 else "assistant", f"t{i}")
+        assert self.manager.wait_for_summaries(5)
+
+    def test_folds_turns_leaving_the_window(self):
+        """Test that each turn is summarized once, in order, as it leaves the window"""
+        self.add_turns(8)
+
+        folded = [turn for _, turns in self.summarizer.calls for turn in turns]
+        assert folded == ["t0", "t1", "t2", "t3"]
+        assert self.manager.store.get_summary("p1").turns == 4
+        assert self.manager.summary_stats()["updates"] == len(self.summarizer.calls)
+
+    def test_turns_with_equal_timestamps_are_all_folded(self):
+        """Test that turns are tracked by sequence number, not wall-clock time"""
+        with patch("context_manager.time.time", return_value=1000.0):
+            self.add_turns(8)
+
+        folded = [turn for _, turns in self.summarizer.calls for turn in turns]
+        assert folded == ["t0", "t1", "t2", "t3"]
+        assert self.manager.store.get_summary("p1").through == 4
+
+    def test_context_is_summary_plus_recent_turns(self):
+        """Test that prompts carry the summary and only the window of recent turns"""
+        self.add_turns(8)
+
+        context = self.manager.get_conversation_context("p1", limit=4)
+        assert context.startswith("## Conversation Summary:\nt0 t1 t2 t3")
+        assert "**User**: t4" in context and "t3" not in context.split("## Previous Conversation:")[1]
+        assert self.manager.summarize_conversation("p1") == "t0 t1 t2 t3"
+
+    def test_waits_for_a_batch(self):
+        """Test that turns leaving the window are not summarized before a full batch"""
+        manager = ContextManager(summarizer=self.summarizer, summary_window=4, summary_batch=3)
+        for i in range(6):
+            manager.add_conversation("p1", "user", f"t{i}")
+        manager.close()
+
+        assert self.summarizer.calls == [] and manager.store.get_summary("p1") is None
+
+    def test_failures_keep_previous_summary(self):
+        """Test that summarizer errors are counted and the history stays intact"""
+        self.add_turns(6)
+        self.summarizer.fail = True
+        self.add_turns(2, start=6)
+
+        stats = self.manager.summary_stats()
+        assert stats["errors"] >= 1 and stats["last_error"] == "model unavailable"
+        assert self.manager.store.get_summary("p1").text == "t0 t1"
+
+    def test_clear_discards_summary(self):
+        """Test that clearing a project drops its summary, including one still being written"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow(summary, messages):
+            started.set()
+            release.wait(5)
+            return "stale"
+
+        self.manager.summarizer = slow
+        for i in range(6):
+            self.manager.add_conversation("p1", "user", f"t{i}")
+        assert started.wait(5)
+        self.manager.clear_project_context("p1")
+        release.set()
+        self.manager.wait_for_summaries(5)
+
+        assert self.manager.store.get_summary("p1") is None
+
+    def test_without_summarizer_uses_topics(self):
+        """Test the keyword fallback when no summarizer is configured"""
+        manager = ContextManager()
+        for i in range(6):
+            manager.add_conversation("p1", "user", "style the login form")
+
+        assert manager.summarize_conversation("p1").startswith("Conversation topics:")
+        assert not manager.update_summary("p1")
+
+    @patch('context_manager.api_config')
+    def test_llm_summarizer_uses_platform_model(self, mock_config):
+        """Test that the LLM summarizer sends the previous summary and new turns to the platform LLM"""
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = MagicMock(content="User wants a sticky header.")
+        mock_config.get_llm.return_value = mock_llm
+
+        summarizer = LLMSummarizer()
+        result = summarizer("Building a blog.", [ConversationMessage("user", "make the header sticky")])
+
+        assert result == "User wants a sticky header."
+        assert mock_config.get_llm.call_args.kwargs["context"] == "platform"
+        prompt = mock_llm.invoke.call_args.args[0][1].content
+        assert "Building a blog." in prompt and "User: make the header sticky" in prompt
+
+
+class TestChatPrompt:
+    """Test prefix-stable chat prompts"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.manager = ContextManager(summary_window=2)
+        self.manager.update_project_files("p1", {"src/App.jsx": "export default function App() {}",
+                                                 "src/Header.jsx": "export function Header() {}"})
+
+    def chat(self, message, answer="ok", **kwargs):
+        prompt = self.manager.build_chat_prompt("p1", message, "You are helpful.", **kwargs)
+        self.manager.add_conversation("p1", "user", message)
+        self.manager.add_conversation("p1", "assistant", answer)
+        return prompt
+
+    def test_sections_in_stable_order(self):
+        """Test system, file tree, pinned files, summary, turns, then the message"""
+        self.manager.store.set_summary("p1", ConversationSummary("Building a blog.", through=0))
+        prompt = self.manager.build_chat_prompt("p1", "make it blue", "You are helpful.",
+                                                pinned_files=["src/Header.jsx", "missing.js"])
+
+        contents = [m.content for m in prompt.messages]
+        assert contents[0] == "You are helpful."
+        assert contents[1] == "## Project Files:\nsrc/App.jsx\nsrc/Header.jsx"
+        assert contents[2].startswith("## Pinned Files:\n### src/Header.jsx") and "missing.js" not in contents[2]
+        assert contents[3] == "## Conversation Summary:\nBuilding a blog."
+        assert contents[-1] == "make it blue" and prompt.messages[-1].type == "human"
+
+    def test_follow_up_reuses_previous_prompt(self):
+        """Test that a follow-up turn repeats the whole previous prompt as its prefix"""
+        first = self.chat("make the header blue", pinned_files=["src/Header.jsx"])
+        second = self.chat("now make it sticky", pinned_files=["src/Header.jsx"])
+
+        assert first.reused_tokens == 0
+        previous = sum(estimate_tokens(m.content) for m in first.messages)
+        assert second.reused_tokens == previous and second.prefix_reuse > 0.8
+        assert [m.type for m in second.messages[-3:]] == ["human", "ai", "human"]
+
+    def test_turns_are_trimmed_in_blocks(self):
+        """Test that the turn list only grows between moves of its start"""
+        firsts = []
+        for i in range(6):
+            prompt = self.chat(f"q{i}", f"a{i}")
+            turns = [m.content for m in prompt.messages[2:-1]]
+            assert len(turns) <= 4
+            firsts.append(turns[0] if turns else None)
+
+        assert firsts == [None, "q0", "q0", "q2", "q2", "q4"]
+
+    def test_turns_start_after_summary(self):
+        """Test that summarized turns are not repeated verbatim"""
+        self.chat("q0", "a0")
+        through = self.manager.store.get_conversation("p1", 1)[0].seq
+        self.manager.store.set_summary("p1", ConversationSummary("Asked q0.", through=through))
+        prompt = self.chat("q1")
+
+        assert [m.content for m in prompt.messages[3:]] == ["q1"]
+
+    def test_stats_accumulate(self):
+        """Test that prompt stats report reused tokens"""
+        self.chat("a")
+        self.chat("b")
+
+        stats = self.manager.prompt_stats()
+        assert stats["prompts"] == 2 and 0 < stats["reused_tokens"] < stats["tokens"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,185 @@
+"""
+Unit tests for the end-to-end test runner
+"""
+import threading
+import urllib.request
+import urllib.error
+from contextlib import contextmanager
+import pytest
+from e2e_runner import StaticServer, BrowserPool, run_case, run_test_cases, needs_build
+
+
+class FakePage:
+    """Minimal stand-in for a Playwright page over a fixed DOM"""
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.url = ""
+        self.handlers = {}
+        self.filled = {}
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def goto(self, url):
+        self.url = url
+
+    def fill(self, selector, value):
+        self.filled[selector] = value
+
+    def click(self, selector):
+        if selector not in self.texts:
+            raise TimeoutError(f"waiting for locator('{selector}')\nCall log: ...")
+        if selector == "#add":
+            self.texts["#list"] += self.filled.get("#item", "")
+
+    def wait_for_selector(self, selector, state="visible"):
+        if selector not in self.texts:
+            raise TimeoutError(f"waiting for {selector}")
+
+    def text_content(self, selector):
+        return self.texts[selector]
+
+
+class FakeBrowser:
+    """Browser whose contexts share one FakePage factory"""
+
+    def __init__(self, texts=None):
+        self.texts = texts or {}
+        self.thread = None
+
+    def new_context(self):
+        browser = self
+        browser.thread = threading.current_thread().name
+
+        class Context:
+            def new_page(self):
+                return FakePage(dict(browser.texts))
+
+            def close(self):
+                pass
+
+        return Context()
+
+
+def fake_launcher(browsers):
+    @contextmanager
+    def launch():
+        browser = FakeBrowser({"#add": "Add", "#item": "", "#list": ""})
+        browsers.append(browser)
+        yield browser
+    return launch
+
+
+class TestStaticServer:
+    """Test serving in-memory files"""
+
+    def test_serves_files_with_spa_fallback(self):
+        """Test index, assets, client-side routes and 404s"""
+        files = {"index.html": "<h1>Home</h1>", "app.js": "run();", "docs/index.html": "Docs"}
+
+        with StaticServer(files) as server:
+            def get(path):
+                with urllib.request.urlopen(server.url + path) as response:
+                    return response.read().decode(), response.headers["Content-Type"]
+
+            assert get("/") == ("<h1>Home</h1>", "text/html; charset=utf-8")
+            assert get("/app.js")[0] == "run();"
+            assert get("/docs")[0] == "Docs"
+            assert get("/settings/profile")[0] == "<h1>Home</h1>"
+            with pytest.raises(urllib.error.HTTPError):
+                get("/missing.css")
+
+    def test_projects_needing_a_build_are_detected(self):
+        """Test that only plain static projects are considered runnable"""
+        assert needs_build({"index.html": "", "app.js": ""}) is None
+        assert needs_build({"index.html": "", "src/App.tsx": ""}) == "requires a build step (src/App.tsx)"
+        assert needs_build({"app.js": ""}) == "no index.html at the project root"
+
+
+class TestRunCase:
+    """Test step execution and failure reporting"""
+
+    def test_passing_case(self):
+        """Test that fill, click and text assertions run in order"""
+        case = {"name": "adds item", "steps": [
+            {"action": "fill", "selector": "#item", "value": "Milk"},
+            {"action": "click", "selector": "#add"},
+            {"action": "expect_text", "selector": "#list", "text": "Milk"},
+        ]}
+
+        result = run_case(FakeBrowser({"#add": "", "#item": "", "#list": ""}), "http://x", case)
+
+        assert result.passed
+        assert result.error is None
+
+    def test_failing_step_is_located(self):
+        """Test that a failure records the step, selector and first error line"""
+        case = {"name": "deletes item", "steps": [{"action": "click", "selector": "#delete"}]}
+
+        result = run_case(FakeBrowser(), "http://x", case)
+
+        assert not result.passed
+        assert (result.failed_step, result.action, result.selector) == (0, "click", "#delete")
+        assert result.describe() == (
+            "Test 'deletes item' failed at step 1 (click #delete): waiting for locator('#delete')"
+        )
+
+
+class TestBrowserPool:
+    """Test the pre-launched browser pool"""
+
+    def test_cases_are_sharded_across_browsers(self):
+        """Test that every case runs and work is spread over the pool's workers"""
+        browsers = []
+        pool = BrowserPool(size=2, launcher=fake_launcher(browsers)).start()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def job(browser):
+            barrier.wait()  # Both workers must be busy at once
+            return threading.current_thread().name
+
+        try:
+            futures = [pool.submit(job) for _ in range(2)]
+            names = {future.result(5) for future in futures}
+        finally:
+            pool.close()
+
+        assert len(browsers) == 2
+        assert len(names) == 2
+
+    def test_failed_launch_raises(self):
+        """Test that a pool with no working browser reports why"""
+        @contextmanager
+        def broken():
+            raise RuntimeError("Executable doesn't exist")
+            yield
+
+        with pytest.raises(RuntimeError, match="Executable doesn't exist"):
+            BrowserPool(size=2, launcher=broken).start()
+
+    def test_run_test_cases_reports(self):
+        """Test pass/fail counts and skipped runs"""
+        pool = BrowserPool(size=2, launcher=fake_launcher([])).start()
+        files = {"index.html": "<button id='add'>Add</button>"}
+        cases = [
+            {"name": "ok", "steps": [{"action": "expect_visible", "selector": "#add"}]},
+            {"name": "broken", "steps": [{"action": "expect_visible", "selector": "#nope"}]},
+        ]
+
+        try:
+            report = run_test_cases(files, cases, pool=pool)
+        finally:
+            pool.close()
+
+        summary = report.to_dict()
+        assert (summary["status"], summary["passed"], summary["failed"]) == ("failed", 1, 1)
+        assert run_test_cases({"index.html": "", "a.tsx": ""}, cases, pool=pool).status == "skipped"
+        assert run_test_cases(files, [], pool=pool).skipped_reason == "no test cases"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
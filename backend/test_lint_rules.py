@@ -0,0 +1,80 @@
+"""
+Unit tests for the compiled lint rule engine
+"""
+import pytest
+from unittest.mock import patch
+from lint_rules import RuleEngine
+
+
+TS_CODE = """const company = 'any company';
+let value: any = load();
+if (value == null) {
+    console.log(value);
+}
+"""
+
+
+class TestRuleEngine:
+    """Test rule matching, locations and caching"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.engine = RuleEngine()
+
+    def test_hits_have_locations(self):
+        """Test that hits report 1-based line and column"""
+        hits = self.engine.check(TS_CODE, "typescript", "app.ts")
+
+        located = [(h.rule_id, h.line, h.column) for h in hits]
+        assert located == [
+            ("no-explicit-any", 2, 10),
+            ("eqeqeq", 3, 11),
+            ("no-console", 4, 5),
+        ]
+        assert all(h.file == "app.ts" for h in hits)
+
+    def test_words_and_strings_are_not_hits(self):
+        """Test that 'any' inside identifiers and strings is ignored"""
+        code = "const company = 'any';\n// any == thing\nif (a === b && c !== d) {}\n"
+
+        assert self.engine.check(code, "typescript") == []
+
+    def test_python_rules(self):
+        """Test Python-specific rules"""
+        code = "from os import *\n\ndef f():\n    global x\n    try:\n        pass\n    except:\n        pass\n"
+
+        rules = [h.rule_id for h in self.engine.check(code, "python")]
+        assert rules == ["no-wildcard-import", "no-global", "bare-except"]
+
+    def test_project_results_are_cached(self):
+        """Test that unchanged files are served from the content-hash cache"""
+        files = {"b.js": "var a = 1;", "a.ts": TS_CODE, "style.css": "body {}"}
+
+        first = self.engine.check_project(files, processes=1)
+        assert [h.file for h in first] == ["a.ts", "a.ts", "a.ts", "b.js"]
+
+        self.engine.rules = ()  # Cached results no longer depend on the rules
+        assert self.engine.check_project(files, processes=1) == first
+
+    def test_process_pool_matches_serial(self):
+        """Test that pooled linting returns the same hits"""
+        files = {f"f{i}.js": f"var v{i} = {i};\nif (v{i} == 1) {{}}\n" for i in range(20)}
+
+        pooled = RuleEngine().check_project(files, processes=2, parallel_threshold=1)
+
+        assert pooled == self.engine.check_project(files, processes=1)
+        assert len(pooled) == 40
+
+    def test_serial_by_default(self):
+        """Test that large projects are linted in-process unless a pool is requested"""
+        files = {f"f{i}.js": f"var v{i} = 1;" for i in range(300)}
+
+        with patch("lint_rules.ProcessPoolExecutor") as pool:
+            hits = self.engine.check_project(files)
+
+        pool.assert_not_called()
+        assert len(hits) == 300
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
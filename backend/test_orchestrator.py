@@ -0,0 +1,425 @@
+"""
+Unit tests for the orchestrator workflow
+"""
+import json
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from agents.debugger import DebugResult
+from orchestrator import CodeGenesisOrchestrator, CodeGenState, get_deferred_result
+from e2e_runner import RunReport, CaseResult
+
+
+@pytest.fixture(autouse=True)
+def mock_api_config():
+    with patch("agents.architect.api_config") as mock_config1, \
+         patch("agents.engineer.api_config") as mock_config2, \
+         patch("agents.testsprite.api_config") as mock_config3, \
+         patch("agents.debugger.api_config") as mock_config4, \
+         patch("agents.refactorer.api_config") as mock_config5:
+
+        for mock_config in (mock_config1, mock_config2, mock_config3, mock_config4, mock_config5):
+            mock_llm = MagicMock()
+            mock_llm.invoke.return_value.content = "Mocked response"
+            mock_config.get_llm.return_value = mock_llm
+
+        yield
+
+
+class TestApplyFix:
+    """Test patch-based fix application in the engineer node"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.orchestrator = CodeGenesisOrchestrator(user_api_key="test", user_provider="openai")
+
+    def _result(self, diff: str) -> DebugResult:
+        return DebugResult(
+            error_type="syntax",
+            root_cause="Missing closing brace",
+            suggested_fix="Close the function body",
+            affected_files=["app.js"],
+            confidence=0.9,
+            diff=diff
+        )
+
+    def test_patch_applied_without_regeneration(self):
+        """Test that a clean patch is applied and the engineer is not called"""
+        content = "function main() {\n    run();\n"
+        result = self._result("""app.js
+<<<<<<< SEARCH
+    run();
+=======
+    run();
+}
+>>>>>>> REPLACE""")
+
+        fixed = self.orchestrator._apply_fix("app.js", content, result, "HTML/CSS/JS")
+
+        assert fixed == "function main() {\n    run();\n}\n"
+        self.orchestrator.engineer.llm.invoke.assert_not_called()
+
+    def test_falls_back_to_regeneration(self):
+        """Test that a patch which does not apply triggers a full rewrite"""
+        self.orchestrator.engineer.llm.invoke.return_value.content = "function main() {}"
+        result = self._result("""<<<<<<< SEARCH
+missing();
+=======
+present();
+>>>>>>> REPLACE""")
+
+        fixed = self.orchestrator._apply_fix("app.js", "function main() {", result, "HTML/CSS/JS")
+
+        assert fixed == "function main() {}"
+        self.orchestrator.engineer.llm.invoke.assert_called_once()
+
+    def test_patch_introducing_errors_is_rejected(self):
+        """Test that a patch adding static analysis errors falls back to a rewrite"""
+        self.orchestrator.engineer.llm.invoke.return_value.content = "const a = (1);"
+        result = self._result("""<<<<<<< SEARCH
+const a = (1);
+=======
+const a = (1;
+>>>>>>> REPLACE""")
+
+        fixed = self.orchestrator._apply_fix("app.js", "const a = (1);", result, "HTML/CSS/JS")
+
+        assert fixed == "const a = (1);"
+        self.orchestrator.engineer.llm.invoke.assert_called_once()
+
+
+class TestDependencyOrder:
+    """Test dependency-ordered generation"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.orchestrator = CodeGenesisOrchestrator(user_api_key="test", user_provider="openai")
+
+    def test_dependency_levels(self):
+        """Test that files come after their dependencies and cycles do not hang"""
+        planned = {"index.html": "", "App.tsx": "", "api.ts": "", "styles.css": "", "a.js": "", "b.js": ""}
+        dependencies = {
+            "index.html": ["App.tsx", "styles.css"],
+            "App.tsx": ["api.ts", "styles.css", "missing.ts"],
+            "a.js": ["b.js"],
+            "b.js": ["a.js"],
+        }
+
+        levels = self.orchestrator._dependency_levels(planned, dependencies)
+
+        assert levels == [["api.ts", "styles.css"], ["App.tsx"], ["index.html"], ["a.js", "b.js"]]
+
+    def test_dependents_get_interface_summaries(self):
+        """Test that a dependent file is prompted with its imports' exports, not their bodies"""
+        self.orchestrator.architect.llm.stream.return_value = [MagicMock(content=json.dumps({
+            "tech_stack": "React",
+            "files": {
+                "api.ts": {"description": "API client", "depends_on": []},
+                "App.tsx": {"description": "Root component", "depends_on": ["api.ts"]}
+            }
+        }))]
+        prompts = {}
+
+        def engineer_invoke(messages):
+            prompt = messages[0].content
+            name = "api.ts" if "'api.ts'" in prompt else "App.tsx"
+            prompts[name] = prompt
+            if name == "api.ts":
+                return MagicMock(content="export async function fetchTodos(limit: number) {\n    return secretBody();\n}")
+            return MagicMock(content="import { fetchTodos } from './api';")
+
+        self.orchestrator.engineer.llm.invoke.side_effect = engineer_invoke
+
+        self.orchestrator.generate_app("Todo app", skip_refactor=True, skip_tests=True)
+
+        assert "export async function fetchTodos(limit: number)" in prompts["App.tsx"]
+        assert "secretBody" not in prompts["App.tsx"]
+        assert "already-written files" not in prompts["api.ts"]
+
+
+class TestWorkflow:
+    """Test the end-to-end LangGraph workflow with mocked agents"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.orchestrator = CodeGenesisOrchestrator(user_api_key="test", user_provider="openai")
+        self.orchestrator.architect.llm.stream.return_value = [MagicMock(content=json.dumps({
+            "tech_stack": "HTML + CSS + JS",
+            "files": {"index.html": "Main page"}
+        }))]
+        self.orchestrator.engineer.llm.invoke.return_value.content = "<html><body>Hi</body></html>"
+        self.orchestrator.documenter.llm = MagicMock()
+        self.orchestrator.documenter.llm.invoke.return_value.content = "# Project"
+
+    def test_post_debug_stages_run_in_parallel(self):
+        """Test that refactor analysis and test generation overlap in time"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait_then(content):
+            def invoke(messages):
+                barrier.wait()
+                return MagicMock(content=content)
+            return invoke
+
+        self.orchestrator.refactorer.llm.invoke.side_effect = wait_then(
+            '{"overall_quality_score": 8.0, "summary": "Good", "suggestions": []}'
+        )
+        self.orchestrator.testsprite.llm.invoke.side_effect = wait_then("test('app', () => {});")
+        self.orchestrator.documenter.llm.invoke.side_effect = wait_then("# Project")
+
+        result = self.orchestrator.generate_app("A landing page", include_docs=True, llm_review=True)
+
+        assert result["quality"]["refactor_suggestions"]["llm_quality_score"] == 8.0
+        assert result["tests"] == "test('app', () => {});"
+        assert result["files"]["README.md"] == "# Project"
+        assert result["status"] == "Generation complete"
+
+    def test_documenter_skipped_by_default(self):
+        """Test that README generation only runs when requested"""
+        result = self.orchestrator.generate_app("A landing page")
+
+        assert "README.md" not in result["files"]
+        self.orchestrator.documenter.llm.invoke.assert_not_called()
+
+    def test_files_generated_while_plan_streams(self):
+        """Test that complete plan entries are generated before the stream ends"""
+        plan = '{"tech_stack": "HTML + CSS + JS", "files": {"main.js": "Entry point", "app.js": "Logic"}}'
+        started = threading.Event()
+
+        def engineer_invoke(messages):
+            started.set()
+            return MagicMock(content="<html></html>")
+
+        def stream(messages):
+            yield MagicMock(content=plan[:70])
+            # main.js is complete at this point and must already be in progress
+            assert started.wait(5)
+            yield MagicMock(content=plan[70:])
+
+        self.orchestrator.engineer.llm.invoke.side_effect = engineer_invoke
+        self.orchestrator.architect.llm.stream.side_effect = stream
+
+        result = self.orchestrator.generate_app("A landing page", skip_refactor=True, skip_tests=True)
+
+        assert set(result["files"]) == {"main.js", "app.js"}
+        assert self.orchestrator.engineer.llm.invoke.call_count == 2
+
+    def test_small_files_are_batched(self):
+        """Test that small independent files share one request and the rest are not batched"""
+        self.orchestrator.architect.llm.stream.return_value = [MagicMock(content=json.dumps({
+            "tech_stack": "HTML + CSS + JS",
+            "files": {"index.html": "Shell", "styles.css": "Styles", "package.json": "Manifest", "app.js": "Logic"}
+        }))]
+
+        def engineer_invoke(messages):
+            prompt = messages[0].content
+            if "=== FILE:" in prompt:
+                return MagicMock(content="\n".join(
+                    f"=== FILE: {name} ===\n/* {name} */\n=== END FILE: {name} ==="
+                    for name in ("index.html", "styles.css", "package.json")
+                ))
+            return MagicMock(content="console.log('app');")
+
+        self.orchestrator.engineer.llm.invoke.side_effect = engineer_invoke
+
+        result = self.orchestrator.generate_app("A landing page", skip_refactor=True, skip_tests=True)
+
+        assert result["files"]["styles.css"] == "/* styles.css */"
+        assert result["files"]["app.js"] == "console.log('app');"
+        assert self.orchestrator.engineer.llm.invoke.call_count == 2
+
+    def test_scaffold_files_skip_the_llm(self):
+        """Test that boilerplate is rendered from templates and counted as skipped calls"""
+        self.orchestrator.architect.llm.stream.return_value = [MagicMock(content=json.dumps({
+            "tech_stack": "React + Tailwind",
+            "files": {
+                "package.json": "Manifest", "tailwind.config.js": "Tailwind", "index.html": "Shell",
+                "src/main.jsx": "Entry", "src/App.jsx": "Root component"
+            }
+        }))]
+        self.orchestrator.engineer.llm.invoke.return_value.content = (
+            "import { motion } from 'framer-motion';\nexport default function App() { return null; }"
+        )
+
+        result = self.orchestrator.generate_app("Todo app", skip_refactor=True, skip_tests=True)
+
+        assert result["llm_calls_skipped"] == 4
+        assert set(result["templated_files"]) == {"package.json", "tailwind.config.js", "index.html", "src/main.jsx"}
+        assert self.orchestrator.engineer.llm.invoke.call_count == 1
+        assert json.loads(result["files"]["package.json"])["dependencies"]["framer-motion"] == "^11.3.21"
+
+    def test_failing_tests_feed_the_debugger(self):
+        """Test that executed test failures are diagnosed, fixed and re-run"""
+        self.orchestrator.testsprite.llm.invoke.return_value.content = json.dumps({"tests": [
+            {"name": "greets", "steps": [{"action": "expect_text", "selector": "h1", "text": "Hello"}]}
+        ]})
+        self.orchestrator.debugger.llm.invoke.return_value.content = json.dumps({
+            "error_type": "logic", "root_cause": "Wrong greeting", "suggested_fix": "Say Hello",
+            "affected_files": ["index.html"], "confidence": 0.9,
+            "diff": "<<<<<<< SEARCH\nHi\n=======\nHello\n>>>>>>> REPLACE"
+        })
+        failed = RunReport(status="failed", results=[CaseResult(
+            name="greets", passed=False, error="expected text 'Hello'", failed_step=0, action="expect_text", selector="h1"
+        )])
+        passed = RunReport(status="passed", results=[CaseResult(name="greets", passed=True)])
+
+        with patch("orchestrator.run_test_cases", side_effect=[failed, passed]) as run:
+            result = self.orchestrator.generate_app("A landing page", run_tests=True)
+
+        assert run.call_count == 2
+        assert run.call_args_list[1][0][0]["index.html"] == "<html><body>Hello</body></html>"
+        assert result["test_report"]["status"] == "passed"
+        assert "page.locator(\"h1\")" in result["tests"]
+        assert result["quality"]["score"] == 10.0
+        assert self.orchestrator.testsprite.llm.invoke.call_count == 1
+
+    def test_deferred_quality_returns_before_stages_finish(self):
+        """Test that deferred stages complete in the background under the same generation id"""
+        release = threading.Event()
+
+        def slow_tests(messages):
+            release.wait(5)
+            return MagicMock(content="test('app', () => {});")
+
+        self.orchestrator.testsprite.llm.invoke.side_effect = slow_tests
+        result = self.orchestrator.generate_app("A landing page", defer_quality=True)
+
+        assert result["deferred"] is True
+        assert result["files"]["index.html"]
+        assert result["quality"]["score"] is None
+        assert get_deferred_result(result["generation_id"])["status"] == "pending"
+
+        release.set()
+        for _ in range(100):
+            deferred = get_deferred_result(result["generation_id"])
+            if deferred["status"] == "complete":
+                break
+            threading.Event().wait(0.05)
+
+        assert deferred["status"] == "complete"
+        assert deferred["quality"]["score"] == 10.0
+        assert deferred["tests"] == "test('app', () => {});"
+
+    def test_skip_flags_disable_stages(self):
+        """Test that skipped stages never call their agents"""
+        result = self.orchestrator.generate_app("A landing page", skip_refactor=True, skip_tests=True)
+
+        assert result["deferred"] is False
+        assert result["tests"] == ""
+        self.orchestrator.refactorer.llm.invoke.assert_not_called()
+        self.orchestrator.testsprite.llm.invoke.assert_not_called()
+        assert get_deferred_result(result["generation_id"]) is None
+
+    def test_quality_score_is_local_by_default(self):
+        """Test that the quality score needs no LLM call unless a review is requested"""
+        result = self.orchestrator.generate_app("A landing page")
+
+        assert result["quality"]["score"] == 10.0
+        assert "metrics" in result["quality"]["refactor_suggestions"]
+        self.orchestrator.refactorer.llm.invoke.assert_not_called()
+
+
+class TestEditMode:
+    """Test incremental edits to an existing project"""
+
+    FILES = {
+        "index.html": '<script src="/src/App.jsx"></script>',
+        "src/App.jsx": "import Header from './Header';\nexport default function App() { return <Header />; }",
+        "src/Header.jsx": "export default function Header() {\n    return <h1 style={{ color: 'black' }}>Hi</h1>;\n}",
+        "src/Footer.jsx": "export default function Footer() { return <footer>Bye</footer>; }",
+    }
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.orchestrator = CodeGenesisOrchestrator(user_api_key="test", user_provider="openai")
+
+    def test_only_affected_files_are_edited(self):
+        """Test that the header edit patches one file and analyzes only its importers"""
+        self.orchestrator.engineer.llm.invoke.return_value.content = """<<<<<<< SEARCH
+    return <h1 style={{ color: 'black' }}>Hi</h1>;
+=======
+    return <h1 style={{ color: 'blue' }}>Hi</h1>;
+>>>>>>> REPLACE"""
+
+        result = self.orchestrator.edit_app(self.FILES, "Make the header blue")
+
+        assert result["target_files"] == ["src/Header.jsx"]
+        assert result["changed_files"] == ["src/Header.jsx"]
+        assert "color: 'blue'" in result["files"]["src/Header.jsx"]
+        assert result["files"]["src/Footer.jsx"] == self.FILES["src/Footer.jsx"]
+        assert set(result["analysis_scope"]) == {"src/Header.jsx", "src/App.jsx", "index.html"}
+        assert self.orchestrator.engineer.llm.invoke.call_count == 1
+        self.orchestrator.architect.llm.stream.assert_not_called()
+        self.orchestrator.testsprite.llm.invoke.assert_not_called()
+
+    def test_unapplied_patch_falls_back_to_rewrite(self):
+        """Test that a patch that does not match regenerates the file"""
+        rewritten = "export default function Header() { return <h1>Hi</h1>; }"
+        self.orchestrator.engineer.llm.invoke.side_effect = [
+            MagicMock(content="<<<<<<< SEARCH\nnot in the file\n=======\nx\n>>>>>>> REPLACE"),
+            MagicMock(content=rewritten),
+        ]
+
+        result = self.orchestrator.edit_app(self.FILES, "Simplify `src/Header.jsx`")
+
+        assert result["files"]["src/Header.jsx"] == rewritten
+        assert result["changed_files"] == ["src/Header.jsx"]
+
+    def test_debugger_ignores_unchanged_files(self):
+        """Test that existing problems outside the analysis scope are not reported"""
+        files = dict(self.FILES, **{"src/Broken.js": "function broken() {"})
+        self.orchestrator.engineer.llm.invoke.return_value.content = ""
+
+        result = self.orchestrator.edit_app(files, "Make the header blue")
+
+        assert result["changed_files"] == []
+        assert result["errors"] == []
+        self.orchestrator.debugger.llm.invoke.assert_not_called()
+
+    def test_unmatched_request_asks_which_files(self):
+        """Test that the engineer picks the files when none is named or found"""
+        self.orchestrator.engineer.llm.invoke.side_effect = [
+            MagicMock(content="src/Footer.jsx"),
+            MagicMock(content="<<<<<<< SEARCH\n<footer>Bye</footer>\n=======\n<footer>© 2026</footer>\n>>>>>>> REPLACE"),
+        ]
+
+        result = self.orchestrator.edit_app(self.FILES, "Add a copyright notice")
+
+        assert result["target_files"] == ["src/Footer.jsx"]
+        assert "© 2026" in result["files"]["src/Footer.jsx"]
+
+    def test_no_selected_file_is_an_error(self):
+        """Test that nothing is edited when no file fits the request"""
+        self.orchestrator.engineer.llm.invoke.return_value.content = ""
+
+        result = self.orchestrator.edit_app(self.FILES, "Add a copyright notice")
+
+        assert result["status"] == "error" and result["error"] == "NO_MATCHING_FILES"
+        assert result["files"] == self.FILES and result["changed_files"] == []
+        assert self.orchestrator.engineer.llm.invoke.call_count == 1
+
+    def test_prose_response_keeps_file(self):
+        """Test that an explanation instead of code or edit blocks never overwrites the file"""
+        self.orchestrator.engineer.llm.invoke.side_effect = [
+            MagicMock(content="The header text is already short, so nothing needs to change."),
+            MagicMock(content="I kept the header as it is."),
+        ]
+
+        result = self.orchestrator.edit_app(self.FILES, "Simplify `src/Header.jsx`")
+
+        assert result["files"]["src/Header.jsx"] == self.FILES["src/Header.jsx"]
+        assert result["changed_files"] == []
+
+    def test_edit_state_sets_every_key(self):
+        """Test that the edit graph starts from a complete state"""
+        self.orchestrator.edit_workflow = MagicMock()
+        self.orchestrator.edit_workflow.invoke.side_effect = lambda state: state
+
+        self.orchestrator.edit_app(self.FILES, "Make the header blue")
+
+        state = self.orchestrator.edit_workflow.invoke.call_args[0][0]
+        assert set(state) == set(CodeGenState.__annotations__)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
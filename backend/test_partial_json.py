@@ -0,0 +1,78 @@
+"""
+Unit tests for tolerant and incremental JSON parsing
+"""
+import pytest
+from unittest.mock import patch
+from partial_json import parse_lenient_json, PlanStreamParser
+
+
+class TestParseLenientJson:
+    """Test recovery of malformed LLM JSON"""
+
+    def test_prose_and_fences(self):
+        """Test that surrounding prose and markdown fences are ignored"""
+        text = 'Here you go:\n```json\n{"a": 1}\n```\nAnything else?'
+
+        assert parse_lenient_json(text) == {"a": 1}
+
+    def test_trailing_commas(self):
+        """Test that trailing commas are removed"""
+        assert parse_lenient_json('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+    def test_truncated_object(self):
+        """Test that a response cut off mid-string is closed"""
+        assert parse_lenient_json('{"files": {"a.js": "Logic", "b.js": "Sty') == {
+            "files": {"a.js": "Logic", "b.js": "Sty"}
+        }
+
+    def test_braces_inside_strings(self):
+        """Test that braces in string values do not confuse the scanner"""
+        assert parse_lenient_json('x {"a": "}{"} y') == {"a": "}{"}
+
+    def test_no_object(self):
+        """Test that text without an object yields None"""
+        assert parse_lenient_json("no json here") is None
+        assert parse_lenient_json("") is None
+
+
+class TestPlanStreamParser:
+    """Test incremental parsing of streamed plans"""
+
+    def test_entries_emitted_as_they_complete(self):
+        """Test that each files entry is emitted once, character by character"""
+        text = ('{"tech_stack": "React", "files": {"index.html": "Entry, shell", '
+                '"App.tsx": {"description": "Root {}", "depends_on": ["a.ts"]}}, "extra": "x"}')
+        parser = PlanStreamParser()
+
+        emitted = []
+        for char in text:
+            for entry in parser.feed(char):
+                emitted.append((entry, dict(parser.fields)))
+
+        assert emitted == [
+            (("index.html", "Entry, shell"), {"tech_stack": "React"}),
+            (("App.tsx", {"description": "Root {}", "depends_on": ["a.ts"]}), {"tech_stack": "React"}),
+        ]
+        assert parser.fields == {"tech_stack": "React", "extra": "x"}
+
+    def test_trailing_comma_in_stream(self):
+        """Test that a trailing comma before the closing brace is tolerated"""
+        parser = PlanStreamParser()
+
+        entries = parser.feed('```json\n{"files": {"a.js": "A",\n}}\n```')
+
+        assert entries == [("a.js", "A")]
+
+    def test_empty_elements_are_skipped(self):
+        """Test that repeated and leading commas do not re-parse the buffer"""
+        parser = PlanStreamParser()
+
+        with patch("partial_json.parse_lenient_json", wraps=parse_lenient_json) as parse:
+            entries = parser.feed('{"tech_stack": "JS", "files": {, "a.js": "A",, "b.js": "B",,}}')
+
+        assert entries == [("a.js", "A"), ("b.js", "B")]
+        assert [call.args[0] for call in parse.call_args_list] == ['{"a.js": "A"}', '{"b.js": "B"}']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+"""
+Unit tests for patch parsing and application
+"""
+import pytest
+from patcher import is_patch, parse_patch, edits_for_file, apply_edits
+
+
+SOURCE = """import React from 'react';
+
+function App() {
+    const [count, setCount] = useState(0);
+    return <div>{count}</div>;
+}
+
+export default App;"""
+
+
+class TestParsePatch:
+    """Test patch format detection and parsing"""
+
+    def test_search_replace_blocks_with_file(self):
+        """Test that search/replace blocks are parsed with their target file"""
+        patch = """App.tsx
+<<<<<<< SEARCH
+import React from 'react';
+=======
+import React, { useState } from 'react';
+>>>>>>> REPLACE"""
+
+        edits = parse_patch(patch)
+
+        assert is_patch(patch)
+        assert len(edits) == 1
+        assert edits[0].file == "App.tsx"
+        assert edits[0].search == "import React from 'react';"
+        assert edits[0].replace == "import React, { useState } from 'react';"
+
+    def test_unified_diff(self):
+        """Test that unified diff hunks become search/replace edits"""
+        patch = """--- a/src/App.tsx
++++ b/src/App.tsx
+@@ -1,2 +1,2 @@
+-import React from 'react';
++import React, { useState } from 'react';
+
+"""
+        edits = parse_patch(patch)
+
+        assert is_patch(patch)
+        assert len(edits) == 1
+        assert edits[0].file == "src/App.tsx"
+        assert edits_for_file(edits, "App.tsx") == edits
+        assert edits_for_file(edits, "index.js") == []
+
+    def test_plain_code_is_not_a_patch(self):
+        """Test that full file contents are not mistaken for a patch"""
+        assert not is_patch(SOURCE)
+        assert not is_patch(None)
+
+
+class TestApplyEdits:
+    """Test applying edits with exact and fuzzy matching"""
+
+    def test_exact_match(self):
+        """Test that an exact search block is replaced"""
+        edits = parse_patch("""<<<<<<< SEARCH
+import React from 'react';
+=======
+import React, { useState } from 'react';
+>>>>>>> REPLACE""")
+
+        result = apply_edits(SOURCE, edits)
+
+        assert result.startswith("import React, { useState } from 'react';")
+        assert result.endswith("export default App;")
+
+    def test_whitespace_insensitive_match_keeps_indentation(self):
+        """Test that a search block with different indentation still applies"""
+        edits = parse_patch("""<<<<<<< SEARCH
+return <div>{count}</div>;
+=======
+return <button onClick={() => setCount(count + 1)}>{count}</button>;
+>>>>>>> REPLACE""")
+
+        result = apply_edits(SOURCE, edits)
+
+        assert "    return <button onClick={() => setCount(count + 1)}>{count}</button>;" in result
+
+    def test_fuzzy_match(self):
+        """Test that a slightly misquoted search block is matched"""
+        edits = parse_patch("""<<<<<<< SEARCH
+const [count, setCount] = useState(0)
+=======
+const [count, setCount] = useState(1);
+>>>>>>> REPLACE""")
+
+        result = apply_edits(SOURCE, edits)
+
+        assert "useState(1);" in result
+        assert "useState(0)" not in result
+
+    def test_unmatched_edit_returns_none(self):
+        """Test that a patch that does not apply is rejected as a whole"""
+        edits = parse_patch("""<<<<<<< SEARCH
+this line does not exist anywhere
+=======
+replacement
+>>>>>>> REPLACE""")
+
+        assert apply_edits(SOURCE, edits) is None
+        assert apply_edits(SOURCE, []) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,94 @@
+"""
+Unit tests for local quality metrics
+"""
+import pytest
+from quality_metrics import analyze_file, compute_quality, duplication_ratio
+
+
+BRANCHY_JS = """export function route(req) {
+    if (req.a && req.b) {
+        return 1;
+    }
+    for (const item of req.items) {
+        if (item.ok || item.retry) {
+            console.log(item);
+        }
+    }
+    return req.c ? 2 : 3;
+}
+"""
+
+
+class TestFileMetrics:
+    """Test per-file metrics"""
+
+    def test_cyclomatic_complexity_and_length(self):
+        """Test that decision points and function length are counted"""
+        metrics = analyze_file("route.js", BRANCHY_JS)
+
+        assert [f.name for f in metrics.functions] == ["route"]
+        # 1 + if + && + for + if + || + ?
+        assert metrics.max_complexity == 7
+        assert metrics.max_function_length == 11
+        assert metrics.max_nesting == 3
+
+    def test_python_functions(self):
+        """Test that Python functions are measured by indentation"""
+        code = "def f(x):\n    if x and x > 1:\n        return 1\n    return 2\n\n\ndef g():\n    pass\n"
+        metrics = analyze_file("util.py", code)
+
+        assert [(f.name, f.complexity, f.length) for f in metrics.functions] == [("f", 3, 4), ("g", 1, 2)]
+
+    def test_keywords_in_strings_are_ignored(self):
+        """Test that branches inside strings and comments are not counted"""
+        code = "function f() {\n    // if this or that\n    return 'if && ||';\n}\n"
+
+        assert analyze_file("a.js", code).max_complexity == 1
+
+    def test_lint_hits_collected(self):
+        """Test that the lint callable is applied to code files"""
+        metrics = analyze_file("a.js", "var x = 1;", lint=lambda code, lang: [f"{lang} hint"])
+
+        assert metrics.lint_hits == ["javascript hint"]
+
+
+class TestProjectScore:
+    """Test project-wide scoring"""
+
+    def test_duplication_ratio(self):
+        """Test that repeated blocks across files are detected"""
+        block = "const alpha = 1;\nconst beta = 2;\nconst gamma = 3;\nconst delta = 4;\n"
+
+        assert duplication_ratio({"a.js": block, "b.js": block}) == 1.0
+        assert duplication_ratio({"a.js": block, "b.js": "const other = 5;"}) == 0.0
+
+    def test_score_is_reproducible(self):
+        """Test that the same input always produces the same score"""
+        files = {"route.js": BRANCHY_JS, "style.css": "body { margin: 0; }"}
+
+        first = compute_quality(files)
+        second = compute_quality(files)
+
+        assert first.score == second.score
+        assert 0.0 <= first.score <= 10.0
+        assert first.size_distribution["files"] == 2
+
+    def test_penalties_lower_score(self):
+        """Test that complex code and lint hits cost points"""
+        complex_js = "function f(a) {\n" + "    if (a) { a++; }\n" * 12 + "}\n"
+
+        clean = compute_quality({"a.js": "function f() {\n    return 1;\n}\n"})
+        noisy = compute_quality({"a.js": complex_js}, lint=lambda code, lang: ["hint"] * 4)
+
+        assert clean.score == 10.0
+        assert noisy.score < clean.score
+        assert noisy.penalties["complexity"] > 0
+        assert noisy.penalties["lint"] == 1.0
+
+    def test_empty_project(self):
+        """Test that an empty project scores zero"""
+        assert compute_quality({}).score == 0.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+"""
+Unit tests for the reference index
+"""
+import pytest
+from reference_index import ReferenceIndex
+
+
+FILES = {
+    "src/components/Header.jsx": "export function Header() { return <header />; }",
+    "src/pages/LoginPage.jsx": "export default function LoginPage() {}\nexport const useLogin = () => {};",
+    "src/utils/api.js": "export async function fetchUser(id) {}\nexport const api = {};",
+    "backend/app.py": "def create_app():\n    pass\n\nclass Settings:\n    pass",
+}
+
+
+class TestReferenceIndex:
+    """Test reference lookup and incremental maintenance"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.index = ReferenceIndex()
+        self.index.update(FILES)
+
+    def test_finds_paths_basenames_and_symbols_in_order(self):
+        """Test that every kind of name is found, in order of first mention"""
+        found = self.index.find("Header breaks after fetchUser; see api.js and backend/app.py")
+
+        assert found == [
+            ("Header", ["src/components/Header.jsx"]),
+            ("fetchUser", ["src/utils/api.js"]),
+            ("api.js", ["src/utils/api.js"]),
+            ("backend/app.py", ["backend/app.py"]),
+        ]
+
+    def test_longest_match_wins(self):
+        """Test that a full path is one reference rather than also its basename and symbol"""
+        assert [name for name, _ in self.index.find("open src/components/Header.jsx:12")] == ["src/components/Header.jsx"]
+        assert self.index.files("/app/src/pages/LoginPage.jsx:3:1") == ["src/pages/LoginPage.jsx"]
+
+    def test_requires_identifier_boundaries(self):
+        """Test that names inside longer words and short symbols do not match"""
+        assert self.index.find("the HeaderBar and MyHeader use an api") == []
+
+    def test_update_tracks_added_and_removed_names(self):
+        """Test that edits change the names the index knows"""
+        files = dict(FILES)
+        files["src/utils/api.js"] = "export async function fetchProfile(id) {}"
+        del files["src/components/Header.jsx"]
+
+        stats = self.index.update(files)
+
+        assert stats == {"added": 0, "updated": 1, "removed": 1, "unchanged": 2}
+        assert self.index.find("fetchUser Header") == []
+        assert self.index.files("fetchProfile failed") == ["src/utils/api.js"]
+
+    def test_additions_extend_the_automaton(self):
+        """Test that new names are added without recompiling the automaton"""
+        matcher = self.index._compiled()
+        self.index.update({"src/components/Footer.jsx": "export function Footer() {}"}, prune=False)
+
+        assert self.index.files("Footer and Header") == ["src/components/Footer.jsx", "src/components/Header.jsx"]
+        assert self.index._compiled() is matcher
+
+    def test_add_after_compile_then_remove_everything(self):
+        """Test that dropping the automaton with additions pending does not break lookups"""
+        self.index.find("Header")
+        self.index.update({"src/components/Footer.jsx": "export function Footer() {}"}, prune=False)
+        self.index.update({})
+
+        assert self.index.find("Footer and Header") == []
+        self.index.update({"src/components/Footer.jsx": "export function Footer() {}"})
+        assert self.index.files("Footer") == ["src/components/Footer.jsx"]
+
+    def test_shared_names_map_to_every_file(self):
+        """Test that a basename used by several files refers to all of them"""
+        self.index.update({"src/a/index.js": "", "src/b/index.js": ""}, prune=False)
+
+        assert self.index.files("error in index.js") == ["src/a/index.js", "src/b/index.js"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,69 @@
+"""
+Unit tests for scaffold templates
+"""
+import json
+import pytest
+from scaffold_templates import normalize_stack, has_template, render_template, project_slug, detect_dependencies
+
+
+class TestScaffoldTemplates:
+    """Test stack normalization and template rendering"""
+
+    PLANNED = ["index.html", "package.json", "src/main.tsx", "src/App.tsx", "src/index.css", "tailwind.config.js"]
+
+    def test_normalize_stack(self):
+        """Test that free-form stacks map to template keys"""
+        assert normalize_stack("React + Tailwind") == "react-tailwind"
+        assert normalize_stack("React (Vite)") == "react"
+        assert normalize_stack("Next.js 14 + TypeScript") == "nextjs"
+        assert normalize_stack("HTML + CSS + JS") == "static"
+        assert normalize_stack("Vue 3") is None
+        assert normalize_stack(None) is None
+
+    def test_only_boilerplate_has_templates(self):
+        """Test that app-specific files are left to the LLM"""
+        assert has_template("React + Tailwind", "tailwind.config.js")
+        assert has_template("React", "./package.json")
+        assert not has_template("React", "src/App.tsx")
+        assert not has_template("HTML + CSS + JS", "index.html")
+
+    def test_package_json_is_parameterized(self):
+        """Test project name, dependencies and TypeScript dev dependencies"""
+        package = json.loads(render_template(
+            "React + Tailwind", "package.json", "todo-app", self.PLANNED, {"axios": "^1.7.2", "tailwindcss": "x"}
+        ))
+
+        assert package["name"] == "todo-app"
+        assert package["dependencies"] == {"axios": "^1.7.2", "react": "^18.3.1", "react-dom": "^18.3.1"}
+        assert package["devDependencies"]["tailwindcss"] == "^3.4.7"
+        assert "typescript" in package["devDependencies"]
+
+    def test_shells_follow_the_plan(self):
+        """Test that the HTML shell and entry point reference the planned files"""
+        html = render_template("React", "index.html", "todo-app", self.PLANNED)
+        main = render_template("React", "src/main.tsx", "todo-app", self.PLANNED)
+
+        assert 'src="/src/main.tsx"' in html
+        assert "<title>Todo App</title>" in html
+        assert "import './index.css';" in main
+        assert render_template("React", "src/main.tsx", "todo-app", ["src/main.tsx"]) is None
+
+    def test_detect_dependencies(self):
+        """Test that bare imports become packages and local imports do not"""
+        files = {
+            "src/App.tsx": "import axios from 'axios';\nimport { x } from './x';\nimport q from '@tanstack/react-query/build';",
+            "src/util.js": "const fs = require('fs');\nimport left from 'left-pad';",
+        }
+
+        assert detect_dependencies(files) == {
+            "@tanstack/react-query": "^5.51.21", "axios": "^1.7.2", "left-pad": "latest"
+        }
+
+    def test_project_slug(self):
+        """Test package-safe project names"""
+        assert project_slug("Build a Todo app, with dark mode!") == "build-a-todo-app-with"
+        assert project_slug("!!!") == "codegenesis-app"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
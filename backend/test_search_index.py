@@ -0,0 +1,183 @@
+"""
+Unit tests for the BM25 search index
+"""
+import pytest
+from search_index import SearchIndex, ChunkIndex, tokenize
+from context_manager import ContextManager
+
+
+FILES = {
+    "src/components/Header.jsx": "export function Header() { return <header className='nav'>Logo</header>; }",
+    "src/components/LoginForm.jsx": "export function LoginForm() { const [email, setEmail] = useState(''); validate(email); }",
+    "src/utils/validate.js": "export function validate(value) { return value.includes('@'); }",
+    "src/styles.css": "body { color: black; } .nav { color: blue; }",
+}
+
+
+class TestTokenize:
+    """Test term extraction"""
+
+    def test_identifiers_are_split(self):
+        """Test that camelCase and snake_case names contribute their parts"""
+        terms = tokenize("TodoList load_user_profile")
+
+        assert "todolist" in terms and "todo" in terms and "list" in terms
+        assert "load_user_profile" in terms and "profile" in terms
+
+    def test_stopwords_are_dropped(self):
+        """Test that common English words are not indexed"""
+        assert tokenize("make the header blue") == ["make", "header", "blue"]
+
+
+class TestSearchIndex:
+    """Test ranking and incremental maintenance"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.index = SearchIndex()
+        self.index.update(FILES)
+
+    def test_filename_match_ranks_first(self):
+        """Test that a term in the path outranks a term in the body"""
+        results = self.index.search("header")
+
+        assert results[0][0] == "src/components/Header.jsx"
+
+    def test_multi_term_query(self):
+        """Test that files matching more query terms rank higher"""
+        names = [name for name, _ in self.index.search("login form validation email")]
+
+        assert names[0] == "src/components/LoginForm.jsx"
+        assert "src/styles.css" not in names
+
+    def test_unmatched_query_returns_nothing(self):
+        """Test that files without any query term are not returned"""
+        assert self.index.search("payment checkout") == []
+
+    def test_update_reindexes_only_changed_files(self):
+        """Test incremental sync statistics"""
+        files = dict(FILES)
+        files["src/styles.css"] += " .checkout { }"
+        del files["src/utils/validate.js"]
+        files["src/pages/Checkout.jsx"] = "export default function Checkout() {}"
+
+        stats = self.index.update(files)
+
+        assert stats == {"added": 1, "updated": 1, "removed": 1, "unchanged": 2}
+        assert "src/utils/validate.js" not in self.index
+        assert [n for n, _ in self.index.search("checkout")][0] == "src/pages/Checkout.jsx"
+
+    def test_cached_results_follow_edits(self):
+        """Test that impact lists follow edits"""
+        assert self.index.search("sidebar") == []
+        self.index.update({**FILES, "src/Sidebar.jsx": "export const Sidebar = () => null;"})
+
+        assert self.index.search("sidebar")[0][0] == "src/Sidebar.jsx"
+
+    def test_impact_lists_are_maintained_incrementally(self):
+        """Test that edits below the drift threshold leave every impact list as a full rebuild would"""
+        files = {f"src/File{i}.js": f"export const item{i} = render(list, item{i % 5});" for i in range(60)}
+        index = SearchIndex()
+        index.update(files)
+        files["src/File3.js"] = "export const sidebar = render(menu);"
+        del files["src/File7.js"]
+        index.update(files)
+        index.remove(["src/File8.js"])
+
+        assert not index._stale and set(index._impacts) == set(index._postings) | set(index._name_postings)
+        for term, (weights, ranked) in index._impacts.items():
+            assert weights == pytest.approx(index._term_weights(term))
+            assert sorted(ranked) == sorted(weights)
+            assert [weights[doc] for doc in ranked] == sorted(weights.values(), reverse=True)
+        assert index.search("sidebar")[0][0] == "src/File3.js"
+
+    def test_matches_exhaustive_scoring(self):
+        """Test that early termination returns the same ranking as scoring every file"""
+        files = {f"src/{a}/{a.title()}{b.title()}{i}.jsx": f"const {b}{i} = use{a.title()}('{b}');"
+                 for i, (a, b) in enumerate((a, b) for a in ("cart", "user", "order", "menu")
+                                            for b in ("button", "list", "card", "cart", "user"))}
+        index = SearchIndex()
+        index.update(files)
+
+        top = index.search("cart user button", limit=3)
+        everything = index.search("cart user button", limit=len(files))
+
+        assert [score for _, score in top] == pytest.approx([score for _, score in everything[:3]])
+
+
+class TestChunkIndex:
+    """Test chunk retrieval"""
+
+    def test_returns_matching_symbol_with_provenance(self):
+        """Test that the relevant function is returned rather than its whole file"""
+        code = ("export function formatPrice(value) {\n  return '$' + value.toFixed(2);\n}\n\n"
+                "export function parseDate(text) {\n  return new Date(text);\n}\n")
+        index = ChunkIndex()
+        index.update({"src/utils.js": code, **FILES})
+
+        chunk, _ = index.search("price formatting")[0]
+
+        assert (chunk.file, chunk.name, chunk.start_line, chunk.end_line) == ("src/utils.js", "formatPrice", 1, 3)
+        assert "parseDate" not in chunk.text
+
+    def test_only_changed_files_are_rechunked(self):
+        """Test incremental sync and removal of stale chunks"""
+        index = ChunkIndex()
+        index.update(FILES)
+        files = {**FILES, "src/utils/validate.js": "export function isEmail(value) { return true; }"}
+
+        stats = index.update(files)
+
+        assert stats == {"added": 0, "updated": 1, "removed": 0, "unchanged": 3}
+        assert index.search("validate value") and index.search("validate value")[0][0].name != "validate"
+        assert index.search("isemail")[0][0].name == "isEmail"
+
+
+class TestContextManagerSearch:
+    """Test ContextManager integration"""
+
+    def test_relevant_files_use_index(self):
+        """Test that get_relevant_files ranks stored project files"""
+        manager = ContextManager()
+        manager.update_project_files("p1", FILES)
+
+        relevant = manager.get_relevant_files("p1", "change the header logo")
+
+        assert list(relevant)[0] == "src/components/Header.jsx"
+        assert relevant["src/components/Header.jsx"] == FILES["src/components/Header.jsx"]
+        assert manager.get_relevant_files("missing", "header") == {}
+
+    def test_file_context_for_query_uses_chunks(self):
+        """Test that query-scoped file context lists chunks with line ranges"""
+        manager = ContextManager()
+        manager.update_project_files("p1", FILES)
+
+        context = manager.build_context_prompt("p1", query="email validation")
+
+        assert context.startswith("## Relevant Code:")
+        assert "### src/components/LoginForm.jsx (lines 1-1): LoginForm" in context
+        assert "Header" not in context
+        assert manager.get_relevant_chunks("missing", "email") == []
+
+    def test_named_files_rank_first(self):
+        """Test that files the query names by symbol come before keyword matches"""
+        manager = ContextManager()
+        manager.update_project_files("p1", FILES)
+
+        relevant = manager.get_relevant_files("p1", "header nav colours clash with LoginForm", limit=2)
+
+        assert list(relevant) == ["src/components/LoginForm.jsx", "src/components/Header.jsx"]
+
+    def test_code_references_use_project_names(self):
+        """Test that references include project files and symbols as well as backticked names"""
+        manager = ContextManager()
+        manager.update_project_files("p1", FILES)
+        message = "call validate from LoginForm, then update `src/App.tsx` and the SettingsPage"
+
+        assert manager.extract_code_references(message, "p1") == ["validate", "LoginForm", "src/App.tsx", "SettingsPage"]
+        assert manager.extract_code_references(message) == ["src/App.tsx", "LoginForm", "SettingsPage"]
+        assert manager.referenced_files("p1", message) == ["src/utils/validate.js", "src/components/LoginForm.jsx"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,174 @@
+"""
+Unit tests for the SQLite context store
+"""
+import threading
+import pytest
+from sqlite_store import SQLiteContextStore
+from context_manager import ContextManager, ConversationSummary
+
+
+class TestSQLiteContextStore:
+    """Test persistence, batching and the read cache"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.stores = []
+
+    def teardown_method(self):
+        """Close stores opened by the test"""
+        for store in self.stores:
+            store.close()
+
+    def open(self, path, **kwargs):
+        store = SQLiteContextStore(str(path), **kwargs)
+        self.stores.append(store)
+        return store
+
+    def test_survives_restart(self, tmp_path):
+        """Test that messages and files persist across store instances"""
+        db = tmp_path / "context.db"
+        store = self.open(db)
+        store.add_message("p1", "user", "make the header blue", {"files": ["Header.jsx"]})
+        store.add_message("p1", "assistant", "done")
+        store.set_file_context("p1", {"Header.jsx": "export function Header() {}"})
+        store.close()
+
+        reopened = self.open(db)
+        reopened.add_message("p2", "user", "new project")
+        messages = reopened.get_conversation("p1")
+        assert [(m.role, m.content) for m in messages] == [("user", "make the header blue"), ("assistant", "done")]
+        assert [m.seq for m in messages] == [1, 2]
+        assert messages[0].metadata == {"files": ["Header.jsx"]}
+        assert reopened.get_file_context("p1") == {"Header.jsx": "export function Header() {}"}
+        assert reopened.get_conversation("p2")[0].seq == 3
+
+    def test_keeps_newest_messages(self, tmp_path):
+        """Test that history is trimmed to max_messages in the cache and on disk"""
+        store = self.open(tmp_path / "context.db", max_messages=3)
+        store.get_conversation("p1")  # Cached from here on
+        for i in range(5):
+            store.add_message("p1", "user", f"m{i}")
+
+        assert [m.content for m in store.get_conversation("p1", 10)] == ["m2", "m3", "m4"]
+        store.flush()
+        uncached = self.open(tmp_path / "context.db", max_messages=3)
+        assert [m.content for m in uncached.get_conversation("p1", 10)] == ["m2", "m3", "m4"]
+
+    def test_reads_see_queued_writes(self, tmp_path):
+        """Test read-your-writes when the project is not cached"""
+        store = self.open(tmp_path / "context.db", cache_projects=1)
+        for i in range(50):
+            store.add_message(f"p{i}", "user", f"hello {i}")
+
+        assert [m.content for m in store.get_conversation("p7")] == ["hello 7"]
+        assert store.stats()["cache_misses"] == 1
+        assert store.get_conversation("p7")[0].content == "hello 7"
+        assert store.stats()["cache_hits"] == 1
+
+    def test_file_updates_and_clear(self, tmp_path):
+        """Test incremental file writes and project clearing"""
+        store = self.open(tmp_path / "context.db")
+        store.set_file_context("p1", {"a.js": "1", "b.js": "2"})
+        store.set_file_context("p1", {"a.js": "1", "c.js": "3"})
+        store.add_message("p1", "user", "hi")
+        store.flush()
+
+        fresh = self.open(tmp_path / "context.db")
+        assert fresh.get_file_context("p1") == {"a.js": "1", "c.js": "3"}
+
+        store.clear_project("p1")
+        store.flush()
+        assert store.get_conversation("p1") == [] and store.get_file_context("p1") == {}
+        assert store.stats()["write_errors"] == 0
+
+    def test_in_place_file_edits_are_written(self, tmp_path):
+        """Test that a dict edited in place and stored again is diffed against the stored copy"""
+        db = tmp_path / "context.db"
+        store = self.open(db)
+        files = {"a.js": "old"}
+        store.set_file_context("p1", files)
+        files["a.js"] = "new"
+        store.set_file_context("p1", files)
+        store.close()
+
+        assert self.open(db).get_file_context("p1") == {"a.js": "new"}
+
+    def test_cache_eviction_releases_derived_state(self, tmp_path):
+        """Test that projects leaving the read cache fire eviction hooks that ContextManager prunes on"""
+        manager = ContextManager(self.open(tmp_path / "context.db", cache_projects=2, cache_file_projects=2))
+        for i in range(5):
+            manager.update_project_files(f"p{i}", {"src/Header.jsx": "export function Header() {}"})
+            manager.add_conversation(f"p{i}", "user", "make the header sticky")
+            assert list(manager.get_relevant_files(f"p{i}", "header")) == ["src/Header.jsx"]
+
+        assert set(manager._indexes) == set(manager._versions) == {"p3", "p4"}
+        assert list(manager.get_relevant_files("p0", "header")) == ["src/Header.jsx"]
+
+    def test_summary_survives_restart_and_clear(self, tmp_path):
+        """Test that rolling summaries persist and are removed with the project"""
+        db = tmp_path / "context.db"
+        store = self.open(db)
+        assert store.get_summary("p1") is None
+        store.add_message("p1", "user", "hi")
+        store.set_summary("p1", ConversationSummary("Wants a dark theme.", through=1, turns=4))
+        store.close()
+
+        reopened = self.open(db)
+        summary = reopened.get_summary("p1")
+        assert (summary.text, summary.through, summary.turns) == ("Wants a dark theme.", 1, 4)
+
+        reopened.clear_project("p1")
+        reopened.flush()
+        assert self.open(db).get_summary("p1") is None
+
+    def test_concurrent_writers_are_batched(self, tmp_path):
+        """Test that writes from several threads all land, in fewer transactions than writes"""
+        store = self.open(tmp_path / "context.db", max_messages=500)
+
+        def write(t):
+            for i in range(100):
+                store.add_message("shared", "user", f"{t}-{i}")
+
+        threads = [threading.Thread(target=write, args=(t,)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.flush()
+
+        assert len(store.get_conversation("shared", 1000)) == 400
+        assert store.stats()["batches"] < 400
+
+    def test_bad_write_does_not_stop_the_writer(self, tmp_path):
+        """Test that a non-SQLite error loses only the bad write and reads don't hang"""
+        store = self.open(tmp_path / "context.db", cache_projects=1)
+        store.add_message("p1", "user", "bad \ud800")
+        store.add_message("p2", "user", "fine")
+
+        assert store.flush(timeout=2)
+        assert store.stats()["write_errors"] >= 1 and "surrogate" in store.last_error
+        assert store.get_conversation("p1") == []
+        assert [m.content for m in store.get_conversation("p2")] == ["fine"]
+        store.add_message("p3", "user", "after")
+        assert [m.content for m in store.get_conversation("p3")] == ["after"]
+
+    def test_closed_store_rejects_writes(self, tmp_path):
+        """Test that writes after close fail instead of being lost"""
+        store = self.open(tmp_path / "context.db")
+        store.close()
+
+        with pytest.raises(RuntimeError):
+            store.add_message("p1", "user", "late")
+
+    def test_context_manager_on_sqlite(self, tmp_path):
+        """Test that ContextManager works unchanged on the persistent store"""
+        manager = ContextManager(self.open(tmp_path / "context.db"))
+        manager.update_project_files("p1", {"src/Header.jsx": "export function Header() {}"})
+        manager.add_conversation("p1", "user", "make the header sticky")
+
+        assert list(manager.get_relevant_files("p1", "header")) == ["src/Header.jsx"]
+        assert "make the header sticky" in manager.get_conversation_context("p1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
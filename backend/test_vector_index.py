@@ -0,0 +1,132 @@
+"""
+Unit tests for the vector index and hybrid ranking
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vector_index import VectorIndex, embed, hybrid_rank  # noqa: E402
+from context_manager import ContextManager  # noqa: E402
+
+
+FILES = {
+    "src/components/Header.jsx": "export function Header() { return <header className='nav'>Logo</header>; }",
+    "src/services/login.js": "export async function authenticateUser(credentials) { return api.post(credentials); }",
+    "src/utils/validate.js": "export function validate(value) { return value.includes('@'); }",
+    "src/styles.css": "body { color: black; } .nav { color: blue; }",
+}
+
+
+class TestEmbed:
+    """Test hashed embeddings"""
+
+    def test_deterministic_unit_vectors(self):
+        """Test that the same text always embeds to the same unit vector"""
+        first = embed("export function Header() {}")
+
+        assert np.array_equal(first, embed("export function Header() {}"))
+        assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-5)
+        assert not embed("").any()
+
+    def test_related_words_are_similar(self):
+        """Test that shared word fragments give a higher similarity than unrelated words"""
+        auth = embed("auth")
+
+        assert float(auth @ embed("authentication")) > float(auth @ embed("stylesheet")) + 0.2
+
+
+class TestVectorIndex:
+    """Test storage, search and incremental maintenance"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.index = VectorIndex()
+        self.index.update(FILES)
+
+    def test_nearest_file_ranks_first(self):
+        """Test that the file sharing the query's wording ranks first"""
+        results = self.index.search("user auth", limit=2)
+
+        assert results[0][0] == "src/services/login.js"
+        assert len(results) == 2 and results[0][1] >= results[1][1]
+
+    def test_update_embeds_only_changed_files(self):
+        """Test that unchanged files keep their rows and removed rows are compacted"""
+        files = dict(FILES)
+        files["src/utils/validate.js"] = "export function validateEmail(value) { return value.includes('@'); }"
+        del files["src/components/Header.jsx"]
+
+        stats = self.index.update(files)
+
+        assert stats == {"added": 0, "updated": 1, "removed": 1, "unchanged": 2}
+        assert len(self.index) == 3 and "src/components/Header.jsx" not in self.index
+        assert self.index.search("validate email", limit=1)[0][0] == "src/utils/validate.js"
+
+    def test_matches_brute_force(self):
+        """Test that search agrees with scoring every file directly after growth and deletes"""
+        index = VectorIndex(dims=64)
+        docs = {f"src/file{i}.js": f"export const value{i} = compute{i % 7}(input{i % 3});" for i in range(40)}
+        index.update(docs)
+        index.remove([f"src/file{i}.js" for i in range(0, 40, 3)])
+        live = {key: text for key, text in docs.items() if key in index}
+
+        query = embed("compute3 input1", 64)
+        expected = sorted(
+            (float(embed(f"{key}\n{text}", 64) @ query) for key, text in live.items()), reverse=True
+        )[:5]
+
+        assert [score for _, score in index.search("compute3 input1", limit=5)] == pytest.approx(expected, abs=1e-5)
+
+
+class TestHybridRank:
+    """Test score fusion"""
+
+    def test_combines_normalized_scores(self):
+        """Test that a result found by both rankers beats one found by a single ranker"""
+        keyword = [("a.js", 12.0), ("b.js", 6.0)]
+        vector = [("b.js", 0.8), ("c.js", 0.4)]
+
+        ranked = hybrid_rank(keyword, vector, limit=3, alpha=0.5)
+
+        assert [key for key, _ in ranked] == ["b.js", "a.js", "c.js"]
+        assert ranked[0][1] == pytest.approx(0.75)
+
+    def test_empty_side_is_ignored(self):
+        """Test that one empty list leaves the other's order"""
+        assert [key for key, _ in hybrid_rank([], [("x", 0.3), ("y", 0.1)])] == ["x", "y"]
+
+
+class TestContextManagerHybrid:
+    """Test hybrid file retrieval through the context manager"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.manager = ContextManager()
+        self.manager.update_project_files("p1", FILES)
+
+    def test_hybrid_finds_related_wording(self):
+        """Test that hybrid ranking matches a word fragment keyword search misses"""
+        assert self.manager.get_relevant_files("p1", "auth") == {}
+        assert list(self.manager.get_relevant_files("p1", "auth", hybrid=True))[0] == "src/services/login.js"
+
+    def test_setting_enables_hybrid_by_default(self):
+        """Test that hybrid_retrieval applies to callers that don't pass hybrid"""
+        manager = ContextManager(hybrid_retrieval=True)
+        manager.update_project_files("p1", FILES)
+
+        assert list(manager.get_relevant_files("p1", "auth"))[0] == "src/services/login.js"
+        assert manager.get_relevant_files("p1", "auth", hybrid=False) == {}
+
+    def test_vector_index_follows_updates(self):
+        """Test that the vector index is kept in sync once built"""
+        self.manager.get_relevant_files("p1", "header", hybrid=True)
+        files = dict(FILES)
+        files["src/session.js"] = "export function sessionTimeout() { return 30; }"
+        self.manager.update_project_files("p1", files)
+
+        assert "src/session.js" in self.manager._vector_indexes["p1"]
+        assert list(self.manager.get_relevant_files("p1", "session timeout", hybrid=True))[0] == "src/session.js"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,179 @@
+"""
+Vector Index for CodeGenesis
+Local hashed n-gram embeddings with vectorized cosine top-k search in NumPy
+"""
+import zlib
+import hashlib
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple, Iterable
+
+import numpy as np
+
+from search_index import tokenize
+
+
+DIMENSIONS = 512
+NGRAM = 3
+TOKEN_WEIGHT = 1.0
+NGRAM_WEIGHT = 0.5
+# Weight of keyword scores when fusing with vector scores
+HYBRID_ALPHA = 0.6
+
+
+@lru_cache(maxsize=65536)
+def _token_features(token: str, dims: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed buckets and signed weights of a token and its character trigrams"""
+    padded = f"#{token}#"
+    features = [token] + [padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)]
+    hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint32, count=len(features))
+    weights = np.full(len(features), NGRAM_WEIGHT, dtype=np.float32)
+    weights[0] = TOKEN_WEIGHT
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    return (hashes % dims).astype(np.intp), signs * weights
+
+
+def embed(text: str, dims: int = DIMENSIONS) -> np.ndarray:
+    """
+    Embed text as a unit-length float32 vector without a model.
+
+    Identifier tokens (whole words and camelCase/snake_case parts) and
+    their character trigrams are hashed into dims buckets with a hashed
+    sign (the "hashing trick"); each token counts with log term frequency.
+    Texts that share identifiers or word fragments ("auth" /
+    "authentication") end up with a positive cosine similarity.
+    """
+    counts = Counter(tokenize(text))
+    if not counts:
+        return np.zeros(dims, dtype=np.float32)
+    parts = [_token_features(token, dims) for token in counts]
+    buckets = np.concatenate([b for b, _ in parts])
+    scale = np.repeat(np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts))),
+                      [len(b) for b, _ in parts])
+    vector = np.bincount(buckets, weights=np.concatenate([w for _, w in parts]) * scale, minlength=dims)
+    vector = vector.astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """
+    Embeddings of a project's files in one contiguous float32 matrix.
+
+    update() re-embeds only files whose content hash changed. Rows are
+    appended into spare capacity (grown by doubling) and deleted by moving
+    the last row into the gap, so the live rows stay contiguous and a query
+    is a single matrix-vector product plus a partial sort.
+    """
+
+    def __init__(self, dims: int = DIMENSIONS):
+        self.dims = dims
+        self._matrix = np.zeros((16, dims), dtype=np.float32)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def update(self, docs: Dict[str, str], prune: bool = True) -> Dict[str, int]:
+        """
+        Sync the index with the given documents.
+
+        Args:
+            docs: Key (filename) -> text
+            prune: Drop indexed keys missing from docs; pass False to add
+                or update only the given entries
+
+        Returns:
+            Counts of added, updated, removed and unchanged documents
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            if prune:
+                stale = [key for key in self._rows if key not in docs]
+                self.remove(stale)
+                stats["removed"] = len(stale)
+
+            for key, text in docs.items():
+                digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+                previous = self._hashes.get(key)
+                if previous == digest:
+                    stats["unchanged"] += 1
+                    continue
+                stats["updated" if previous is not None else "added"] += 1
+                self._hashes[key] = digest
+                self._put(key, embed(f"{key}\n{text}", self.dims))
+        return stats
+
+    def _put(self, key: str, vector: np.ndarray):
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row == len(self._matrix):
+                grown = np.zeros((len(self._matrix) * 2, self.dims), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self._keys.append(key)
+            self._rows[key] = row
+        self._matrix[row] = vector
+
+    def remove(self, keys: Iterable[str]):
+        """Drop documents; the last row moves into each freed slot"""
+        with self._lock:
+            for key in keys:
+                row = self._rows.pop(key, None)
+                if row is None:
+                    continue
+                self._hashes.pop(key, None)
+                last = len(self._keys) - 1
+                if row != last:
+                    moved = self._keys[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._keys[row] = moved
+                    self._rows[moved] = row
+                self._keys.pop()
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """Up to limit (key, cosine similarity) pairs above min_score, best first"""
+        vector = embed(query, self.dims)
+        with self._lock:
+            count = len(self._keys)
+            if not count or limit <= 0 or not vector.any():
+                return []
+            scores = self._matrix[:count] @ vector
+            if limit < count:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(count)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._keys[i], float(scores[i])) for i in top if scores[i] > min_score]
+
+
+def hybrid_rank(
+    keyword: List[Tuple[str, float]],
+    vector: List[Tuple[str, float]],
+    limit: int = 5,
+    alpha: float = HYBRID_ALPHA
+) -> List[Tuple[str, float]]:
+    """
+    Fuse keyword (e.g. BM25) and vector scores.
+
+    Each list is scaled by its best score so both lie in [0, 1], then
+    combined as alpha * keyword + (1 - alpha) * vector. A key missing from
+    one list scores 0 there.
+    """
+    combined: Dict[str, float] = {}
+    for results, weight in ((keyword, alpha), (vector, 1 - alpha)):
+        best = max((score for _, score in results), default=0.0)
+        if best <= 0:
+            continue
+        for key, score in results:
+            combined[key] = combined.get(key, 0.0) + weight * max(score, 0.0) / best
+    ranked = sorted(combined.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:limit]